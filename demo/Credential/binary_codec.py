@@ -0,0 +1,245 @@
+import base64
+import struct
+from .fields import PROPERTY_CLASSES
+
+MAGIC = b"CRB\x01"
+DIGEST_SIZE = 32
+
+_FLAG_SIGNATURE = 0x01
+_FLAG_MULTIPROOF = 0x02
+
+_TAG_NONE = 0
+_TAG_FALSE = 1
+_TAG_TRUE = 2
+_TAG_INT = 3
+_TAG_STR = 4
+_TAG_FLOAT = 5
+
+
+def _write_varint(out: bytearray, value: int):
+    if value < 0:
+        raise ValueError("I varint non possono essere negativi.")
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _write_bytes(out: bytearray, value: bytes):
+    _write_varint(out, len(value))
+    out += value
+
+def _write_str(out: bytearray, value: str):
+    _write_bytes(out, value.encode("utf-8"))
+
+def _write_value(out: bytearray, value):
+    if value is None:
+        out.append(_TAG_NONE)
+    elif value is True:
+        out.append(_TAG_TRUE)
+    elif value is False:
+        out.append(_TAG_FALSE)
+    elif isinstance(value, int):
+        out.append(_TAG_INT)
+        _write_varint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))
+    elif isinstance(value, str):
+        out.append(_TAG_STR)
+        _write_str(out, value)
+    elif isinstance(value, float):
+        out.append(_TAG_FLOAT)
+        out += struct.pack(">d", value)
+    else:
+        raise ValueError(f"Tipo non supportato nella codifica binaria: {type(value).__name__}")
+
+def _write_digest(out: bytearray, hex_digest: str):
+    digest = bytes.fromhex(hex_digest)
+    if len(digest) != DIGEST_SIZE or digest.hex() != hex_digest:
+        raise ValueError(f"Hash non canonico nella merkle proof: {hex_digest}")
+    out += digest
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self._data = bytes(data)
+        self._pos = 0
+
+    def read(self, size: int) -> bytes:
+        end = self._pos + size
+        if end > len(self._data):
+            raise ValueError("Credenziale binaria troncata.")
+        chunk = self._data[self._pos:end]
+        self._pos = end
+        return chunk
+
+    def read_byte(self) -> int:
+        if self._pos >= len(self._data):
+            raise ValueError("Credenziale binaria troncata.")
+        byte = self._data[self._pos]
+        self._pos += 1
+        return byte
+
+    def read_varint(self) -> int:
+        byte = self.read_byte()
+        if byte < 0x80:
+            return byte
+        value = byte & 0x7F
+        shift = 7
+        while True:
+            byte = self.read_byte()
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+
+    def read_bytes(self) -> bytes:
+        return self.read(self.read_varint())
+
+    def read_str(self) -> str:
+        return self.read(self.read_varint()).decode("utf-8")
+
+    def read_value(self):
+        data = self._data
+        pos = self._pos
+        if pos >= len(data):
+            raise ValueError("Credenziale binaria troncata.")
+        tag = data[pos]
+        if tag == _TAG_STR and pos + 1 < len(data) and data[pos + 1] < 0x80:
+            # Caso più frequente: stringa breve con lunghezza su un solo byte.
+            start = pos + 2
+            end = start + data[pos + 1]
+            if end > len(data):
+                raise ValueError("Credenziale binaria troncata.")
+            self._pos = end
+            return data[start:end].decode("utf-8")
+        self._pos = pos + 1
+        if tag == _TAG_NONE:
+            return None
+        if tag == _TAG_TRUE:
+            return True
+        if tag == _TAG_FALSE:
+            return False
+        if tag == _TAG_INT:
+            raw = self.read_varint()
+            return (raw >> 1) if not raw & 1 else -((raw + 1) >> 1)
+        if tag == _TAG_STR:
+            return self.read_str()
+        if tag == _TAG_FLOAT:
+            return struct.unpack(">d", self.read(8))[0]
+        raise ValueError(f"Tag di valore sconosciuto: {tag}")
+
+    def at_end(self) -> bool:
+        return self._pos == len(self._data)
+
+
+def _encode_proof(out: bytearray, proof: list):
+    _write_varint(out, len(proof))
+    directions = bytearray((len(proof) + 7) // 8)
+    for level, (_, position) in enumerate(proof):
+        if position == 'L':
+            directions[level // 8] |= 1 << (level % 8)
+        elif position != 'R':
+            raise ValueError("Posizione del fratello non valida nella prova. Deve essere 'L' o 'R'.")
+    out += directions
+    for sibling_hash, _ in proof:
+        _write_digest(out, sibling_hash)
+
+def _decode_proof(reader: _Reader) -> list:
+    depth = reader.read_varint()
+    if not depth:
+        return []
+    directions = int.from_bytes(reader.read((depth + 7) // 8), 'little')
+    siblings = reader.read(depth * DIGEST_SIZE).hex()
+    return [
+        (siblings[level * 2 * DIGEST_SIZE:(level + 1) * 2 * DIGEST_SIZE], 'L' if directions >> level & 1 else 'R')
+        for level in range(depth)
+    ]
+
+def _encode_property(out: bytearray, prop):
+    prop_dict = prop.toDict()
+    data = prop_dict["data"]
+    field_names = type(prop).__slots__
+    if list(data) != list(field_names):
+        raise ValueError(f"Campi della property {prop.TYPOLOGY} non allineati agli slot della classe.")
+    _write_str(out, prop.TYPOLOGY)
+    _write_value(out, prop.nonce)
+    for name in field_names:
+        _write_value(out, data[name])
+    _encode_proof(out, prop.merkle_proof or [])
+
+def _decode_property(reader: _Reader):
+    typology = reader.read_str()
+    prop_cls = PROPERTY_CLASSES.get(typology)
+    if prop_cls is None:
+        raise ValueError(f"Tipologia non supportata: {typology}")
+    nonce = reader.read_value()
+    data = {name: reader.read_value() for name in prop_cls.__slots__}
+    return prop_cls.fromDict(data, nonce, _decode_proof(reader))
+
+def _encode_multiproof(out: bytearray, multiproof: dict):
+    _write_varint(out, multiproof["leafCount"])
+    indices = multiproof["leafIndices"]
+    _write_varint(out, len(indices))
+    previous = -1
+    for index in indices:
+        _write_varint(out, index - previous - 1)
+        previous = index
+    _write_varint(out, len(multiproof["siblings"]))
+    for sibling_hash in multiproof["siblings"]:
+        _write_digest(out, sibling_hash)
+
+def _decode_multiproof(reader: _Reader) -> dict:
+    leaf_count = reader.read_varint()
+    indices = []
+    previous = -1
+    for _ in range(reader.read_varint()):
+        previous += reader.read_varint() + 1
+        indices.append(previous)
+    sibling_count = reader.read_varint()
+    siblings = reader.read(sibling_count * DIGEST_SIZE).hex()
+    siblings = [siblings[i:i + 2 * DIGEST_SIZE] for i in range(0, len(siblings), 2 * DIGEST_SIZE)]
+    return {"leafCount": leaf_count, "leafIndices": indices, "siblings": siblings}
+
+
+def encode_credential(credential) -> bytes:
+    out = bytearray(MAGIC)
+    for value in (credential.CID, credential.SID, credential.UID, credential.issuanceDate):
+        _write_str(out, value)
+
+    flags = 0
+    if credential.issuerSignature:
+        flags |= _FLAG_SIGNATURE
+    if credential.merkle_multiproof:
+        flags |= _FLAG_MULTIPROOF
+    out.append(flags)
+
+    if credential.issuerSignature:
+        signature = base64.b64decode(credential.issuerSignature, validate=True)
+        if base64.b64encode(signature).decode('utf-8') != credential.issuerSignature:
+            raise ValueError("Firma dell'issuer non in base64 canonico.")
+        _write_bytes(out, signature)
+    if credential.merkle_multiproof:
+        _encode_multiproof(out, credential.merkle_multiproof)
+
+    _write_varint(out, len(credential.properties))
+    for prop in credential.properties:
+        _encode_property(out, prop)
+    return bytes(out)
+
+def decode_credential(data: bytes) -> tuple:
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Formato binario della credenziale non riconosciuto.")
+    reader = _Reader(data)
+    reader.read(len(MAGIC))
+    cid, sid, uid, issuance_date = (reader.read_str() for _ in range(4))
+
+    flags = reader.read_byte()
+    signature = None
+    multiproof = None
+    if flags & _FLAG_SIGNATURE:
+        signature = base64.b64encode(reader.read_bytes()).decode('utf-8')
+    if flags & _FLAG_MULTIPROOF:
+        multiproof = _decode_multiproof(reader)
+
+    properties = [_decode_property(reader) for _ in range(reader.read_varint())]
+    if not reader.at_end():
+        raise ValueError("Byte in eccesso al termine della credenziale binaria.")
+    return cid, sid, uid, issuance_date, properties, signature, multiproof
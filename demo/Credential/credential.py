@@ -1,16 +1,25 @@
 from .fields import *
 import json
 from .merkle_tree import MerkleTree
+from .binary_codec import encode_credential, decode_credential
 from hashlib import sha256
 
 class Credential:
-    def __init__(self, certificateId: str, studentId: str, universityId: str, issuanceDate: str, properties: list, issuerSignature: str = None):
+    _HEADER_FIELDS = frozenset({"CID", "SID", "UID", "issuanceDate"})
+
+    def __init__(self, certificateId: str, studentId: str, universityId: str, issuanceDate: str, properties: list, issuerSignature: str = None, merkleMultiproof: dict = None):
         self.CID = certificateId
         self.SID = studentId
         self.UID = universityId
         self.issuanceDate = issuanceDate
         self.properties = properties
         self.issuerSignature = issuerSignature
+        self.merkle_multiproof = merkleMultiproof
+
+    def __setattr__(self, name, value):
+        if name in Credential._HEADER_FIELDS:
+            object.__setattr__(self, "_fixed_hash", None)
+        object.__setattr__(self, name, value)
 
     def toJSON(self):
         outJson = {
@@ -20,6 +29,9 @@ class Credential:
             "issuanceDate": self.issuanceDate,
             "properties": [p.toDict() for p in self.properties]
         }
+
+        if self.merkle_multiproof:
+            outJson["merkle_multiproof"] = self.merkle_multiproof
         
         if self.issuerSignature:
             outJson["issuerSignature"] = self.issuerSignature
@@ -34,46 +46,36 @@ class Credential:
             studentId = inJsonDict["studentId"]
             universityId = inJsonDict["universityId"]
             issuanceDate = inJsonDict["issuanceDate"]
-            properties = []
             issuerSignature = inJsonDict.get("issuerSignature")
+            merkleMultiproof = inJsonDict.get("merkle_multiproof")
 
-            for prop in inJsonDict["properties"]:
-                typology = prop["typology"]
-                data = prop["data"]
-                nonce = prop.get("nonce")
-                merkle_proof = prop.get("merkle_proof", [])
-
-                if typology == "ErasmusInfo":
-                    newProp = ErasmusInfo.fromDict(data, nonce, merkle_proof)
-                elif typology == "Course":
-                    newProp = Course.fromDict(data, nonce, merkle_proof)
-                elif typology == "ExtraActivity":
-                    newProp = ExtraActivity.fromDict(data, nonce, merkle_proof)
-                elif typology == "Residence":
-                    newProp = Residence.fromDict(data, nonce, merkle_proof)
-                elif typology == "Scholarship":
-                    newProp = Scholarship.fromDict(data, nonce, merkle_proof)
-                elif typology == "SubjectInfo":
-                    newProp = SubjectInfo.fromDict(data, nonce, merkle_proof)    
-                else:
-                    raise ValueError(f"Tipologia non supportata: {typology}")
-                properties.append(newProp)
+            properties = [decode_property(prop) for prop in inJsonDict["properties"]]
 
-            return Credential(certificateId, studentId, universityId, issuanceDate, properties, issuerSignature)
+            return Credential(certificateId, studentId, universityId, issuanceDate, properties, issuerSignature, merkleMultiproof)
 
         except KeyError as e:
             raise ValueError(f"Chiave mancante nel file JSON: {e}")
         except json.JSONDecodeError as e:
             raise ValueError(f"JSON non valido: {e}")
 
+    def toBinary(self) -> bytes:
+        return encode_credential(self)
+
+    @staticmethod
+    def fromBinary(data: bytes):
+        return Credential(*decode_credential(data))
+
     def hash(self):
-        fixed_data = "credentialID" + self.CID + \
-                     "issuerID" + self.UID + \
-                     "issuanceDate" + self.issuanceDate + \
-                     "studentID" + self.SID
+        fixed_hash = self._fixed_hash
+        if fixed_hash is None:
+            fixed_data = "credentialID" + self.CID + \
+                         "issuerID" + self.UID + \
+                         "issuanceDate" + self.issuanceDate + \
+                         "studentID" + self.SID
 
-        fixed_hash = sha256(fixed_data.encode()).hexdigest()
-        merkle_root = MerkleTree.get_merkle_root(self.properties)
+            fixed_hash = sha256(fixed_data.encode()).hexdigest()
+            object.__setattr__(self, "_fixed_hash", fixed_hash)
+        merkle_root = MerkleTree.get_merkle_root(self.properties, self.merkle_multiproof)
         final_hash = sha256((fixed_hash + merkle_root).encode()).hexdigest()
         return final_hash
     
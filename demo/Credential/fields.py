@@ -1,13 +1,53 @@
 from abc import ABC, abstractmethod
+from hashlib import sha256
 import random
+import sys
 import time
 import json 
 
+PROPERTY_DECODERS = {}
+PROPERTY_CLASSES = {}
+
+def register_property(cls):
+    typology = sys.intern(cls.TYPOLOGY)
+    PROPERTY_DECODERS[typology] = cls.fromDict
+    PROPERTY_CLASSES[typology] = cls
+    return cls
+
+def decode_property(prop: dict):
+    typology = prop["typology"]
+    decoder = PROPERTY_DECODERS.get(typology)
+    if decoder is None:
+        raise ValueError(f"Tipologia non supportata: {typology}")
+    return decoder(prop["data"], prop.get("nonce"), prop.get("merkle_proof", []))
+
 class Property(ABC):
+    __slots__ = ("nonce", "merkle_proof", "_leaf_digest")
+    TYPOLOGY = None
+    _UNHASHED_FIELDS = frozenset({"merkle_proof", "_leaf_digest"})
+
     def __init__(self, merkle_proof=None):
         self.nonce = f"{int(time.time() * 1000)}{random.randint(1000, 9999)}"
         self.merkle_proof = merkle_proof if merkle_proof is not None else []
 
+    # Il digest della foglia è memorizzato e invalidato a ogni assegnazione di un
+    # campo. Una modifica in place di un valore mutabile (es. una lista o un dizionario
+    # assegnato a un campo) non passa da __setattr__: va seguita da invalidate_digest().
+    def __setattr__(self, name, value):
+        if name not in Property._UNHASHED_FIELDS:
+            object.__setattr__(self, "_leaf_digest", None)
+        object.__setattr__(self, name, value)
+
+    def leaf_digest(self) -> bytes:
+        digest = getattr(self, "_leaf_digest", None)
+        if digest is None:
+            digest = sha256(self.toHashString().encode()).digest()
+            object.__setattr__(self, "_leaf_digest", digest)
+        return digest
+
+    def invalidate_digest(self):
+        object.__setattr__(self, "_leaf_digest", None)
+
     def _dict_base(self, typology: str, data: dict) -> dict:
         out = {
             "typology": typology,
@@ -38,7 +78,11 @@ class Property(ABC):
     def fromDict(cls, data, nonce, merkle_proof=None):
         pass
 
+@register_property
 class SubjectInfo(Property):
+    __slots__ = ("name", "surname", "birthDate", "gender", "nationality", "documentNumber", "documentIssuer", "email")
+    TYPOLOGY = sys.intern("SubjectInfo")
+
     def __init__(self, name, surname, birthDate, gender, nationality, documentNumber, documentIssuer, email, nonce=None, merkle_proof=None):
         super().__init__(merkle_proof)
         self.name = name
@@ -56,7 +100,7 @@ class SubjectInfo(Property):
         return self.name + self.surname + self.birthDate + self.gender + self.nationality + self.documentNumber + self.documentIssuer + self.email + str(self.nonce)
 
     def toDict(self):
-        return self._dict_base("SubjectInfo", {
+        return self._dict_base(self.TYPOLOGY, {
             "name": self.name,
             "surname": self.surname,
             "birthDate": self.birthDate,
@@ -81,7 +125,11 @@ class SubjectInfo(Property):
             merkle_proof = [tuple(item) for item in merkle_proof]
         return cls(data["name"], data["surname"], data["birthDate"], data["gender"], data["nationality"], data["documentNumber"], data["documentIssuer"], data["email"], nonce, merkle_proof)
 
+@register_property
 class ErasmusInfo(Property):
+    __slots__ = ("programName", "startActivity", "endActivity")
+    TYPOLOGY = sys.intern("ErasmusInfo")
+
     def __init__(self, programName, startActivity, endActivity, nonce=None, merkle_proof=None):
         super().__init__(merkle_proof)
         self.programName = programName
@@ -94,7 +142,7 @@ class ErasmusInfo(Property):
         return self.programName + self.startActivity + self.endActivity + str(self.nonce)
 
     def toDict(self):
-        return self._dict_base("ErasmusInfo", {
+        return self._dict_base(self.TYPOLOGY, {
             "programName": self.programName,
             "startActivity": self.startActivity,
             "endActivity": self.endActivity
@@ -112,7 +160,11 @@ class ErasmusInfo(Property):
             merkle_proof = [tuple(item) for item in merkle_proof]
         return cls(data["programName"], data["startActivity"], data["endActivity"], nonce, merkle_proof)
 
+@register_property
 class Course(Property):
+    __slots__ = ("name", "achieved", "grade", "cfu", "achievementData")
+    TYPOLOGY = sys.intern("Course")
+
     def __init__(self, name, achieved, grade, cfu, achievementData, nonce=None, merkle_proof=None):
         super().__init__(merkle_proof)
         self.name = name
@@ -127,7 +179,7 @@ class Course(Property):
         return self.name + str(self.achieved) + str(self.grade) + str(self.cfu) + self.achievementData + str(self.nonce)
 
     def toDict(self):
-        return self._dict_base("Course", {
+        return self._dict_base(self.TYPOLOGY, {
             "name": self.name,
             "achieved": self.achieved,
             "grade": self.grade,
@@ -152,7 +204,11 @@ class Course(Property):
             merkle_proof = [tuple(item) for item in merkle_proof]
         return cls(data["name"], data["achieved"], data["grade"], data["cfu"], data["achievementData"], nonce, merkle_proof)
 
+@register_property
 class ExtraActivity(Property):
+    __slots__ = ("name", "cfu")
+    TYPOLOGY = sys.intern("ExtraActivity")
+
     def __init__(self, name, cfu, nonce=None, merkle_proof=None):
         super().__init__(merkle_proof)
         self.name = name
@@ -164,7 +220,7 @@ class ExtraActivity(Property):
         return self.name + str(self.cfu) + str(self.nonce)
 
     def toDict(self):
-        return self._dict_base("ExtraActivity", {
+        return self._dict_base(self.TYPOLOGY, {
             "name": self.name,
             "cfu": self.cfu
         })
@@ -181,7 +237,11 @@ class ExtraActivity(Property):
             merkle_proof = [tuple(item) for item in merkle_proof]
         return cls(data["name"], data["cfu"], nonce, merkle_proof)
 
+@register_property
 class Residence(Property):
+    __slots__ = ("typology", "address")
+    TYPOLOGY = sys.intern("Residence")
+
     def __init__(self, typology, address, nonce=None, merkle_proof=None):
         super().__init__(merkle_proof)
         self.typology = typology
@@ -193,7 +253,7 @@ class Residence(Property):
         return self.typology + self.address + str(self.nonce)
 
     def toDict(self):
-        return self._dict_base("Residence", {
+        return self._dict_base(self.TYPOLOGY, {
             "typology": self.typology,
             "address": self.address
         })
@@ -210,7 +270,11 @@ class Residence(Property):
             merkle_proof = [tuple(item) for item in merkle_proof]
         return cls(data["typology"], data["address"], nonce, merkle_proof)
 
+@register_property
 class Scholarship(Property):
+    __slots__ = ("amount", "unit", "payments")
+    TYPOLOGY = sys.intern("Scholarship")
+
     def __init__(self, amount, unit, payments, nonce=None, merkle_proof=None):
         super().__init__(merkle_proof)
         self.amount = amount
@@ -223,7 +287,7 @@ class Scholarship(Property):
         return str(self.amount) + self.unit + str(self.payments) + str(self.nonce)
 
     def toDict(self):
-        return self._dict_base("Scholarship", {
+        return self._dict_base(self.TYPOLOGY, {
             "amount": self.amount,
             "unit": self.unit,
             "payments": self.payments
@@ -1,65 +1,202 @@
 import hashlib
+from binascii import hexlify
 from .fields import Property
 
-class MerkleNode:
-    def __init__(self, left=None, right=None, value=None):
-        self.left = left
-        self.right = right
-        self.value = value
+DIGEST_SIZE = 32
+
+class MerkleProofError(ValueError):
+    def __init__(self, property_index: int, typology: str, detail: str, level: int = None,
+                 computed_hash: str = None, expected_hash: str = None):
+        self.property_index = property_index
+        self.typology = typology
+        self.level = level
+        self.computed_hash = computed_hash
+        self.expected_hash = expected_hash
+        super().__init__(
+            f"Inconsistenza rilevata nella merkle proof della property {property_index} "
+            f"(Tipo: {typology}). {detail}"
+        )
+
+    @classmethod
+    def node_mismatch(cls, property_index: int, prop: Property, level: int, computed: bytes, expected: bytes):
+        return cls(
+            property_index, MerkleProofError.typology_of(prop),
+            f"Hash calcolato al livello {level}: {computed.hex()}, hash atteso: {expected.hex()}",
+            level, computed.hex(), expected.hex()
+        )
+
+    @staticmethod
+    def typology_of(prop: Property) -> str:
+        return prop.toDict()['typology'] if hasattr(prop, 'toDict') else 'N/A'
 
 class MerkleTree:
     @staticmethod
-    def _build_tree_nodes(nodes: list[MerkleNode]) -> MerkleNode:
-        if not nodes:
+    def _leaf_digest(prop: Property) -> bytes:
+        return prop.leaf_digest()
+
+    @staticmethod
+    def _build_levels(leaf_digests: list[bytes]) -> list[bytearray]:
+        if not leaf_digests:
             raise ValueError("Cannot build tree from empty list of nodes.")
-        if len(nodes) == 1:
-            return nodes[0]
-
-        new_level = []
-        for i in range(0, len(nodes), 2):
-            left = nodes[i]
-            right = nodes[i + 1] if i + 1 < len(nodes) else nodes[i]
-            
-            combined = left.value + right.value
-            parent_hash = hashlib.sha256(combined.encode()).hexdigest()
-            parent_node = MerkleNode(left, right, parent_hash)
-            new_level.append(parent_node)
-        
-        return MerkleTree._build_tree_nodes(new_level)
-
-    @staticmethod
-    def _get_proof_static(leaves: list[MerkleNode], index: int) -> list[tuple[str, str]]:
-        if not (0 <= index < len(leaves)):
-            raise IndexError("Leaf index out of range for Merkle proof generation.")
 
+        sha256 = hashlib.sha256
+        level = bytearray().join(leaf_digests)
+        levels = [level]
+        while len(level) > DIGEST_SIZE:
+            if len(level) % (2 * DIGEST_SIZE):
+                level = level + level[-DIGEST_SIZE:]
+            # I nodi interni sono calcolati sulla concatenazione esadecimale dei figli:
+            # hexlify sui 64 byte della coppia equivale a left.hex() + right.hex().
+            view = memoryview(level)
+            new_level = bytearray().join(
+                sha256(hexlify(view[i:i + 2 * DIGEST_SIZE])).digest()
+                for i in range(0, len(level), 2 * DIGEST_SIZE)
+            )
+            view.release()
+            levels.append(new_level)
+            level = new_level
+        return levels
+
+    @staticmethod
+    def _node(level: bytearray, index: int) -> bytes:
+        offset = index * DIGEST_SIZE
+        return bytes(level[offset:offset + DIGEST_SIZE])
+
+    @staticmethod
+    def _proof_from_levels(levels: list[bytearray], index: int) -> list[tuple[str, str]]:
         proof = []
-        current_level_nodes = leaves.copy()
-        current_node_index_on_level = index 
-        
-        while len(current_level_nodes) > 1:
-            new_level_nodes = []
-            next_level_index_for_current_node = -1
-
-            for i in range(0, len(current_level_nodes), 2):
-                left_child = current_level_nodes[i]
-                right_child = current_level_nodes[i + 1] if i + 1 < len(current_level_nodes) else left_child
-
-                if current_node_index_on_level == i:
-                    proof.append((right_child.value, 'R'))
-                    next_level_index_for_current_node = len(new_level_nodes)
-                elif current_node_index_on_level == i + 1:
-                    proof.append((left_child.value, 'L'))
-                    next_level_index_for_current_node = len(new_level_nodes)
-                
-                combined = left_child.value + right_child.value
-                parent_hash = hashlib.sha256(combined.encode()).hexdigest()
-                new_level_nodes.append(MerkleNode(value=parent_hash))
-            
-            current_level_nodes = new_level_nodes
-            current_node_index_on_level = next_level_index_for_current_node
-            
+        for level in levels[:-1]:
+            level_size = len(level) // DIGEST_SIZE
+            if index % 2 == 0:
+                sibling_index = index + 1 if index + 1 < level_size else index
+                proof.append((MerkleTree._node(level, sibling_index).hex(), 'R'))
+            else:
+                proof.append((MerkleTree._node(level, index - 1).hex(), 'L'))
+            index //= 2
         return proof
 
+    @staticmethod
+    def _get_proof_static(leaf_digests: list[bytes], index: int) -> list[tuple[str, str]]:
+        if not (0 <= index < len(leaf_digests)):
+            raise IndexError("Leaf index out of range for Merkle proof generation.")
+        return MerkleTree._proof_from_levels(MerkleTree._build_levels(leaf_digests), index)
+
+    @staticmethod
+    def generate_proofs(properties: list[Property]) -> tuple[str, list[list[tuple[str, str]]]]:
+        if not properties:
+            raise ValueError("Le operazioni su MerkleTree richiedono almeno una property.")
+
+        levels = MerkleTree._build_levels([MerkleTree._leaf_digest(p) for p in properties])
+        proofs = [MerkleTree._proof_from_levels(levels, i) for i in range(len(properties))]
+        return bytes(levels[-1]).hex(), proofs
+
+    @staticmethod
+    def _level_sizes(leaf_count: int) -> list[int]:
+        sizes = [leaf_count]
+        while sizes[-1] > 1:
+            sizes.append((sizes[-1] + 1) // 2)
+        return sizes
+
+    @staticmethod
+    def _collect_multiproof(get_node, sizes: list[int], leaf_indices: list[int]) -> list[str]:
+        siblings = []
+        known = leaf_indices
+        for level, size in enumerate(sizes[:-1]):
+            parents = []
+            i = 0
+            while i < len(known):
+                index = known[i]
+                if index % 2 == 0:
+                    if i + 1 < len(known) and known[i + 1] == index + 1:
+                        i += 1
+                    elif index + 1 < size:
+                        siblings.append(get_node(level, index + 1).hex())
+                else:
+                    siblings.append(get_node(level, index - 1).hex())
+                parents.append(index // 2)
+                i += 1
+            known = parents
+        return siblings
+
+    @staticmethod
+    def _check_multiproof_indices(leaf_indices: list[int], leaf_count: int):
+        if not leaf_indices:
+            raise ValueError("La multiproof deve coprire almeno una property.")
+        if any(b <= a for a, b in zip(leaf_indices, leaf_indices[1:])):
+            raise ValueError("Gli indici della multiproof devono essere strettamente crescenti.")
+        if leaf_indices[0] < 0 or leaf_indices[-1] >= leaf_count:
+            raise IndexError("Indice della multiproof fuori dal numero di foglie dell'albero.")
+
+    @staticmethod
+    def _multiproof_nodes(leaf_digests: list[bytes], multiproof: dict) -> list[dict[int, bytes]]:
+        leaf_count = multiproof["leafCount"]
+        leaf_indices = list(multiproof["leafIndices"])
+        MerkleTree._check_multiproof_indices(leaf_indices, leaf_count)
+        if len(leaf_indices) != len(leaf_digests):
+            raise ValueError("Il numero di property non corrisponde agli indici della multiproof.")
+
+        sha256 = hashlib.sha256
+        siblings = iter(multiproof["siblings"])
+        nodes = [dict(zip(leaf_indices, leaf_digests))]
+        known = leaf_indices
+        try:
+            for size in MerkleTree._level_sizes(leaf_count)[:-1]:
+                level_nodes = nodes[-1]
+                parents = {}
+                i = 0
+                while i < len(known):
+                    index = known[i]
+                    if index % 2 == 0:
+                        if i + 1 < len(known) and known[i + 1] == index + 1:
+                            i += 1
+                        elif index + 1 < size:
+                            level_nodes[index + 1] = bytes.fromhex(next(siblings))
+                        right = level_nodes.get(index + 1, level_nodes[index])
+                        left = level_nodes[index]
+                    else:
+                        level_nodes[index - 1] = left = bytes.fromhex(next(siblings))
+                        right = level_nodes[index]
+                    parents[index // 2] = sha256(hexlify(left + right)).digest()
+                    i += 1
+                nodes.append(parents)
+                known = list(parents)
+        except StopIteration:
+            raise ValueError("Multiproof incompleta: mancano hash fratelli.")
+        if next(siblings, None) is not None:
+            raise ValueError("Multiproof non valida: sono presenti hash fratelli in eccesso.")
+        return nodes
+
+    @staticmethod
+    def generate_multiproof(properties: list[Property], leaf_indices: list[int], multiproof: dict = None) -> dict:
+        leaf_indices = sorted(set(leaf_indices))
+        if multiproof is None:
+            if not properties:
+                raise ValueError("Le operazioni su MerkleTree richiedono almeno una property.")
+            leaf_count = len(properties)
+            MerkleTree._check_multiproof_indices(leaf_indices, leaf_count)
+            levels = MerkleTree._build_levels([MerkleTree._leaf_digest(p) for p in properties])
+            get_node = lambda level, index: MerkleTree._node(levels[level], index)
+        else:
+            # Credenziale già parziale: i nodi necessari alla nuova multiproof
+            # sono tutti ricostruibili a partire da quella esistente.
+            leaf_count = multiproof["leafCount"]
+            MerkleTree._check_multiproof_indices(leaf_indices, leaf_count)
+            nodes = MerkleTree._multiproof_nodes([MerkleTree._leaf_digest(p) for p in properties], multiproof)
+            if any(index not in nodes[0] for index in leaf_indices):
+                raise ValueError("La multiproof esistente non copre tutte le property richieste.")
+            get_node = lambda level, index: nodes[level][index]
+
+        return {
+            "leafCount": leaf_count,
+            "leafIndices": leaf_indices,
+            "siblings": MerkleTree._collect_multiproof(get_node, MerkleTree._level_sizes(leaf_count), leaf_indices)
+        }
+
+    @staticmethod
+    def compute_root_from_multiproof(properties: list[Property], multiproof: dict) -> str:
+        nodes = MerkleTree._multiproof_nodes([MerkleTree._leaf_digest(p) for p in properties], multiproof)
+        return nodes[-1][0].hex()
+
     @staticmethod
     def compute_root_from_proof(leaf_hash: str, proof: list[tuple[str, str]]) -> str:
         computed_hash = leaf_hash
@@ -74,35 +211,66 @@ class MerkleTree:
         return computed_hash
 
     @staticmethod
-    def get_merkle_root(properties: list[Property]) -> str:
+    def verify_proofs(properties: list[Property]) -> str:
+        if not properties:
+            raise ValueError("Le operazioni su MerkleTree richiedono almeno una property.")
+
+        sha256 = hashlib.sha256
+        depth = len(properties[0].merkle_proof)
+        # Nodi già verificati, indicizzati per (livello, indice): ogni nodo
+        # condiviso fra più proof viene calcolato una sola volta.
+        verified_nodes = {}
+        for i, prop in enumerate(properties):
+            proof = prop.merkle_proof
+            if len(proof) != depth:
+                raise MerkleProofError(
+                    i, MerkleProofError.typology_of(prop),
+                    f"La proof ha {len(proof)} livelli, attesi {depth}."
+                )
+
+            index = 0
+            for level, (_, sibling_position) in enumerate(proof):
+                if sibling_position == 'L':
+                    index |= 1 << level
+                elif sibling_position != 'R':
+                    raise ValueError("Posizione del fratello non valida nella prova. Deve essere 'L' o 'R'.")
+
+            node = MerkleTree._leaf_digest(prop)
+            for level in range(depth + 1):
+                known = verified_nodes.get((level, index))
+                if known is not None:
+                    if known != node:
+                        raise MerkleProofError.node_mismatch(i, prop, level, node, known)
+                    break
+                verified_nodes[(level, index)] = node
+                if level == depth:
+                    break
+
+                sibling = bytes.fromhex(proof[level][0])
+                sibling_key = (level, index ^ 1)
+                known_sibling = verified_nodes.get(sibling_key)
+                if known_sibling is not None and known_sibling != sibling:
+                    raise MerkleProofError.node_mismatch(i, prop, level, sibling, known_sibling)
+                verified_nodes[sibling_key] = sibling
+
+                pair = node + sibling if index % 2 == 0 else sibling + node
+                node = sha256(hexlify(pair)).digest()
+                index //= 2
+
+        return verified_nodes[(depth, 0)].hex()
+
+    @staticmethod
+    def get_merkle_root(properties: list[Property], multiproof: dict = None) -> str:
         if not properties:
             raise ValueError("Le operazioni su MerkleTree richiedono almeno una property.")
+        if multiproof:
+            return MerkleTree.compute_root_from_multiproof(properties, multiproof)
         if properties[0].merkle_proof:
-            first_prop_hash = hashlib.sha256(properties[0].toHashString().encode()).hexdigest()
-            expected_overall_merkle_root = MerkleTree.compute_root_from_proof(first_prop_hash, properties[0].merkle_proof)
-            
-            for i, prop in enumerate(properties):
-                prop_hash = hashlib.sha256(prop.toHashString().encode()).hexdigest()
-                computed_root_from_proof = MerkleTree.compute_root_from_proof(prop_hash, prop.merkle_proof)
-                
-                if computed_root_from_proof != expected_overall_merkle_root:
-                    raise ValueError(
-                        f"Inconsistenza rilevata nella merkle proof della property {i} "
-                        f"(Tipo: {prop.toDict()['typology'] if hasattr(prop, 'toDict') else 'N/A'}). "
-                        f"Root calcolata: {computed_root_from_proof}, Root attesa: {expected_overall_merkle_root}"
-                    )
-            return expected_overall_merkle_root
+            return MerkleTree.verify_proofs(properties)
         else:
-            leaves = [
-                MerkleNode(value=hashlib.sha256(p.toHashString().encode()).hexdigest())
-                for p in properties
-            ]
-            
-            root_node = MerkleTree._build_tree_nodes(leaves)
-            overall_merkle_root = root_node.value
-            
-            return overall_merkle_root
-        
+            leaves = [MerkleTree._leaf_digest(p) for p in properties]
+            return bytes(MerkleTree._build_levels(leaves)[-1]).hex()
+
 
     @staticmethod
     def populate_proofs(properties: list[Property]) -> str:
@@ -111,12 +279,9 @@ class MerkleTree:
 
         if properties[0].merkle_proof:
             print("Richiesta ignorata perché le merkle proof delle property sono già popolate")
-        else:
-            leaves = [
-                MerkleNode(value=hashlib.sha256(p.toHashString().encode()).hexdigest())
-                for p in properties
-            ]
-            root_node = MerkleTree._build_tree_nodes(leaves)
-            for i, p in enumerate(properties):
-                p.merkle_proof = MerkleTree._get_proof_static(leaves, i)
-            
\ No newline at end of file
+            return MerkleTree.get_merkle_root(properties)
+
+        root, proofs = MerkleTree.generate_proofs(properties)
+        for p, proof in zip(properties, proofs):
+            p.merkle_proof = proof
+        return root
@@ -5,7 +5,9 @@ from University.university import University
 from SmartContractAuthority.utils.contract_utils import load_contract_interface
 from SmartContractAuthority.utils.file_utils import load_json, save_json
 from SmartContractAuthority.services.sca_blockchain_manager import SCABlockchainManager
+from services.abi_cache import load_abi
 from utils.identifiers_utils import *
+from utils.crypto_utils import invalidate_public_key
 
 class SmartContractAuthority:
     DEFAULT_RPC_URL = 'http://127.0.0.1:7545'
@@ -40,14 +42,16 @@ class SmartContractAuthority:
         self.registered_universities = data["registered_universities"]
 
         try:
-            self.blockchain_manager = SCABlockchainManager(self.DEFAULT_RPC_URL)
+            self.blockchain_manager = SCABlockchainManager(
+                self.DEFAULT_RPC_URL, gas_profile_path=os.path.join(persistency_path, "gas_profile.json")
+            )
         except ConnectionError as e:
             print(f"Errore di connessione alla blockchain: {e}")
             raise
 
         abi_path = os.path.join(smart_contract_build_path, 'SmartContractAuthority/SmartContractAuthority.json')
         try:
-            abi = load_json(abi_path)
+            abi = load_abi(abi_path)
         except FileNotFoundError:
             print(f"Errore: ABI del contratto SmartContractAuthority non trovata: {abi_path}")
             raise
@@ -186,6 +190,11 @@ class SmartContractAuthority:
             print(f"Errore: L'UID '{uid}' non è registrato. Impossibile modificare le informazioni.")
             raise ValueError(f"L'università '{full_uid}' non è registrata.")
 
+        try:
+            old_pub_key_modulus, old_pub_key_exponent, _, _, _ = self.blockchain_manager.get_university_info_on_chain(self.uid_contract_instance, uid)
+        except Exception:
+            old_pub_key_modulus = old_pub_key_exponent = None
+
         try:
             self.blockchain_manager.modify_university_info_on_chain(
                 uid_contract_instance=self.uid_contract_instance,
@@ -203,6 +212,9 @@ class SmartContractAuthority:
             print(f"Errore durante la modifica delle informazioni dell'Università '{full_uid}' sulla blockchain: {e}")
             raise
 
+        if old_pub_key_modulus is not None:
+            invalidate_public_key(old_pub_key_modulus, old_pub_key_exponent)
+
     def get_university_info(self, full_uid: str) -> tuple[bytes, bytes, bool, str, str]:
         uid = split_UID(full_uid)
         if uid not in self.registered_universities:
@@ -1,6 +1,7 @@
 import os
 import json
 from web3 import Web3
+from services.fee_oracle import DEFAULT_GAS_MARGIN
 
 def load_contract_interface(build_dir, contract_name):
     contract_path = os.path.join(build_dir, contract_name)
@@ -19,11 +20,15 @@ def load_contract_interface(build_dir, contract_name):
 
 def deploy_contract(w3: Web3, private_key: str, account_address: str, abi, bytecode):
     contract = w3.eth.contract(abi=abi, bytecode=bytecode)
+    try:
+        gas = int(contract.constructor().estimate_gas({'from': account_address}) * DEFAULT_GAS_MARGIN)
+    except Exception:
+        gas = 2000000
     transaction = contract.constructor().build_transaction({
         'from': account_address,
         'nonce': w3.eth.get_transaction_count(account_address),
         'gasPrice': w3.eth.gas_price,
-        'gas': 2000000
+        'gas': gas
     })
 
     signed_tx = w3.eth.account.sign_transaction(transaction, private_key=private_key)
@@ -8,8 +8,13 @@ contract CIDSmartContract {
 
     mapping(uint256 => bool) public isCIDRegistered;
 
+    mapping(uint256 => bytes32) public cidBatchRoots;
+
+    mapping(uint256 => uint256) private revokedAnchoredCids;
+
     event CIDRegistered(uint256 indexed cid, bool isValid);
     event CIDModified(uint256 indexed cid, bool newIsValid);
+    event CIDBatchAnchored(uint256 indexed batchId, bytes32 root, uint256 size);
 
     constructor() {
         owner = msg.sender;
@@ -29,6 +34,25 @@ contract CIDSmartContract {
         uint256 _cid,
         bool _isValid
     ) external onlyOwner {
+        _registraCid(_cid, _isValid);
+    }
+
+    /**
+     * @dev Allows the university owner to register the CIDs of a batch of new credentials
+     * in a single transaction. One `CIDRegistered` event is emitted per CID.
+     * @param _cids The unique identifiers for the credentials.
+     * @param _isValid Initial validity status of every CID in the batch.
+     */
+    function registraCids(
+        uint256[] calldata _cids,
+        bool _isValid
+    ) external onlyOwner {
+        for (uint256 i = 0; i < _cids.length; i++) {
+            _registraCid(_cids[i], _isValid);
+        }
+    }
+
+    function _registraCid(uint256 _cid, bool _isValid) private {
         require(!isCIDRegistered[_cid], "CID is already registered.");
         cids[_cid] = _isValid;
         isCIDRegistered[_cid] = true;
@@ -61,4 +85,80 @@ contract CIDSmartContract {
         require(isCIDRegistered[_cid], "CID is not registered.");
         return cids[_cid];
     }
+
+    /**
+     * @dev Allows the university owner to anchor a batch of CIDs by committing only the root
+     * of their Merkle tree. Leaves are `keccak256(abi.encodePacked(cid))` and inner nodes hash
+     * the two children in ascending order. Anchored CIDs are valid until revoked in the bitmap.
+     * @param _batchId The unique identifier for the batch.
+     * @param _root The Merkle root of the CIDs in the batch.
+     * @param _size The number of CIDs in the batch.
+     */
+    function ancoraBatchCid(
+        uint256 _batchId,
+        bytes32 _root,
+        uint256 _size
+    ) external onlyOwner {
+        require(_root != bytes32(0), "Invalid CID batch root.");
+        require(cidBatchRoots[_batchId] == bytes32(0), "CID batch is already anchored.");
+        cidBatchRoots[_batchId] = _root;
+        emit CIDBatchAnchored(_batchId, _root, _size);
+    }
+
+    /**
+     * @dev Allows the university owner to modify the validity of an anchored CID.
+     * Validity is tracked in a packed bitmap: one storage slot covers 256 CIDs.
+     * @param _cid The unique identifier for the credential.
+     * @param _newIsValid The new validity status for the CID.
+     */
+    function modificaCidAncorato(
+        uint256 _cid,
+        bool _newIsValid
+    ) external onlyOwner {
+        uint256 mask = uint256(1) << (_cid & 0xff);
+        if (_newIsValid) {
+            revokedAnchoredCids[_cid >> 8] &= ~mask;
+        } else {
+            revokedAnchoredCids[_cid >> 8] |= mask;
+        }
+        emit CIDModified(_cid, _newIsValid);
+    }
+
+    /**
+     * @dev Allows to check the revocation bitmap for an anchored CID.
+     * @param _cid The unique identifier for the credential.
+     * @return isRevoked True if the CID has been revoked.
+     */
+    function isCidAncoratoRevocato(
+        uint256 _cid
+    ) public view returns (bool isRevoked) {
+        return ((revokedAnchoredCids[_cid >> 8] >> (_cid & 0xff)) & 1) == 1;
+    }
+
+    /**
+     * @dev Allows to obtain information about an anchored CID given its inclusion proof.
+     * This method is typically invoked by the `SmartContractAuthority`.
+     * @param _batchId The batch the CID was anchored in.
+     * @param _cid The unique identifier for the credential.
+     * @param _proof The sibling hashes from the leaf up to the batch root.
+     * @return isValid The validity status of the CID.
+     */
+    function getInfoCidAncorato(
+        uint256 _batchId,
+        uint256 _cid,
+        bytes32[] calldata _proof
+    ) external view returns (bool isValid) {
+        bytes32 root = cidBatchRoots[_batchId];
+        require(root != bytes32(0), "CID batch is not anchored.");
+
+        bytes32 node = keccak256(abi.encodePacked(_cid));
+        for (uint256 i = 0; i < _proof.length; i++) {
+            bytes32 sibling = _proof[i];
+            node = node < sibling
+                ? keccak256(abi.encodePacked(node, sibling))
+                : keccak256(abi.encodePacked(sibling, node));
+        }
+        require(node == root, "CID is not part of the anchored batch.");
+        return !isCidAncoratoRevocato(_cid);
+    }
 }
@@ -0,0 +1,36 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+contract Multicall {
+    struct Call {
+        address target;
+        bytes callData;
+    }
+
+    struct Result {
+        bool success;
+        bytes returnData;
+    }
+
+    /**
+     * @dev Executes a list of read-only calls in a single `eth_call`.
+     * Used for bulk status checks on nodes that limit JSON-RPC batch size.
+     * @param _requireSuccess If true, the whole aggregate reverts when any call fails.
+     * @param _calls The target contracts and their ABI-encoded call data.
+     * @return returnData The success flag and raw return data of each call, in order.
+     */
+    function tryAggregate(
+        bool _requireSuccess,
+        Call[] calldata _calls
+    ) external view returns (Result[] memory returnData) {
+        returnData = new Result[](_calls.length);
+        for (uint256 i = 0; i < _calls.length; i++) {
+            (bool success, bytes memory ret) = _calls[i].target.staticcall(_calls[i].callData);
+            if (_requireSuccess) {
+                require(success, "Multicall: call failed.");
+            }
+            returnData[i] = Result(success, ret);
+        }
+        return returnData;
+    }
+}
@@ -49,6 +49,39 @@ contract SIDSmartContract {
         bytes memory _pub_key_exponent,
         bool _isValid
     ) external onlyOwner {
+        _registraSid(_sid, _pub_key_modulus, _pub_key_exponent, _isValid);
+    }
+
+    /**
+     * @dev Allows the university owner to register a batch of new SIDs in a single transaction.
+     * The three arrays are positional: the i-th SID uses the i-th modulus and exponent.
+     * One `SIDRegistered` event is emitted per SID.
+     * @param _sids The unique identifiers for the students (uint128).
+     * @param _pub_key_moduli The RSA public key moduli (bytes).
+     * @param _pub_key_exponents The RSA public key exponents (bytes).
+     * @param _isValid Initial validity status of every SID in the batch.
+     */
+    function registraSids(
+        uint128[] calldata _sids,
+        bytes[] calldata _pub_key_moduli,
+        bytes[] calldata _pub_key_exponents,
+        bool _isValid
+    ) external onlyOwner {
+        require(
+            _sids.length == _pub_key_moduli.length && _sids.length == _pub_key_exponents.length,
+            "SIDs, moduli and exponents must have the same length."
+        );
+        for (uint256 i = 0; i < _sids.length; i++) {
+            _registraSid(_sids[i], _pub_key_moduli[i], _pub_key_exponents[i], _isValid);
+        }
+    }
+
+    function _registraSid(
+        uint128 _sid,
+        bytes memory _pub_key_modulus,
+        bytes memory _pub_key_exponent,
+        bool _isValid
+    ) private {
         require(!isSIDRegistered[_sid], "SID is already registered.");
         sids[_sid] = SIDInfo({
             pub_key_modulus: _pub_key_modulus,
@@ -13,6 +13,17 @@ contract SmartContractAuthority {
         address cidContractAddress;
     }
 
+    struct CredentialStatus {
+        bytes issuerPubKeyModulus;
+        bytes issuerPubKeyExponent;
+        bool issuerIsRevoked;
+        bool studentUniversityIsRevoked;
+        bytes studentPubKeyModulus;
+        bytes studentPubKeyExponent;
+        bool sidIsValid;
+        bool cidIsValid;
+    }
+
     mapping(string => UniversityInfo) public universities;
     mapping(string => bool) public isUniversityRegistered;
 
@@ -141,9 +152,61 @@ contract SmartContractAuthority {
         isValid = ICIDSmartContract(uni.cidContractAddress).getInfoCid(_cid);
         return isValid;
     }
+
+    function verificaCidAncorato(
+        string memory _uid,
+        uint256 _batchId,
+        uint256 _cid,
+        bytes32[] calldata _proof
+    ) external view returns (bool isValid) {
+        require(isUniversityRegistered[_uid], "University with this UID is not registered.");
+        UniversityInfo storage uni = universities[_uid];
+        require(!uni.isRevoked, "University is revoked.");
+
+        isValid = ICIDSmartContract(uni.cidContractAddress).getInfoCidAncorato(_batchId, _cid, _proof);
+        return isValid;
+    }
+
+    /**
+     * @dev Returns everything needed to verify a credential in a single call: the issuer key and
+     * revocation status, the student key and SID validity, and the CID validity. Unregistered or
+     * revoked identifiers are reported as invalid instead of reverting.
+     * @param _issuerUid The UID of the university that issued the credential (and its CID).
+     * @param _studentUid The UID of the university that registered the student's SID.
+     * @param _sid The student identifier.
+     * @param _cid The credential identifier.
+     * @return status The aggregated verification status.
+     */
+    function verificaCredenziale(
+        string memory _issuerUid,
+        string memory _studentUid,
+        uint128 _sid,
+        uint256 _cid
+    ) external view returns (CredentialStatus memory status) {
+        require(isUniversityRegistered[_issuerUid], "Issuer university with this UID is not registered.");
+        require(isUniversityRegistered[_studentUid], "Student university with this UID is not registered.");
+        UniversityInfo storage issuer = universities[_issuerUid];
+        UniversityInfo storage studentUni = universities[_studentUid];
+
+        status.issuerPubKeyModulus = issuer.pub_key_modulus;
+        status.issuerPubKeyExponent = issuer.pub_key_exponent;
+        status.issuerIsRevoked = issuer.isRevoked;
+        status.studentUniversityIsRevoked = studentUni.isRevoked;
+
+        if (!studentUni.isRevoked && ISIDSmartContract(studentUni.sidContractAddress).isSIDRegistered(_sid)) {
+            (status.studentPubKeyModulus, status.studentPubKeyExponent, status.sidIsValid) =
+                ISIDSmartContract(studentUni.sidContractAddress).getInfoSid(_sid);
+        }
+        if (!issuer.isRevoked && ICIDSmartContract(issuer.cidContractAddress).isCIDRegistered(_cid)) {
+            status.cidIsValid = ICIDSmartContract(issuer.cidContractAddress).getInfoCid(_cid);
+        }
+        return status;
+    }
 }
 
 interface ISIDSmartContract {
+    function isSIDRegistered(uint128 sid) external view returns (bool);
+
     function getInfoSid(
         uint128 sid
     ) external view returns (
@@ -154,5 +217,13 @@ interface ISIDSmartContract {
 }
 
 interface ICIDSmartContract {
+    function isCIDRegistered(uint256 cid) external view returns (bool);
+
     function getInfoCid(uint256 cid) external view returns (bool isValid);
+
+    function getInfoCidAncorato(
+        uint256 batchId,
+        uint256 cid,
+        bytes32[] calldata proof
+    ) external view returns (bool isValid);
 }
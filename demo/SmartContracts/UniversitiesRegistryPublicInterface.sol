@@ -2,6 +2,17 @@
 pragma solidity ^0.8.0;
 
 interface ISmartContractAuthorityPublic {
+    struct CredentialStatus {
+        bytes issuerPubKeyModulus;
+        bytes issuerPubKeyExponent;
+        bool issuerIsRevoked;
+        bool studentUniversityIsRevoked;
+        bytes studentPubKeyModulus;
+        bytes studentPubKeyExponent;
+        bool sidIsValid;
+        bool cidIsValid;
+    }
+
     function getUniversityInfo(
         string memory _uid
     ) external view returns (
@@ -25,4 +36,18 @@ interface ISmartContractAuthorityPublic {
         string memory _uid,
         uint256 _cid
     ) external view returns (bool isValid);
+
+    function verificaCidAncorato(
+        string memory _uid,
+        uint256 _batchId,
+        uint256 _cid,
+        bytes32[] calldata _proof
+    ) external view returns (bool isValid);
+
+    function verificaCredenziale(
+        string memory _issuerUid,
+        string memory _studentUid,
+        uint128 _sid,
+        uint256 _cid
+    ) external view returns (CredentialStatus memory status);
 }
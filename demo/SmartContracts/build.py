@@ -1,8 +1,23 @@
-from solcx import compile_source, install_solc
+from solcx import compile_source, get_installed_solc_versions, import_installed_solc, install_solc
+from packaging.version import Version
 import json
 import os
 import sys
 
+SOLC_VERSION = '0.8.0'
+
+def prepare_solc():
+    # Un compilatore già presente (variabile SOLC_BINARY o solc nel PATH) evita il
+    # download da binaries.soliditylang.org, ad esempio su macchine senza accesso alla rete.
+    solc_binary = os.environ.get('SOLC_BINARY')
+    if solc_binary:
+        print(f"Uso il compilatore indicato da SOLC_BINARY: {solc_binary}")
+        return solc_binary
+    import_installed_solc()
+    if Version(SOLC_VERSION) not in get_installed_solc_versions():
+        install_solc(SOLC_VERSION)
+    return None
+
 def compile_contracts_in_directory(input_dir, output_root_dir='./build'):
     if not os.path.exists(input_dir):
         print(f"Errore: La directory di input '{input_dir}' non esiste.")
@@ -20,7 +35,7 @@ def compile_contracts_in_directory(input_dir, output_root_dir='./build'):
 
     print(f"Trovati {len(solidity_files)} file Solidity in '{input_dir}'.")
     
-    install_solc('0.8.0')
+    solc_binary = prepare_solc()
     
     for sol_file_name in solidity_files:
         sol_file_path = os.path.join(input_dir, sol_file_name)
@@ -39,7 +54,8 @@ def compile_contracts_in_directory(input_dir, output_root_dir='./build'):
             compiled_sol = compile_source(
                 solidity_code,
                 output_values=['abi', 'bin'],
-                solc_version="0.8.0"
+                solc_binary=solc_binary,
+                solc_version=SOLC_VERSION
             )
             print("Compilazione completata con successo.")
         except Exception as e:
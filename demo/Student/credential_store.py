@@ -0,0 +1,548 @@
+import itertools
+import json
+import os
+import re
+import sqlite3
+import struct
+import zlib
+from collections.abc import Sequence
+from Credential.credential import Credential
+
+INDEX_FILENAME = "index.jsonl"
+LOG_FILENAME = "credentials.log"
+LOG_INDEX_FILENAME = "credentials.idx"
+SQLITE_FILENAME = "credentials.db"
+
+_CREDENTIAL_FILE = re.compile(r"^credential_(\d+)\.(json|bin)$")
+
+# Record del log: tipo (1 byte), lunghezza (4 byte) e CRC32 del contenuto (4 byte), seguiti dal contenuto.
+_RECORD_HEADER = struct.Struct(">cII")
+_RECORD_JSON = b"J"
+_RECORD_BINARY = b"B"
+_RECORD_TOMBSTONE = b"D"
+_TOMBSTONE = struct.Struct(">Q")
+
+def _index_entry(credential: Credential, binary: bool, **location) -> dict:
+    return {
+        "CID": credential.CID,
+        "UID": credential.UID,
+        "issuanceDate": credential.issuanceDate,
+        "format": "bin" if binary else "json",
+        **location
+    }
+
+def _encode(credential: Credential, binary: bool) -> bytes:
+    return credential.toBinary() if binary else credential.toJSON().encode('utf-8')
+
+def _decode(data: bytes, binary: bool) -> Credential:
+    if binary:
+        return Credential.fromBinary(data)
+    return Credential.fromJSON(data.decode('utf-8'))
+
+def _pack_record(kind: bytes, data: bytes) -> bytes:
+    return _RECORD_HEADER.pack(kind, len(data), zlib.crc32(data)) + data
+
+def _fsync_file(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+class CredentialStore:
+    def __init__(self):
+        self.entries = []
+        self._by_cid = {}
+
+    def _add_entry(self, entry: dict):
+        self._by_cid.setdefault(entry["CID"], []).append(len(self.entries))
+        self.entries.append(entry)
+
+    def _reset_entries(self, entries: list):
+        self.entries = []
+        self._by_cid = {}
+        for entry in entries:
+            self._add_entry(entry)
+
+    def positions_of(self, cid: str) -> list:
+        return list(self._by_cid.get(cid, ()))
+
+    def load(self, entry: dict) -> Credential:
+        raise NotImplementedError
+
+    def save(self, credential: Credential, binary: bool = False) -> dict:
+        raise NotImplementedError
+
+    def save_many(self, credentials: list, binary: bool = False) -> list:
+        return [self.save(credential, binary) for credential in credentials]
+
+    def delete(self, entry: dict):
+        raise NotImplementedError
+
+    def location(self, entry: dict) -> str:
+        raise NotImplementedError
+
+    def compact(self):
+        pass
+
+    def sync(self):
+        pass
+
+    def close(self):
+        self.sync()
+
+
+class DirectoryCredentialStore(CredentialStore):
+    # Un file per credenziale (credential_N.json / credential_N.bin) più un indice
+    # append-only con i metadati di ogni credenziale: all'apertura si legge solo l'indice.
+    def __init__(self, credentials_dir: str):
+        super().__init__()
+        self.credentials_dir = credentials_dir
+        self.index_path = os.path.join(credentials_dir, INDEX_FILENAME)
+        os.makedirs(credentials_dir, exist_ok=True)
+
+        if os.path.isfile(self.index_path):
+            self._reset_entries(self._load_index())
+        else:
+            self.rebuild_index()
+
+        indices = [int(match.group(1)) for match in map(_CREDENTIAL_FILE.match, (e["file"] for e in self.entries)) if match]
+        self._next_index = max(indices, default=-1) + 1
+
+    def _load_index(self) -> list:
+        entries = []
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Riga troncata da un'interruzione durante il salvataggio.
+                    print(f"Warning: Riga non valida ignorata nell'indice: {self.index_path}")
+        return entries
+
+    def _write_index(self, entries: list):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.index_path)
+
+    def legacy_files(self) -> list:
+        return sorted(
+            [f for f in os.listdir(self.credentials_dir) if f.endswith((".json", ".bin")) and re.search(r"\d+", f)],
+            key=lambda x: int(re.search(r"\d+", x).group())
+        )
+
+    def rebuild_index(self):
+        entries = []
+        for filename in self.legacy_files():
+            binary = filename.endswith(".bin")
+            with open(os.path.join(self.credentials_dir, filename), 'rb') as f:
+                data = f.read()
+            try:
+                credential = _decode(data, binary)
+            except ValueError:
+                print(f"Warning: File {'binario' if binary else 'JSON'} non valido ignorato: {filename}")
+                continue
+            entries.append(_index_entry(credential, binary, file=filename, offset=0, length=len(data)))
+
+        self._write_index(entries)
+        self._reset_entries(entries)
+
+    def load(self, entry: dict) -> Credential:
+        with open(os.path.join(self.credentials_dir, entry["file"]), 'rb') as f:
+            f.seek(entry["offset"])
+            data = f.read(entry["length"])
+        return _decode(data, entry["file"].endswith(".bin"))
+
+    def _next_filename(self, binary: bool) -> str:
+        # Un file presente ma assente dall'indice (salvataggio interrotto) non va sovrascritto.
+        while any(os.path.exists(os.path.join(self.credentials_dir, f"credential_{self._next_index}.{ext}")) for ext in ("json", "bin")):
+            self._next_index += 1
+        filename = f"credential_{self._next_index}.{'bin' if binary else 'json'}"
+        self._next_index += 1
+        return filename
+
+    def save(self, credential: Credential, binary: bool = False) -> dict:
+        filename = self._next_filename(binary)
+        data = _encode(credential, binary)
+        with open(os.path.join(self.credentials_dir, filename), 'wb') as f:
+            f.write(data)
+
+        entry = _index_entry(credential, binary, file=filename, offset=0, length=len(data))
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._add_entry(entry)
+        return entry
+
+    def delete(self, entry: dict):
+        entries = [e for e in self.entries if e is not entry]
+        self._write_index(entries)
+        self._reset_entries(entries)
+        os.remove(os.path.join(self.credentials_dir, entry["file"]))
+
+    def location(self, entry: dict) -> str:
+        return os.path.join(self.credentials_dir, entry["file"])
+
+
+class LogCredentialStore(CredentialStore):
+    # Tutte le credenziali in un unico file append-only; l'indice (una riga JSON per
+    # record) permette di aprire il wallet e cercare per CID senza leggere il log.
+    DEFAULT_FSYNC_EVERY = 64
+
+    def __init__(self, credentials_dir: str, fsync_every: int = DEFAULT_FSYNC_EVERY):
+        super().__init__()
+        if fsync_every <= 0:
+            raise ValueError("Il numero di scritture per fsync deve essere positivo.")
+        self.credentials_dir = credentials_dir
+        self.log_path = os.path.join(credentials_dir, LOG_FILENAME)
+        self.index_path = os.path.join(credentials_dir, LOG_INDEX_FILENAME)
+        self.fsync_every = fsync_every
+        os.makedirs(credentials_dir, exist_ok=True)
+
+        self._unsynced = 0
+        self._recover()
+        self._log = open(self.log_path, 'ab')
+        self._index = open(self.index_path, 'a', encoding='utf-8')
+
+    def _recover(self):
+        if not os.path.isfile(self.log_path):
+            open(self.log_path, 'wb').close()
+        log_size = os.path.getsize(self.log_path)
+
+        lines = []
+        if os.path.isfile(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        lines.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+
+        # L'indice è sempre scritto dopo il log: se descrive byte che il log non
+        # contiene (fsync perso) non è affidabile e va ricostruito da capo.
+        indexed_end = max((line["end"] for line in lines), default=0)
+        if indexed_end > log_size:
+            print(f"Warning: Indice non coerente con il log, ricostruzione in corso: {self.index_path}")
+            lines, indexed_end = [], 0
+
+        # Record scritti nel log ma non ancora nell'indice.
+        recovered, good_end = self._scan(indexed_end, log_size)
+        if good_end < log_size:
+            print(f"Warning: Record incompleto rimosso dalla coda del log: {self.log_path}")
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(good_end)
+
+        lines.extend(recovered)
+        self._apply_lines(lines)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            _fsync_file(f)
+        os.replace(tmp_path, self.index_path)
+        self._log_end = good_end
+
+    def _scan(self, start: int, log_size: int) -> tuple:
+        # Restituisce i record integri a partire da start e la fine dell'ultimo. Solo un
+        # record interrotto in coda (troppo corto, o con checksum errato e nessun record
+        # dopo di lui) delimita la parte valida del log.
+        lines = []
+        with open(self.log_path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            while True:
+                header = f.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    return lines, offset
+                kind, length, checksum = _RECORD_HEADER.unpack(header)
+                data = f.read(length)
+                if len(data) < length:
+                    return lines, offset
+                end = offset + _RECORD_HEADER.size + length
+                if zlib.crc32(data) != checksum or kind not in (_RECORD_TOMBSTONE, _RECORD_JSON, _RECORD_BINARY):
+                    if end == log_size:
+                        return lines, offset
+                    # Con l'intestazione danneggiata i record successivi non sono delimitabili:
+                    # troncare cancellerebbe credenziali integre.
+                    raise ValueError(f"Record corrotto all'offset {offset} del log {self.log_path}: ripristinare il file da un backup.")
+                if kind == _RECORD_TOMBSTONE:
+                    lines.append({"deleted": _TOMBSTONE.unpack(data)[0], "end": end})
+                else:
+                    try:
+                        credential = _decode(data, kind == _RECORD_BINARY)
+                    except ValueError:
+                        # Record integro ma non decodificabile: si ignora senza perdere i successivi.
+                        print(f"Warning: Credenziale non valida ignorata all'offset {offset} del log: {self.log_path}")
+                    else:
+                        lines.append(dict(_index_entry(credential, kind == _RECORD_BINARY,
+                                                       offset=offset + _RECORD_HEADER.size, length=length), end=end))
+                offset = end
+
+    def _apply_lines(self, lines: list):
+        deleted = {line["deleted"] for line in lines if "deleted" in line}
+        self._reset_entries([line for line in lines if "deleted" not in line and line["offset"] not in deleted])
+
+    def _append_record(self, kind: bytes, data: bytes) -> tuple:
+        offset = self._log_end + _RECORD_HEADER.size
+        self._log.write(_pack_record(kind, data))
+        self._log_end = offset + len(data)
+        return offset, self._log_end
+
+    def _append_index(self, lines: list):
+        # Il log va svuotato prima di scrivere l'indice che lo descrive.
+        self._log.flush()
+        for line in lines:
+            self._index.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self._index.flush()
+        self._unsynced += len(lines)
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def load(self, entry: dict) -> Credential:
+        with open(self.log_path, 'rb') as f:
+            f.seek(entry["offset"])
+            data = f.read(entry["length"])
+        return _decode(data, entry["format"] == "bin")
+
+    def save(self, credential: Credential, binary: bool = False) -> dict:
+        return self.save_many([credential], binary)[0]
+
+    def save_many(self, credentials: list, binary: bool = False) -> list:
+        lines = []
+        for credential in credentials:
+            data = _encode(credential, binary)
+            offset, end = self._append_record(_RECORD_BINARY if binary else _RECORD_JSON, data)
+            lines.append(dict(_index_entry(credential, binary, offset=offset, length=len(data)), end=end))
+        self._append_index(lines)
+        for line in lines:
+            self._add_entry(line)
+        return lines
+
+    def delete(self, entry: dict):
+        _, end = self._append_record(_RECORD_TOMBSTONE, _TOMBSTONE.pack(entry["offset"]))
+        self._append_index([{"deleted": entry["offset"], "end": end}])
+        self._reset_entries([e for e in self.entries if e is not entry])
+
+    def garbage_ratio(self) -> float:
+        # Frazione del log occupata da credenziali eliminate e dai relativi tombstone.
+        if not self._log_end:
+            return 0.0
+        live = sum(entry["length"] + _RECORD_HEADER.size for entry in self.entries)
+        return (self._log_end - live) / self._log_end
+
+    def compact(self):
+        # Riscrive il log con le sole credenziali valide. Se il processo si interrompe
+        # dopo la rimozione dell'indice, all'apertura successiva viene ricostruito dal log.
+        self.sync()
+        tmp_log_path = self.log_path + ".tmp"
+        tmp_index_path = self.index_path + ".tmp"
+        lines = []
+        with open(self.log_path, 'rb') as source, open(tmp_log_path, 'wb') as target:
+            end = 0
+            for entry in self.entries:
+                source.seek(entry["offset"])
+                data = source.read(entry["length"])
+                kind = _RECORD_BINARY if entry["format"] == "bin" else _RECORD_JSON
+                target.write(_pack_record(kind, data))
+                offset = end + _RECORD_HEADER.size
+                end = offset + len(data)
+                lines.append(dict(entry, offset=offset, end=end))
+            _fsync_file(target)
+        with open(tmp_index_path, 'w', encoding='utf-8') as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            _fsync_file(f)
+
+        self._log.close()
+        self._index.close()
+        os.remove(self.index_path)
+        os.replace(tmp_log_path, self.log_path)
+        os.replace(tmp_index_path, self.index_path)
+        self._log = open(self.log_path, 'ab')
+        self._index = open(self.index_path, 'a', encoding='utf-8')
+        self._log_end = end
+        self._reset_entries(lines)
+
+    def sync(self):
+        if self._log.closed:
+            return
+        _fsync_file(self._log)
+        _fsync_file(self._index)
+        self._unsynced = 0
+
+    def close(self):
+        self.sync()
+        self._log.close()
+        self._index.close()
+
+    def location(self, entry: dict) -> str:
+        return f"{self.log_path}@{entry['offset']}"
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS credentials (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cid TEXT NOT NULL,
+    uid TEXT NOT NULL,
+    issuance_date TEXT NOT NULL,
+    format TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS credentials_cid ON credentials (cid);
+"""
+
+class SQLiteCredentialStore(CredentialStore):
+    def __init__(self, credentials_dir: str):
+        super().__init__()
+        self.credentials_dir = credentials_dir
+        self.db_path = os.path.join(credentials_dir, SQLITE_FILENAME)
+        os.makedirs(credentials_dir, exist_ok=True)
+
+        self._db = sqlite3.connect(self.db_path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # In WAL il fsync avviene ai checkpoint e non a ogni commit.
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SQLITE_SCHEMA)
+        self._reset_entries([
+            {"CID": cid, "UID": uid, "issuanceDate": issuance_date, "format": fmt, "id": row_id}
+            for row_id, cid, uid, issuance_date, fmt in self._db.execute(
+                "SELECT id, cid, uid, issuance_date, format FROM credentials ORDER BY id"
+            )
+        ])
+
+    def load(self, entry: dict) -> Credential:
+        row = self._db.execute("SELECT data FROM credentials WHERE id = ?", (entry["id"],)).fetchone()
+        if row is None:
+            raise KeyError(f"Credenziale non presente nel database: {entry['CID']}")
+        return _decode(bytes(row[0]), entry["format"] == "bin")
+
+    def save(self, credential: Credential, binary: bool = False) -> dict:
+        return self.save_many([credential], binary)[0]
+
+    def save_many(self, credentials: list, binary: bool = False) -> list:
+        entries = []
+        with self._db:
+            for credential in credentials:
+                entry = _index_entry(credential, binary)
+                cursor = self._db.execute(
+                    "INSERT INTO credentials (cid, uid, issuance_date, format, data) VALUES (?, ?, ?, ?, ?)",
+                    (entry["CID"], entry["UID"], entry["issuanceDate"], entry["format"], _encode(credential, binary))
+                )
+                entry["id"] = cursor.lastrowid
+                entries.append(entry)
+        for entry in entries:
+            self._add_entry(entry)
+        return entries
+
+    def delete(self, entry: dict):
+        with self._db:
+            self._db.execute("DELETE FROM credentials WHERE id = ?", (entry["id"],))
+        self._reset_entries([e for e in self.entries if e is not entry])
+
+    def compact(self):
+        self._db.execute("VACUUM")
+
+    def sync(self):
+        self._db.execute("PRAGMA wal_checkpoint(FULL)")
+
+    def close(self):
+        self._db.close()
+
+    def location(self, entry: dict) -> str:
+        return f"{self.db_path}#{entry['id']}"
+
+
+BACKENDS = {
+    "directory": DirectoryCredentialStore,
+    "log": LogCredentialStore,
+    "sqlite": SQLiteCredentialStore,
+}
+
+def detect_backend(credentials_dir: str) -> str:
+    if os.path.isfile(os.path.join(credentials_dir, LOG_FILENAME)):
+        return "log"
+    if os.path.isfile(os.path.join(credentials_dir, SQLITE_FILENAME)):
+        return "sqlite"
+    return "directory"
+
+def open_credential_store(credentials_dir: str, backend: str = None) -> CredentialStore:
+    backend = backend or detect_backend(credentials_dir)
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend delle credenziali non supportato: {backend}. Valori ammessi: {', '.join(BACKENDS)}")
+    return BACKENDS[backend](credentials_dir)
+
+def migrate_credentials(credentials_dir: str, backend: str, remove_legacy: bool = False, chunk_size: int = 1000) -> int:
+    if backend == "directory":
+        raise ValueError("La migrazione importa i file credential_N nel backend 'log' o 'sqlite'.")
+    source = DirectoryCredentialStore(credentials_dir)
+    target = open_credential_store(credentials_dir, backend)
+    try:
+        if len(target.entries):
+            raise ValueError(f"Il backend '{backend}' contiene già delle credenziali: migrazione annullata.")
+        for start in range(0, len(source.entries), chunk_size):
+            chunk = source.entries[start:start + chunk_size]
+            # I file binari restano binari: si importano a gruppi dello stesso formato.
+            for fmt, group in itertools.groupby(chunk, key=lambda e: e["file"].endswith(".bin")):
+                target.save_many([source.load(entry) for entry in group], fmt)
+        target.sync()
+    finally:
+        target.close()
+
+    if remove_legacy:
+        for entry in source.entries:
+            os.remove(source.location(entry))
+        os.remove(source.index_path)
+    return len(source.entries)
+
+
+class LazyCredentialList(Sequence):
+    # Le credenziali vengono decodificate solo al primo accesso; i metadati
+    # dell'indice (CID, UID, data di emissione) sono disponibili da subito.
+    def __init__(self, store: CredentialStore):
+        self._store = store
+        self._decoded = {}
+
+    @property
+    def entries(self) -> list:
+        return self._store.entries
+
+    def __len__(self) -> int:
+        return len(self._store.entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Indice della credenziale fuori intervallo.")
+
+        credential = self._decoded.get(index)
+        if credential is None:
+            credential = self._store.load(self._store.entries[index])
+            self._decoded[index] = credential
+        return credential
+
+    def append(self, credential: Credential, binary: bool = False) -> dict:
+        entry = self._store.save(credential, binary)
+        self._decoded[len(self) - 1] = credential
+        return entry
+
+    def extend(self, credentials: list, binary: bool = False) -> list:
+        return self._store.save_many(list(credentials), binary)
+
+    def delete(self, index: int):
+        self._store.delete(self._store.entries[index])
+        # Le posizioni successive slittano: le credenziali già decodificate vanno rilette.
+        self._decoded.clear()
+
+    def compact(self):
+        self._store.compact()
+        self._decoded.clear()
+
+    def find(self, cid: str):
+        positions = self._store.positions_of(cid)
+        return self[positions[0]] if positions else None
+
+    def __repr__(self) -> str:
+        return f"LazyCredentialList({len(self)} credenziali, {len(self._decoded)} decodificate)"
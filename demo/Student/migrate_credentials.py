@@ -0,0 +1,13 @@
+import argparse
+from Student.credential_store import BACKENDS, migrate_credentials
+
+# Uso (dalla cartella demo): python -m Student.migrate_credentials <cartella credenziali> --backend log|sqlite
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Importa i file credential_N.json/.bin di un wallet in un backend indicizzato.")
+    parser.add_argument("credentials_dir", help="Cartella persistency/credentials dello studente")
+    parser.add_argument("--backend", choices=[b for b in BACKENDS if b != "directory"], default="log")
+    parser.add_argument("--remove-legacy", action="store_true", help="Elimina i file credential_N dopo l'importazione")
+    args = parser.parse_args()
+
+    count = migrate_credentials(args.credentials_dir, args.backend, args.remove_legacy)
+    print(f"Importate {count} credenziali nel backend '{args.backend}' in: {args.credentials_dir}")
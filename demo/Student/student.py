@@ -1,8 +1,8 @@
 import os
-import re
 import json
 import base64
 from Credential.credential import Credential
+from Student.credential_store import LazyCredentialList, open_credential_store
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives import hashes
 from Credential.merkle_tree import MerkleTree
@@ -11,7 +11,7 @@ from utils.crypto_utils import *
 
 
 class Student:
-    def __init__(self, base_dir: str):
+    def __init__(self, base_dir: str, storage_backend: str = None):
         persistency_dir = os.path.join(base_dir, "persistency")
         json_path = os.path.join(persistency_dir, "student_data.json")
         keys_dir = os.path.join(persistency_dir, "keys")
@@ -49,19 +49,8 @@ class Student:
         
         os.makedirs(self.credentials_dir, exist_ok=True)
 
-        self.credentials = []
-        
-        for filename in sorted(
-            [f for f in os.listdir(self.credentials_dir) if f.endswith(".json")],
-            key=lambda x: int(re.search(r"\d+", x).group())
-        ):
-            filepath = os.path.join(self.credentials_dir, filename)
-            with open(filepath, 'r', encoding='utf-8') as f:
-                try:
-                    data = Credential.fromJSON(f.read())
-                    self.credentials.append(data)
-                except json.JSONDecodeError:
-                    print(f"Warning: File JSON non valido ignorato: {filename}")
+        self.credential_store = open_credential_store(self.credentials_dir, storage_backend)
+        self.credentials = LazyCredentialList(self.credential_store)
 
         print(f"Studente '{self.name} {self.surname}' caricato da {base_dir}")
 
@@ -80,29 +69,25 @@ class Student:
         )
         return base64.b64encode(sign).decode('utf-8')
 
-    def save_credential(self, credential):
+    def save_credential(self, credential, binary: bool = False):
         if not hasattr(self, "credentials_dir"):
             raise RuntimeError("Cartella delle credenziali non inizializzata")
 
-        self.credentials.append(credential)
+        entry = self.credentials.append(credential, binary)
+        print(f"Credenziale salvata in: {self.credential_store.location(entry)}")
 
-        existing_files = [f for f in os.listdir(self.credentials_dir) if f.startswith("credential_") and f.endswith(".json")]
-        indices = []
-        for f in existing_files:
-            try:
-                num = int(f.split("_")[1].split(".")[0])
-                indices.append(num)
-            except (IndexError, ValueError):
-                continue
-        next_index = max(indices, default=-1) + 1
+    def save_credentials(self, credentials: list, binary: bool = False):
+        if not hasattr(self, "credentials_dir"):
+            raise RuntimeError("Cartella delle credenziali non inizializzata")
 
-        filename = f"credential_{next_index}.json"
-        filepath = os.path.join(self.credentials_dir, filename)
+        entries = self.credentials.extend(credentials, binary)
+        print(f"{len(entries)} credenziali salvate in: {self.credentials_dir}")
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(credential.toJSON())
+    def delete_credential(self, index: int):
+        self.credentials.delete(index)
 
-        print(f"Credenziale salvata in: {filepath}")
+    def close(self):
+        self.credential_store.close()
 
     def update_student_data(self):
         data = {
@@ -124,8 +109,8 @@ class Student:
             return
 
         print("\nSeleziona una credenziale da condividere:")
-        for idx, cred in enumerate(self.credentials):
-            print(f"{idx}: CID = {cred.CID}")
+        for idx, entry in enumerate(self.credentials.entries):
+            print(f"{idx}: CID = {entry['CID']}")
 
         try:
             selected_index = int(input(f"Seleziona una credenziale da condividere: ").strip())
@@ -134,24 +119,38 @@ class Student:
             print("Indice non valido.")
             return
 
-        MerkleTree.populate_proofs(selected_credential.properties)
         properties_to_share = []
+        shared_indices = []
         print("\nSeleziona le proprietà da condividere (y/n):")
-        for prop in selected_credential.properties:
+        for idx, prop in enumerate(selected_credential.properties):
             answer = input(f"Vuoi condividere '{prop.toDict()}'? (y/n): ").strip().lower()
             if answer == 'y':
                 properties_to_share.append(prop)
+                shared_indices.append(idx)
 
         if not properties_to_share:
             print("Nessuna proprietà selezionata per la condivisione.")
             return
-        
+
+        multiproof = None
+        if not selected_credential.properties[0].merkle_proof:
+            leaf_indices = shared_indices
+            if selected_credential.merkle_multiproof:
+                covered_indices = selected_credential.merkle_multiproof["leafIndices"]
+                leaf_indices = [covered_indices[i] for i in shared_indices]
+            multiproof = MerkleTree.generate_multiproof(
+                selected_credential.properties,
+                leaf_indices,
+                selected_credential.merkle_multiproof
+            )
+
         credential_to_share = Credential(
             certificateId=selected_credential.CID,
             studentId=selected_credential.SID,
             universityId=selected_credential.UID,
             issuanceDate=selected_credential.issuanceDate,
-            properties=properties_to_share
+            properties=properties_to_share,
+            merkleMultiproof=multiproof
         )
         credential_to_share.add_sign(selected_credential.issuerSignature)
 
@@ -0,0 +1,89 @@
+import asyncio
+from web3.contract import AsyncContract
+from services.async_blockchain_manager import AsyncBaseBlockchainManager
+from services.transport import Web3Transport
+from University.services.university_blockchain_manager import UniversityBlockchainManager
+
+class AsyncUniversityBlockchainManager(AsyncBaseBlockchainManager):
+    def __init__(self, rpc_url: str, max_in_flight: int = AsyncBaseBlockchainManager.DEFAULT_MAX_IN_FLIGHT,
+                 receipt_timeout: float = AsyncBaseBlockchainManager.DEFAULT_RECEIPT_TIMEOUT, transport: Web3Transport = None,
+                 gas_profile_path: str = None):
+        super().__init__(rpc_url, max_in_flight, receipt_timeout, transport, gas_profile_path)
+
+    async def register_sid_on_chain(self, sid_contract_instance: AsyncContract, university_address: str, university_private_key: str,
+                                    sid_counter: int, modulus_bytes: bytes, exponent_bytes: bytes, timeout: float = None) -> asyncio.Task:
+        return await self._build_and_submit(
+            sid_contract_instance.functions.registraSid(sid_counter, modulus_bytes, exponent_bytes, True),
+            university_address, university_private_key, "Registrazione SID", timeout
+        )
+
+    async def register_cid_on_chain(self, cid_contract_instance: AsyncContract, university_address: str, university_private_key: str,
+                                    cid_counter: int, timeout: float = None) -> asyncio.Task:
+        return await self._build_and_submit(
+            cid_contract_instance.functions.registraCid(cid_counter, True),
+            university_address, university_private_key, "Registrazione CID", timeout
+        )
+
+    async def modifica_cid(self, cid_contract_instance: AsyncContract, university_address: str, university_private_key: str,
+                           cid: int, new_is_valid: bool, timeout: float = None) -> asyncio.Task:
+        return await self._build_and_submit(
+            cid_contract_instance.functions.modificaCid(cid, new_is_valid),
+            university_address, university_private_key, "Modifica CID", timeout
+        )
+
+    async def modifica_sid(self, sid_contract_instance: AsyncContract, university_address: str, university_private_key: str,
+                           sid: int, new_modulus_bytes: bytes, new_exponent_bytes: bytes, new_is_valid: bool,
+                           timeout: float = None) -> asyncio.Task:
+        return await self._build_and_submit(
+            sid_contract_instance.functions.modificaSid(sid, new_modulus_bytes, new_exponent_bytes, new_is_valid),
+            university_address, university_private_key, "Modifica SID", timeout
+        )
+
+    async def verify_cid_on_chain(self, sca_contract_instance: AsyncContract, university_id: str, certificate_id: int) -> bool:
+        return await self.call_contract_function(sca_contract_instance, "verificaCid", university_id, certificate_id)
+
+    async def get_university_info_on_chain(self, sca_contract_instance: AsyncContract, university_id: str):
+        return await self.call_contract_function(sca_contract_instance, "getUniversityInfo", university_id)
+
+    async def verify_sid_on_chain(self, sca_contract_instance: AsyncContract, university_id: str, student_id: int):
+        return await self.call_contract_function(sca_contract_instance, "verificaSid", university_id, student_id)
+
+    async def get_credential_status_on_chain(self, sca_contract_instance: AsyncContract, issuer_id: str, student_university_id: str,
+                                             student_id: int, certificate_id: int) -> dict:
+        if not hasattr(sca_contract_instance.functions, "verificaCredenziale"):
+            return await self._compose_credential_status(sca_contract_instance, issuer_id, student_university_id, student_id, certificate_id)
+        status = await self.call_contract_function(
+            sca_contract_instance, "verificaCredenziale", issuer_id, student_university_id, student_id, certificate_id
+        )
+        return dict(zip(UniversityBlockchainManager.CREDENTIAL_STATUS_FIELDS, status))
+
+    async def _compose_credential_status(self, sca_contract_instance: AsyncContract, issuer_id: str, student_university_id: str,
+                                         student_id: int, certificate_id: int) -> dict:
+        # Come UniversityBlockchainManager._compose_credential_status, con le letture in parallelo.
+        if student_university_id == issuer_id:
+            issuer_modulus, issuer_exponent, issuer_is_revoked, _, _ = await self.get_university_info_on_chain(sca_contract_instance, issuer_id)
+            student_university_is_revoked = issuer_is_revoked
+        else:
+            (issuer_modulus, issuer_exponent, issuer_is_revoked, _, _), (_, _, student_university_is_revoked, _, _) = await asyncio.gather(
+                self.get_university_info_on_chain(sca_contract_instance, issuer_id),
+                self.get_university_info_on_chain(sca_contract_instance, student_university_id)
+            )
+        status = dict(zip(UniversityBlockchainManager.CREDENTIAL_STATUS_FIELDS, (
+            issuer_modulus, issuer_exponent, issuer_is_revoked, student_university_is_revoked, b"", b"", False, False
+        )))
+
+        async def no_call():
+            return None
+        sid_result, cid_result = await asyncio.gather(
+            no_call() if student_university_is_revoked else self.verify_sid_on_chain(sca_contract_instance, student_university_id, student_id),
+            no_call() if issuer_is_revoked else self.verify_cid_on_chain(sca_contract_instance, issuer_id, certificate_id),
+            return_exceptions=True
+        )
+        for result in (sid_result, cid_result):
+            if isinstance(result, Exception) and "revert" not in str(result):
+                raise result
+        if sid_result is not None and not isinstance(sid_result, Exception):
+            status.update(studentPubKeyModulus=sid_result[0], studentPubKeyExponent=sid_result[1], sidIsValid=sid_result[2])
+        if cid_result is not None and not isinstance(cid_result, Exception):
+            status["cidIsValid"] = cid_result
+        return status
@@ -1,85 +1,190 @@
 from web3.contract import Contract
 from services.blockchain_manager import BaseBlockchainManager
+from services.transport import Web3Transport
 
 class UniversityBlockchainManager(BaseBlockchainManager):
-    def __init__(self, rpc_url: str):
-        super().__init__(rpc_url)
+    SID_BATCH_CHUNK_SIZE = 40
+    CID_BATCH_CHUNK_SIZE = 200
+    SID_BATCH_GAS_PER_ITEM = 260000
+    CID_BATCH_GAS_PER_ITEM = 60000
+    BATCH_BASE_GAS = 100000
+    CREDENTIAL_STATUS_FIELDS = (
+        "issuerPubKeyModulus", "issuerPubKeyExponent", "issuerIsRevoked", "studentUniversityIsRevoked",
+        "studentPubKeyModulus", "studentPubKeyExponent", "sidIsValid", "cidIsValid"
+    )
 
-    def register_sid_on_chain(self, sid_contract_instance: Contract, university_address: str, university_private_key: str, 
-                              sid_counter: int, modulus_bytes: bytes, exponent_bytes: bytes) -> dict:
-        nonce = self.get_transaction_count(university_address)
-        gas_price = self.get_gas_price()
+    def __init__(self, rpc_url: str, transport: Web3Transport = None, gas_profile_path: str = None):
+        super().__init__(rpc_url, transport, gas_profile_path)
+
+    def _wait_for_batch(self, tx_hashes: list, description: str, wait: bool) -> list:
+        if not wait:
+            return tx_hashes
+        return [self.wait_for_transaction(tx_hash, description) for tx_hash in tx_hashes]
 
-        tx_sid_data = sid_contract_instance.functions.registraSid(
+    def register_sid_on_chain(self, sid_contract_instance: Contract, university_address: str, university_private_key: str, 
+                              sid_counter: int, modulus_bytes: bytes, exponent_bytes: bytes, wait: bool = True):
+        tx_sid_data = self._build_transaction(sid_contract_instance.functions.registraSid(
             sid_counter,
             modulus_bytes,
             exponent_bytes,
             True
-        ).build_transaction({
-            'from': university_address,
-            'nonce': nonce,
-            'gasPrice': gas_price,
-            'gas': 800000
-        })
+        ), university_address)
         
-        return self._send_and_wait_for_transaction(tx_sid_data, university_private_key, "Registrazione SID")
+        return self._submit_transaction(tx_sid_data, university_private_key, "Registrazione SID", wait)
 
     def register_cid_on_chain(self, cid_contract_instance: Contract, university_address: str, university_private_key: str,
-                              cid_counter: int) -> dict:
-        nonce = self.get_transaction_count(university_address)
-        gas_price = self.get_gas_price()
-
-        tx_cid_data = cid_contract_instance.functions.registraCid(
+                              cid_counter: int, wait: bool = True):
+        tx_cid_data = self._build_transaction(cid_contract_instance.functions.registraCid(
             cid_counter,
             True
-        ).build_transaction({
-            'from': university_address,
-            'nonce': nonce,
-            'gasPrice': gas_price,
-            'gas': 800000
-        })
+        ), university_address)
 
-        return self._send_and_wait_for_transaction(tx_cid_data, university_private_key, "Registrazione CID")
+        return self._submit_transaction(tx_cid_data, university_private_key, "Registrazione CID", wait)
 
-    def modifica_cid(self, cid_contract_instance: Contract, university_address: str, university_private_key: str,
-                 cid: int, new_is_valid: bool) -> dict:
-        nonce = self.get_transaction_count(university_address)
-        gas_price = self.get_gas_price()
+    def register_sids_on_chain(self, sid_contract_instance: Contract, university_address: str, university_private_key: str,
+                               sids: list[tuple[int, bytes, bytes]], chunk_size: int = SID_BATCH_CHUNK_SIZE,
+                               wait: bool = True) -> list:
+        if not hasattr(sid_contract_instance.functions, "registraSids"):
+            # ABI compilata prima di registraSids: una transazione per SID, inviate senza
+            # attendere le singole ricevute. Rigenerare gli artefatti con SmartContracts/build.py.
+            tx_hashes = [
+                self.register_sid_on_chain(sid_contract_instance, university_address, university_private_key,
+                                           sid, modulus, exponent, wait=False)
+                for sid, modulus, exponent in sids
+            ]
+            return self._wait_for_batch(tx_hashes, "Registrazione SID", wait)
+
+        tx_hashes = []
+        for chunk in self._chunks(list(sids), chunk_size):
+            tx_sids_data = self._build_transaction(sid_contract_instance.functions.registraSids(
+                [sid for sid, _, _ in chunk],
+                [modulus for _, modulus, _ in chunk],
+                [exponent for _, _, exponent in chunk],
+                True
+            ), university_address, default_gas=self.BATCH_BASE_GAS + self.SID_BATCH_GAS_PER_ITEM * len(chunk))
+            tx_hashes.append(self.send_transaction(tx_sids_data, university_private_key, f"Registrazione di {len(chunk)} SID"))
+
+        return self._wait_for_batch(tx_hashes, "Registrazione SID in blocco", wait)
+
+    def register_cids_on_chain(self, cid_contract_instance: Contract, university_address: str, university_private_key: str,
+                               cid_counters: list[int], chunk_size: int = CID_BATCH_CHUNK_SIZE,
+                               wait: bool = True) -> list:
+        if not hasattr(cid_contract_instance.functions, "registraCids"):
+            # Come in register_sids_on_chain, per le ABI compilate prima di registraCids.
+            tx_hashes = [
+                self.register_cid_on_chain(cid_contract_instance, university_address, university_private_key, cid, wait=False)
+                for cid in cid_counters
+            ]
+            return self._wait_for_batch(tx_hashes, "Registrazione CID", wait)
+
+        tx_hashes = []
+        for chunk in self._chunks(list(cid_counters), chunk_size):
+            tx_cids_data = self._build_transaction(cid_contract_instance.functions.registraCids(
+                chunk,
+                True
+            ), university_address, default_gas=self.BATCH_BASE_GAS + self.CID_BATCH_GAS_PER_ITEM * len(chunk))
+            tx_hashes.append(self.send_transaction(tx_cids_data, university_private_key, f"Registrazione di {len(chunk)} CID"))
+
+        return self._wait_for_batch(tx_hashes, "Registrazione CID in blocco", wait)
+
+    def anchor_cid_batch_on_chain(self, cid_contract_instance: Contract, university_address: str, university_private_key: str,
+                                  batch_id: int, root: str, size: int, wait: bool = True):
+        self.require_function(cid_contract_instance, "ancoraBatchCid")
+        tx_batch_data = self._build_transaction(cid_contract_instance.functions.ancoraBatchCid(
+            batch_id,
+            root,
+            size
+        ), university_address, default_gas=200000)
+
+        return self._submit_transaction(tx_batch_data, university_private_key, f"Ancoraggio batch di {size} CID", wait)
 
-        tx_modifica_cid_data = cid_contract_instance.functions.modificaCid(
+    def modifica_cid_ancorato(self, cid_contract_instance: Contract, university_address: str, university_private_key: str,
+                              cid: int, new_is_valid: bool, wait: bool = True):
+        self.require_function(cid_contract_instance, "modificaCidAncorato")
+        tx_modifica_cid_data = self._build_transaction(cid_contract_instance.functions.modificaCidAncorato(
             cid,
             new_is_valid
-        ).build_transaction({
-            'from': university_address,
-            'nonce': nonce,
-            'gasPrice': gas_price,
-            'gas': 800000
-        })
+        ), university_address, default_gas=200000)
 
-        return self._send_and_wait_for_transaction(tx_modifica_cid_data, university_private_key, "Modifica CID")
+        return self._submit_transaction(tx_modifica_cid_data, university_private_key, "Modifica CID ancorato", wait)
 
-    def modifica_sid(self, sid_contract_instance: Contract, university_address: str, university_private_key: str,
-                    sid: int, new_modulus_bytes: bytes, new_exponent_bytes: bytes, new_is_valid: bool) -> dict:
-        nonce = self.get_transaction_count(university_address)
-        gas_price = self.get_gas_price()
+    def modifica_cid(self, cid_contract_instance: Contract, university_address: str, university_private_key: str,
+                 cid: int, new_is_valid: bool, wait: bool = True):
+        tx_modifica_cid_data = self._build_transaction(cid_contract_instance.functions.modificaCid(
+            cid,
+            new_is_valid
+        ), university_address)
+
+        return self._submit_transaction(tx_modifica_cid_data, university_private_key, "Modifica CID", wait)
 
-        tx_modifica_sid_data = sid_contract_instance.functions.modificaSid(
+    def modifica_sid(self, sid_contract_instance: Contract, university_address: str, university_private_key: str,
+                    sid: int, new_modulus_bytes: bytes, new_exponent_bytes: bytes, new_is_valid: bool, wait: bool = True):
+        tx_modifica_sid_data = self._build_transaction(sid_contract_instance.functions.modificaSid(
             sid,
             new_modulus_bytes,
             new_exponent_bytes,
             new_is_valid
-        ).build_transaction({
-            'from': university_address,
-            'nonce': nonce,
-            'gasPrice': gas_price,
-            'gas': 800000
-        })
+        ), university_address)
 
-        return self._send_and_wait_for_transaction(tx_modifica_sid_data, university_private_key, "Modifica SID")
+        return self._submit_transaction(tx_modifica_sid_data, university_private_key, "Modifica SID", wait)
 
     def verify_cid_on_chain(self, sca_contract_instance: Contract, university_id: str, certificate_id: int) -> bool:
         return self.call_contract_function(sca_contract_instance, "verificaCid", university_id, certificate_id)
 
+    def verify_anchored_cid_on_chain(self, sca_contract_instance: Contract, university_id: str, batch_id: int,
+                                     certificate_id: int, proof: list[str]) -> bool:
+        return self.call_contract_function(sca_contract_instance, "verificaCidAncorato", university_id, batch_id, certificate_id, proof)
+
+    def verify_cids_on_chain(self, sca_contract_instance: Contract, university_id: str, certificate_ids: list[int],
+                             multicall_contract_instance: Contract = None, block_identifier=None,
+                             batch_size: int = BaseBlockchainManager.DEFAULT_CALL_BATCH_SIZE,
+                             from_address: str = None) -> list[tuple[bool, object]]:
+        calls = [(sca_contract_instance, "verificaCid", (university_id, cid)) for cid in certificate_ids]
+        if multicall_contract_instance is not None:
+            return self.multicall_contract_functions(multicall_contract_instance, calls, block_identifier, batch_size, from_address)
+        return self.batch_call_contract_functions(calls, block_identifier, batch_size, from_address)
+
+    def get_credential_status_on_chain(self, sca_contract_instance: Contract, issuer_id: str, student_university_id: str,
+                                       student_id: int, certificate_id: int) -> dict:
+        if not hasattr(sca_contract_instance.functions, "verificaCredenziale"):
+            return self._compose_credential_status(sca_contract_instance, issuer_id, student_university_id, student_id, certificate_id)
+        status = self.call_contract_function(
+            sca_contract_instance, "verificaCredenziale", issuer_id, student_university_id, student_id, certificate_id
+        )
+        return dict(zip(self.CREDENTIAL_STATUS_FIELDS, status))
+
+    def _compose_credential_status(self, sca_contract_instance: Contract, issuer_id: str, student_university_id: str,
+                                   student_id: int, certificate_id: int) -> dict:
+        # ABI senza la lettura aggregata: stesso risultato di verificaCredenziale
+        # ricostruito con getUniversityInfo, verificaSid e verificaCid. Sono letture
+        # singole della cache, quindi i dati delle università sono quasi sempre già noti.
+        issuer_modulus, issuer_exponent, issuer_is_revoked, _, _ = self.get_university_info_on_chain(sca_contract_instance, issuer_id)
+        if student_university_id == issuer_id:
+            student_university_is_revoked = issuer_is_revoked
+        else:
+            _, _, student_university_is_revoked, _, _ = self.get_university_info_on_chain(sca_contract_instance, student_university_id)
+        status = dict(zip(self.CREDENTIAL_STATUS_FIELDS, (
+            issuer_modulus, issuer_exponent, issuer_is_revoked, student_university_is_revoked, b"", b"", False, False
+        )))
+
+        # Un SID o CID non registrato fa fallire la lettura singola:
+        # per verificaCredenziale è semplicemente non valido.
+        if not student_university_is_revoked:
+            sid_info = self._read_if_registered(sca_contract_instance, "verificaSid", student_university_id, student_id)
+            if sid_info is not None:
+                status.update(studentPubKeyModulus=sid_info[0], studentPubKeyExponent=sid_info[1], sidIsValid=sid_info[2])
+        if not issuer_is_revoked:
+            status["cidIsValid"] = bool(self._read_if_registered(sca_contract_instance, "verificaCid", issuer_id, certificate_id))
+        return status
+
+    def _read_if_registered(self, sca_contract_instance: Contract, function_name: str, *args):
+        try:
+            return self.call_contract_function(sca_contract_instance, function_name, *args)
+        except Exception as e:
+            if "revert" not in str(e):
+                raise
+            return None
+
     def get_university_info_on_chain(self, sca_contract_instance: Contract, university_id: str):
         return self.call_contract_function(sca_contract_instance, "getUniversityInfo", university_id)
 
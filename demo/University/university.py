@@ -1,4 +1,5 @@
 import os
+from functools import cached_property
 from cryptography.hazmat.primitives.asymmetric import padding, utils
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes, serialization
@@ -6,71 +7,200 @@ import base64
 
 from Credential.credential import Credential
 from Credential.fields import SubjectInfo
+from Credential.merkle_tree import MerkleProofError
 from Student.student import Student
 
 from SimulationUtils.simulationUtils import generate_random_properties
 
 from University.utils.contract_utils import  load_contract_interface
+from University.utils.batch_verification import verify_issuer_signatures
+from University.utils.cid_batch_utils import build_cid_batch_tree
 from utils.file_utils import load_json,save_json, load_pem_key, save_pem_key_pair
-from utils.crypto_utils import sign_hashed_data, gen_key_pair, recover_public_key_from_modulus_exponent, generate_random_nonce
+from utils.crypto_utils import sign_hashed_data, sign_hashed_data_batch, gen_key_pair, recover_public_key_from_modulus_exponent, invalidate_public_key, generate_random_nonce
 from utils.identifiers_utils import *
 from utils.file_utils import *
 from University.services.university_blockchain_manager import UniversityBlockchainManager
+from services.event_indexer import ChainEventIndexer
+from services.state_store import StateStore, StoredField
+from services.counter_allocator import CounterAllocator
+from services.abi_cache import load_contract_abi
 
 
 class University:
     DEFAULT_RPC_URL = 'http://127.0.0.1:7545'
-
-    def __init__(self, university_root_path: str, smart_contract_build_path: str):
+    STATE_STORE_FIELD = "state_store"
+
+    UID = StoredField()
+    SID_counter = StoredField()
+    CID_counter = StoredField()
+    CID_batch_counter = StoredField(default=0)
+    SID_contract_address = StoredField()
+    CID_contract_address = StoredField()
+    SCA_contract_address = StoredField()
+    Multicall_contract_address = StoredField()
+
+    def __init__(self, university_root_path: str, smart_contract_build_path: str, counter_block_size: int = CounterAllocator.DEFAULT_BLOCK_SIZE,
+                 verifier_only: bool = False):
         if not os.path.isdir(smart_contract_build_path):
             raise FileNotFoundError(f"Cartella {smart_contract_build_path} non trovata")
 
         self.smart_contract_build_path = smart_contract_build_path
+        self.verifier_only = verifier_only
+        self.counter_block_size = counter_block_size
 
         persistency_path = os.path.join(university_root_path, "persistency")
         if not os.path.isdir(persistency_path):
             raise FileNotFoundError(f"Cartella 'persistency' non trovata in: {university_root_path}")
 
         json_path = os.path.join(persistency_path, "university_data.json")
-        if not os.path.isfile(json_path):
+        state_path = os.path.join(persistency_path, "university_state.sqlite")
+        if not os.path.isfile(json_path) and not os.path.isfile(state_path):
             raise FileNotFoundError(f"File JSON non trovato: {json_path}")
 
-        data = load_json(json_path)
+        # Lo stato è mantenuto in SQLite: university_data.json viene importato alla prima
+        # apertura e in seguito riscritto come istantanea da update_university_data, chiamato
+        # da ogni metodo update_* e alla chiusura.
+        # Dopo l'import il JSON riporta il file di stato e non può più sostituirlo: i suoi
+        # contatori possono essere più vecchi degli identificativi già usati sulla blockchain.
+        state_existed = os.path.isfile(state_path)
+        self._state = StateStore(state_path)
+        if self._state.is_empty():
+            data = load_json(json_path)
+            if data.get(self.STATE_STORE_FIELD):
+                self._state.close()
+                if not state_existed:
+                    os.remove(state_path)
+                raise RuntimeError(
+                    f"Stato dell'università non trovato in {state_path}: {json_path} è solo un'istantanea "
+                    f"e potrebbe riportare contatori già usati. Ripristinare il file di stato."
+                )
+            self._state.import_snapshot(data, map_keys=("erasmus_students",))
+            self._state.set(self.STATE_STORE_FIELD, os.path.basename(state_path))
+            self._state.export_json(json_path)
+        data = self._state.snapshot()
         required = ["nome", "ethereum_account_address", "chiave_account", "SID_counter", "CID_counter"]
         if any(field not in data for field in required):
             raise ValueError(f"Campi mancanti nel JSON: {required}")
 
-        keys_dir = os.path.join(persistency_path, "keys")
-        self.chiave_pubblica = load_pem_key(os.path.join(keys_dir, "public.pem"))
-        self.chiave_privata = load_pem_key(os.path.join(keys_dir, "private.pem"), private=True)
-
+        self._keys_dir = os.path.join(persistency_path, "keys")
         self._json_path = json_path
-        self.UID = data.get("UID")
+        self._persistency_path = persistency_path
         self.nome = data["nome"]
         self.ethereum_account_address = data["ethereum_account_address"]
         self.chiave_account = data["chiave_account"]
-        self.SID_counter = data["SID_counter"]
-        self.CID_counter = data["CID_counter"]
-        self.erasmus_students = data.get('erasmus_students')
-        self.SID_contract_address = data.get("SID_contract_address")
-        self.CID_contract_address = data.get("CID_contract_address")
-        self.SCA_contract_address = data.get("SCA_contract_address")
-
-        self.blockchain_manager = UniversityBlockchainManager(self.DEFAULT_RPC_URL)
-
-        sid_abi_path = os.path.join(smart_contract_build_path, 'SIDSmartContract/SIDSmartContract.json')
-        sid_abi = load_json(sid_abi_path)
-        self.sid_contract_instance = self.blockchain_manager.get_contract_instance(self.SID_contract_address, sid_abi)
-
-        cid_abi_path = os.path.join(smart_contract_build_path, 'CIDSmartContract/CIDSmartContract.json')
-        cid_abi = load_json(cid_abi_path)
-        self.cid_contract_instance = self.blockchain_manager.get_contract_instance(self.CID_contract_address, cid_abi)
-        
-        self.sca_contract_instance = None
-        if self.SCA_contract_address:
-            sca_abi_path = os.path.join(self.smart_contract_build_path, 'ISmartContractAuthorityPublic/ISmartContractAuthorityPublic.json')
-            sca_abi = load_json(sca_abi_path)
-            self.sca_contract_instance = self.blockchain_manager.get_contract_instance(self.SCA_contract_address, sca_abi)
+        self.erasmus_students = self._state.get_map("erasmus_students")
+
+        # Contratti, chiavi e allocatori vengono caricati al primo utilizzo: chi verifica
+        # soltanto non paga il costo di ciò che serve per emettere credenziali.
+        self.blockchain_manager = UniversityBlockchainManager(
+            self.DEFAULT_RPC_URL,
+            gas_profile_path=None if verifier_only else os.path.join(persistency_path, "gas_profile.json")
+        )
+
+        self.event_indexer = None
+
+    def _require_issuer(self, resource: str):
+        if self.verifier_only:
+            raise RuntimeError(f"Università {self.nome} aperta in modalità di sola verifica: {resource} non è disponibile.")
+
+    def _contract(self, contract_name: str, address: str):
+        abi = load_contract_abi(self.smart_contract_build_path, contract_name)
+        return self.blockchain_manager.get_contract_instance(address, abi)
+
+    @cached_property
+    def chiave_pubblica(self):
+        return load_pem_key(os.path.join(self._keys_dir, "public.pem"))
+
+    @cached_property
+    def chiave_privata(self):
+        self._require_issuer("la chiave privata")
+        return load_pem_key(os.path.join(self._keys_dir, "private.pem"), private=True)
+
+    @cached_property
+    def sid_contract_instance(self):
+        self._require_issuer("il contratto dei SID")
+        return self._contract("SIDSmartContract", self.SID_contract_address)
+
+    @cached_property
+    def cid_contract_instance(self):
+        self._require_issuer("il contratto dei CID")
+        return self._contract("CIDSmartContract", self.CID_contract_address)
+
+    @cached_property
+    def sca_contract_instance(self):
+        if not self.SCA_contract_address:
+            return None
+        return self._contract("ISmartContractAuthorityPublic", self.SCA_contract_address)
+
+    @cached_property
+    def multicall_contract_instance(self):
+        if not self.Multicall_contract_address:
+            return None
+        return self._contract("Multicall", self.Multicall_contract_address)
+
+    # Più worker della stessa università emettono in parallelo: ciascuno usa
+    # blocchi di identificativi riservati, senza scrivere lo stato a ogni credenziale.
+    @cached_property
+    def sid_allocator(self) -> CounterAllocator:
+        self._require_issuer("l'emissione di SID")
+        return CounterAllocator(self._state, "SID_counter", self.counter_block_size)
+
+    @cached_property
+    def cid_allocator(self) -> CounterAllocator:
+        self._require_issuer("l'emissione di CID")
+        return CounterAllocator(self._state, "CID_counter", self.counter_block_size)
+
+    @cached_property
+    def cid_batch_allocator(self) -> CounterAllocator:
+        self._require_issuer("l'ancoraggio di batch")
+        # I batch sono pochi: un identificativo per concessione non lascia buchi.
+        return CounterAllocator(self._state, "CID_batch_counter", block_size=1)
+
+    def enable_event_indexer(self, max_lag_blocks: int = ChainEventIndexer.DEFAULT_MAX_LAG_BLOCKS, start_block: int = 0,
+                             confirmations: int = 0) -> ChainEventIndexer:
+        if not self.SCA_contract_address:
+            raise Exception("Indirizzo della SmartContractAuthority non impostato. Impossibile indicizzare gli eventi.")
+
+        self.event_indexer = ChainEventIndexer(
+            self.blockchain_manager.get_web3_instance(),
+            os.path.join(self._persistency_path, "event_index.sqlite"),
+            self.SCA_contract_address,
+            load_contract_abi(self.smart_contract_build_path, "SmartContractAuthority"),
+            load_contract_abi(self.smart_contract_build_path, "SIDSmartContract"),
+            load_contract_abi(self.smart_contract_build_path, "CIDSmartContract"),
+            start_block=start_block,
+            confirmations=confirmations,
+            max_lag_blocks=max_lag_blocks
+        )
+        self.event_indexer.sync()
+        return self.event_indexer
+
+    def _fresh_event_indexer(self):
+        # L'indice locale risponde solo se l'ultima sincronizzazione è riuscita, è recente
+        # e non è più indietro di max_lag_blocks; altrimenti si torna alla lettura diretta.
+        if self.event_indexer is None:
+            return None
+        try:
+            self.event_indexer.maybe_sync()
+        except Exception as e:
+            print(f"Sincronizzazione dell'indice degli eventi non riuscita: {e}")
+        return self.event_indexer if self.event_indexer.is_fresh() else None
+
+    def _get_credential_status(self, issuer_uid: str, student_university_uid: str, sid: int, cid: int) -> dict:
+        event_indexer = self._fresh_event_indexer()
+        if event_indexer is not None:
+            status = event_indexer.get_credential_status(issuer_uid, student_university_uid, sid, cid)
+            if status is not None:
+                return status
+        return self.blockchain_manager.get_credential_status_on_chain(self.sca_contract_instance, issuer_uid, student_university_uid, sid, cid)
+
+    def _get_university_info(self, uid: str):
+        event_indexer = self._fresh_event_indexer()
+        if event_indexer is not None:
+            info = event_indexer.get_university_info(uid)
+            if info is not None:
+                return info
+        return self.blockchain_manager.get_university_info_on_chain(self.sca_contract_instance, uid)
 
     def update_uid(self, uid):
         self.UID = uid
@@ -83,30 +213,36 @@ class University:
     def update_sca_contract_address(self, address):
         self.SCA_contract_address = address
         self.update_university_data()
-        
-        sca_abi_path = os.path.join(self.smart_contract_build_path, 'ISmartContractAuthorityPublic/ISmartContractAuthorityPublic.json')
-        sca_abi = load_json(sca_abi_path)
-        self.sca_contract_instance = self.blockchain_manager.get_contract_instance(self.SCA_contract_address, sca_abi)
+        self.__dict__.pop("sca_contract_instance", None)
+
+    def update_multicall_contract_address(self, address):
+        self.Multicall_contract_address = address
+        self.update_university_data()
+        self.__dict__.pop("multicall_contract_instance", None)
+
+    def deploy_multicall_contract(self) -> str:
+        # Senza Multicall le letture bulk usano richieste JSON-RPC batch.
+        abi, bytecode = load_contract_interface(self.smart_contract_build_path, "Multicall")
+        address = self.blockchain_manager.deploy_new_contract(self.ethereum_account_address, self.chiave_account, abi, bytecode)
+        self.update_multicall_contract_address(address)
+        print(f"Multicall deployed at: {address}")
+        return address
 
     def update_university_data(self):
-        data = {
-            "UID": self.UID,
-            "nome": self.nome,
-            "ethereum_account_address": self.ethereum_account_address,
-            "chiave_account": self.chiave_account,
-            "SID_counter": self.SID_counter,
-            "CID_counter": self.CID_counter,
-            "erasmus_students": self.erasmus_students,
-            "SID_contract_address": self.SID_contract_address,
-            "CID_contract_address": self.CID_contract_address,
-            "SCA_contract_address": self.SCA_contract_address 
-        }
-        save_json(data, self._json_path)
+        self._state.export_json(self._json_path)
+
+    def close(self):
+        for name in ("sid_allocator", "cid_allocator", "cid_batch_allocator"):
+            if name in self.__dict__:
+                self.__dict__[name].release()
+        if self.event_indexer is not None:
+            self.event_indexer.close()
+        self.update_university_data()
+        self._state.close()
 
     def register_student(self, student: Student):
-        self.SID_counter += 1
-        self.CID_counter += 1
-        self.update_university_data()
+        sid_counter = self.sid_allocator.next_id()
+        cid_counter = self.cid_allocator.next_id()
 
         rsa_key = student.pub_key.public_numbers()
         modulus_int = rsa_key.n
@@ -116,13 +252,14 @@ class University:
         exponent_bytes = exponent_int.to_bytes((exponent_int.bit_length() + 7) // 8, byteorder='big')
         
         try:
-            self.blockchain_manager.register_sid_on_chain(
+            sid_tx_hash = self.blockchain_manager.register_sid_on_chain(
                 sid_contract_instance=self.sid_contract_instance,
                 university_address=self.ethereum_account_address,
                 university_private_key=self.chiave_account,
-                sid_counter=self.SID_counter,
+                sid_counter=sid_counter,
                 modulus_bytes=modulus_bytes,
-                exponent_bytes=exponent_bytes
+                exponent_bytes=exponent_bytes,
+                wait=False
             )
         except Exception as e:
             raise Exception(f"Errore nella registrazione della chiave pubblica dello studente: {e}")
@@ -140,8 +277,8 @@ class University:
         )
 
         my_uid = split_UID(self.UID)
-        new_credential_cid = assemble_CID(my_uid, self.CID_counter)
-        new_student_sid = assemble_SID(my_uid, self.SID_counter)
+        new_credential_cid = assemble_CID(my_uid, cid_counter)
+        new_student_sid = assemble_SID(my_uid, sid_counter)
         credential = Credential(
             certificateId = new_credential_cid,
             studentId = new_student_sid,
@@ -154,17 +291,34 @@ class University:
         credential.add_sign(signature)
         
         try:
-            self.blockchain_manager.register_cid_on_chain(
+            cid_tx_hash = self.blockchain_manager.register_cid_on_chain(
                 cid_contract_instance=self.cid_contract_instance,
                 university_address=self.ethereum_account_address,
                 university_private_key=self.chiave_account,
-                cid_counter=self.CID_counter
+                cid_counter=cid_counter,
+                wait=False
             )
         except Exception as e:
             raise Exception(f"Errore nella registrazione della credenziale di immatricolazione: {e}")
 
+        try:
+            self.blockchain_manager.wait_for_transaction(sid_tx_hash, "Registrazione SID")
+        except Exception as e:
+            raise Exception(f"Errore nella registrazione della chiave pubblica dello studente: {e}")
+        try:
+            self.blockchain_manager.wait_for_transaction(cid_tx_hash, "Registrazione CID")
+        except Exception as e:
+            raise Exception(f"Errore nella registrazione della credenziale di immatricolazione: {e}")
+
         return credential,new_student_sid
 
+    def sign_credentials(self, credentials: list[Credential], max_workers: int = None) -> list[Credential]:
+        hashes = [credential.hash() for credential in credentials]
+        signatures = sign_hashed_data_batch(self.chiave_privata, hashes, max_workers)
+        for credential, signature in zip(credentials, signatures):
+            credential.add_sign(signature)
+        return credentials
+
     def register_erasmus_student(self, student: Student, json_credential: str):
         if not self.sca_contract_instance:
             raise Exception("Il contratto SmartContractAuthority (SCA) non è stato inizializzato. Impossibile verificare la credenziale Erasmus.")
@@ -179,31 +333,26 @@ class University:
             raise Exception("Lo studente risulta già immatricolato presso questo ateneo e pertanto non può iniziare qui una carriera Erasmus.")
     
         origin_uid, origin_cid = split_CID(student_credential.CID)
-        
+        sid_uid, sid = split_SID(student_credential.SID)
+
         try:
-            credential_is_valid = self.blockchain_manager.verify_cid_on_chain(
-                self.sca_contract_instance,
+            status = self._get_credential_status(
                 origin_uid,
+                sid_uid,
+                sid,
                 origin_cid
             )
-            if not credential_is_valid:
-                raise Exception("La credenziale associata a questo CID è stata revocata.")
-            print("Il CID associato alla credenziale fornita risulta valido.")
         except Exception as e:
-            raise Exception(f"Errore durante la verifica del CID sulla blockchain: {e}")
+            raise Exception(f"Errore durante la verifica della credenziale sulla blockchain: {e}")
 
-        try:
-            origin_uni_pub_key_modulus, origin_uni_pub_key_exponent, is_revoked, _, _ = self.blockchain_manager.get_university_info_on_chain(
-                self.sca_contract_instance,
-                origin_uid
-            )
-            if is_revoked:
-                raise Exception("L'UID dell'università che ha rilasciato questa credenziale è stato revocato!")
-        except Exception as e:
-            raise Exception(f"Errore durante il recupero delle informazioni dell'università di origine: {e}")
+        if status["issuerIsRevoked"]:
+            raise Exception("Errore durante il recupero delle informazioni dell'università di origine: L'UID dell'università che ha rilasciato questa credenziale è stato revocato!")
+        if not status["cidIsValid"]:
+            raise Exception("Errore durante la verifica del CID sulla blockchain: La credenziale associata a questo CID è stata revocata.")
+        print("Il CID associato alla credenziale fornita risulta valido.")
 
         try:
-            origin_uni_public_key = recover_public_key_from_modulus_exponent(origin_uni_pub_key_modulus,origin_uni_pub_key_exponent)
+            origin_uni_public_key = recover_public_key_from_modulus_exponent(status["issuerPubKeyModulus"], status["issuerPubKeyExponent"])
             
             issuer_signature_bytes = base64.b64decode(student_credential.issuerSignature)
             hash_to_verify = bytes.fromhex(student_credential.hash())
@@ -218,25 +367,17 @@ class University:
                 utils.Prehashed(hashes.SHA256()) 
             )
             print("Firma dell'issuer verificata correttamente.")
+        except MerkleProofError as e:
+            raise Exception(f"La property {e.property_index} ({e.typology}) non appartiene alla credenziale firmata: {e}")
         except Exception as e:
             raise Exception(f"Errore durante la verifica della firma dell'issuer: {e}")
 
-        _, sid = split_SID(student_credential.SID)
-        
-        try:
-            pub_key_modulus, pub_key_exponent, is_sid_valid = self.blockchain_manager.verify_sid_on_chain(
-                self.sca_contract_instance,
-                origin_uid,
-                sid
-            )
-            if not is_sid_valid:
-                raise Exception("La credenziale presenta un SID non valido.")
-            print("Il SID contenuto nella credenziale è valido.")
-        except Exception as e:
-            raise Exception(f"Errore durante la verifica del SID sulla blockchain: {e}")
+        if status["studentUniversityIsRevoked"] or not status["sidIsValid"]:
+            raise Exception("Errore durante la verifica del SID sulla blockchain: La credenziale presenta un SID non valido.")
+        print("Il SID contenuto nella credenziale è valido.")
 
         try:
-            student_public_key = recover_public_key_from_modulus_exponent(pub_key_modulus,pub_key_exponent)
+            student_public_key = recover_public_key_from_modulus_exponent(status["studentPubKeyModulus"], status["studentPubKeyExponent"])
 
             nonce = generate_random_nonce() 
             signature_b64 = student.challenge(nonce) 
@@ -259,27 +400,21 @@ class University:
         print(f"Complimenti {student.name} {student.surname} \nImmatricolazione Erasmus completata!\n{self.nome} ti dà il benvenuto!")
 
     def request_career_credential(self, student: Student):
-        self.CID_counter+=1
-        self.update_university_data()
+        cid_counter = self.cid_allocator.next_id()
         erasmus_student_cid = self.erasmus_students[student.SID]
         _, sid = split_SID(student.SID)
         origin_uid, origin_cid = split_CID(erasmus_student_cid)
-        if self.blockchain_manager.verify_cid_on_chain(self.sca_contract_instance, origin_uid, origin_cid):
+        status = self._get_credential_status(origin_uid, origin_uid, sid, origin_cid)
+        if status["issuerIsRevoked"]:
+            raise Exception("L'università di origine dello studente è stata revocata.")
+        if status["cidIsValid"]:
             print("Credenziale di immatricolazione dello studente valida.")
-            try:
-                erasmus_student_pubkey_modulus, erasmus_student_pubkey_exponent, sid_is_valid = self.blockchain_manager.verify_sid_on_chain(
-                    self.sca_contract_instance,
-                    origin_uid,
-                    sid
-                )
-                if not sid_is_valid:
-                    raise Exception("Lo studene ha fornito un SID non valido.")
-                print("Il SID fornito è valido.")
-            except Exception as e:
-                raise Exception(f"Errore durante la verifica del SID sulla blockchain: {e}")
+            if not status["sidIsValid"]:
+                raise Exception("Errore durante la verifica del SID sulla blockchain: Lo studene ha fornito un SID non valido.")
+            print("Il SID fornito è valido.")
             
             try:
-                student_public_key = recover_public_key_from_modulus_exponent(erasmus_student_pubkey_modulus, erasmus_student_pubkey_exponent)
+                student_public_key = recover_public_key_from_modulus_exponent(status["studentPubKeyModulus"], status["studentPubKeyExponent"])
 
                 nonce = generate_random_nonce() 
                 signature_b64 = student.challenge(nonce) 
@@ -302,7 +437,7 @@ class University:
             my_uid = split_UID(self.UID)
             properties = generate_random_properties(8)
             credential = Credential(
-                certificateId=assemble_CID(my_uid, self.CID_counter),
+                certificateId=assemble_CID(my_uid, cid_counter),
                 studentId=student.SID,
                 universityId=self.UID,
                 issuanceDate=data_odierna(),
@@ -317,7 +452,7 @@ class University:
                     cid_contract_instance=self.cid_contract_instance,
                     university_address=self.ethereum_account_address,
                     university_private_key=self.chiave_account,
-                    cid_counter=self.CID_counter
+                    cid_counter=cid_counter
                 )
             except Exception as e:
                 raise Exception(f"Errore nella registrazione della credenziale carriera: {e}")
@@ -333,26 +468,24 @@ class University:
         shared_credential = Credential.fromJSON(json_credential)
         
         issuer_uid = split_UID(shared_credential.UID)
-        
-        try:
-            erasmus_uni_pubkey_modulus, erasmus_uni_pubkey_exponent, sid_isRevoked, _, _ = self.blockchain_manager.get_university_info_on_chain(self.sca_contract_instance, issuer_uid)
-            if sid_isRevoked:
-                raise Exception("L'università che ha rilasciato la credenziale condivisa non è più fidata.")
-            print("L'università che ha rilasciato la credenziale condivisa è fidata.")
-        except Exception as e:
-            raise Exception(f"Errore nella verifica del'UID dell'università issuer: {e}")
-        
         origin_uid, sid = split_SID(shared_credential.SID)
+        _, cid = split_CID(shared_credential.CID)
+
         try:
-            student_pubkey_modulus, student_pubkey_exponent, sid_isValid = self.blockchain_manager.verify_sid_on_chain(self.sca_contract_instance, origin_uid, sid)
-            if not sid_isValid:
-                raise Exception("Il SID presente nella credenziale non è valido.")
-            print("Il SID presente nella credenziale è valido.")
+            status = self._get_credential_status(issuer_uid, origin_uid, sid, cid)
         except Exception as e:
-            raise Exception(f"Errore nella verifica del SID contenuto nella credenziale: {e}")
-        
+            raise Exception(f"Errore durante la verifica della credenziale sulla blockchain: {e}")
+
+        if status["issuerIsRevoked"]:
+            raise Exception("Errore nella verifica del'UID dell'università issuer: L'università che ha rilasciato la credenziale condivisa non è più fidata.")
+        print("L'università che ha rilasciato la credenziale condivisa è fidata.")
+
+        if status["studentUniversityIsRevoked"] or not status["sidIsValid"]:
+            raise Exception("Errore nella verifica del SID contenuto nella credenziale: Il SID presente nella credenziale non è valido.")
+        print("Il SID presente nella credenziale è valido.")
+
         try:
-            student_public_key = recover_public_key_from_modulus_exponent(student_pubkey_modulus, student_pubkey_exponent)
+            student_public_key = recover_public_key_from_modulus_exponent(status["studentPubKeyModulus"], status["studentPubKeyExponent"])
 
             nonce = generate_random_nonce() 
             signature_b64 = student.challenge(nonce) 
@@ -372,7 +505,7 @@ class University:
         except Exception as e:
             raise Exception(f"Errore durante la verifica della firma dello studente: {e}")    
         
-        erasmus_uni_public_key = recover_public_key_from_modulus_exponent(erasmus_uni_pubkey_modulus, erasmus_uni_pubkey_exponent)
+        erasmus_uni_public_key = recover_public_key_from_modulus_exponent(status["issuerPubKeyModulus"], status["issuerPubKeyExponent"])
 
         issuer_signature = shared_credential.issuerSignature 
             
@@ -389,11 +522,90 @@ class University:
                 utils.Prehashed(hashes.SHA256()) 
             )      
             print("Le property sono state verificate correttamente!")
+        except MerkleProofError as e:
+            raise Exception(f"La property {e.property_index} ({e.typology}) non appartiene alla credenziale firmata: {e}")
         except Exception as e:
             raise Exception(f"Errore durante la verifica della firma dell'issuer: {e}")
         
         print("La credenziale condivisa è valida")     
     
+    def validate_shared_credentials_batch(self, json_credentials, max_workers: int = None) -> list[dict]:
+        if not self.sca_contract_instance:
+            raise Exception("Il contratto SmartContractAuthority (SCA) non è stato inizializzato. Impossibile verificare le credenziali condivise.")
+
+        reports = []
+        credentials_by_issuer = {}
+        for json_credential in json_credentials:
+            report = {"CID": None, "valid": False, "errors": []}
+            reports.append(report)
+            try:
+                credential = Credential.fromJSON(json_credential)
+                report["CID"] = credential.CID
+                issuer_uid = split_UID(credential.UID)
+                origin_uid, sid = split_SID(credential.SID)
+                cid_uid, cid = split_CID(credential.CID)
+            except ValueError as e:
+                report["errors"].append(f"Credenziale non valida: {e}")
+                continue
+            credentials_by_issuer.setdefault(issuer_uid, []).append((report, json_credential, origin_uid, sid, cid_uid, cid))
+
+        # Chiave e stato di revoca dell'issuer sono letti una sola volta per gruppo:
+        # se l'issuer è revocato, le sue credenziali non richiedono altre letture.
+        # Per ogni credenziale restano solo SID e CID, letti tramite la cache.
+        signature_tasks = []
+        signature_reports = []
+        for issuer_uid, items in credentials_by_issuer.items():
+            try:
+                issuer_modulus, issuer_exponent, issuer_is_revoked, _, _ = self._get_university_info(issuer_uid)
+                if issuer_is_revoked:
+                    raise Exception("L'università che ha rilasciato la credenziale condivisa non è più fidata.")
+            except Exception as e:
+                for report, _, _, _, _, _ in items:
+                    report["errors"].append(f"Errore nella verifica del'UID dell'università issuer: {e}")
+                continue
+
+            for report, json_credential, origin_uid, sid, cid_uid, cid in items:
+                try:
+                    _, _, sid_is_valid = self.blockchain_manager.verify_sid_on_chain(self.sca_contract_instance, origin_uid, sid)
+                    if not sid_is_valid:
+                        report["errors"].append("Il SID presente nella credenziale non è valido.")
+                except Exception as e:
+                    report["errors"].append(f"Errore nella verifica del SID contenuto nella credenziale: {e}")
+
+                try:
+                    if not self.blockchain_manager.verify_cid_on_chain(self.sca_contract_instance, cid_uid, cid):
+                        report["errors"].append("La credenziale associata a questo CID è stata revocata.")
+                except Exception as e:
+                    report["errors"].append(f"Errore durante la verifica del CID sulla blockchain: {e}")
+
+                signature_tasks.append((json_credential, issuer_modulus, issuer_exponent))
+                signature_reports.append(report)
+
+        for report, error in zip(signature_reports, verify_issuer_signatures(signature_tasks, max_workers)):
+            if error:
+                report["errors"].append(error)
+
+        for report in reports:
+            report["valid"] = not report["errors"]
+        return reports
+
+    def audit_issued_credentials(self, cids: list[int] = None, use_multicall: bool = True) -> list[dict]:
+        if not self.sca_contract_instance:
+            raise Exception("Il contratto SmartContractAuthority (SCA) non è stato inizializzato. Impossibile verificare le credenziali emesse.")
+
+        my_uid = split_UID(self.UID)
+        if cids is None:
+            cids = self.cid_allocator.issued_ids()
+        multicall = self.multicall_contract_instance if use_multicall else None
+        results = self.blockchain_manager.verify_cids_on_chain(
+            self.sca_contract_instance, my_uid, cids, multicall, from_address=self.ethereum_account_address
+        )
+
+        return [
+            {"CID": assemble_CID(my_uid, cid), "valid": value if success else None, "error": None if success else value}
+            for cid, (success, value) in zip(cids, results)
+        ]
+
     def revoke_cid(self, full_cid: str):
         _, cid = split_CID(full_cid)
         try:
@@ -403,6 +615,50 @@ class University:
             raise
         print(f"Credenziale {cid} revocata con successo!")
         
+    def anchor_credentials_batch(self, credentials: list[Credential]) -> list[dict]:
+        my_uid = split_UID(self.UID)
+        cids = []
+        for credential in credentials:
+            uid, cid = split_CID(credential.CID)
+            if uid != my_uid:
+                raise ValueError(f"La credenziale {credential.CID} non è stata emessa da questa università.")
+            cids.append(cid)
+        root, proofs = build_cid_batch_tree(cids)
+
+        # Il controllo precede l'allocazione: un'ABI non aggiornata non consuma identificativi di batch.
+        self.blockchain_manager.require_function(self.cid_contract_instance, "ancoraBatchCid")
+        batch_id = self.cid_batch_allocator.next_id()
+        try:
+            self.blockchain_manager.anchor_cid_batch_on_chain(
+                cid_contract_instance=self.cid_contract_instance,
+                university_address=self.ethereum_account_address,
+                university_private_key=self.chiave_account,
+                batch_id=batch_id,
+                root=root,
+                size=len(cids)
+            )
+        except Exception as e:
+            raise Exception(f"Errore durante l'ancoraggio del batch di credenziali: {e}")
+
+        print(f"Batch {batch_id} di {len(cids)} credenziali ancorato con successo!")
+        return [
+            {"CID": credential.CID, "batchId": batch_id, "root": root, "proof": proof}
+            for credential, proof in zip(credentials, proofs)
+        ]
+
+    def verify_anchored_cid(self, full_cid: str, batch_id: int, proof: list[str]) -> bool:
+        uid, cid = split_CID(full_cid)
+        return self.blockchain_manager.verify_anchored_cid_on_chain(self.sca_contract_instance, uid, batch_id, cid, proof)
+
+    def revoke_anchored_cid(self, full_cid: str):
+        _, cid = split_CID(full_cid)
+        try:
+            self.blockchain_manager.modifica_cid_ancorato(self.cid_contract_instance, self.ethereum_account_address, self.chiave_account, cid, False)
+        except Exception as e:
+            print(f"Errore durante la revoca del CID ancorato '{cid}' sulla blockchain: {e}")
+            raise
+        print(f"Credenziale {cid} revocata con successo!")
+
     def revoke_sid(self, studente: Student):
         _, sid = split_SID(studente.SID)
         exponent = studente.pub_key.public_numbers().e
@@ -416,6 +672,7 @@ class University:
         except Exception as e:
             print(f"Errore durante la revoca del SID '{studente.SID}' sulla blockchain: {e}")
             raise
+        invalidate_public_key(modulus.to_bytes(mod_length, 'big'), exp_bytes)
         print(f"Identificativo dello studente {studente.SID} revocato con successo!")
     
     @staticmethod
@@ -454,6 +711,7 @@ class University:
             "chiave_account": chiave_account,
             "SID_counter": 0,
             "CID_counter": 0,
+            "CID_batch_counter": 0,
             "erasmus_students": {},
             "SID_contract_address": SID_contract_address,
             "CID_contract_address": CID_contract_address
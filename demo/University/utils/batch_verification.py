@@ -0,0 +1,26 @@
+from concurrent.futures import ProcessPoolExecutor
+from Credential.credential import Credential
+from Credential.merkle_tree import MerkleProofError
+from utils.crypto_utils import recover_public_key_from_modulus_exponent, verify_hashed_data_signature
+
+def _verify_issuer_signature(task: tuple[str, bytes, bytes]) -> str:
+    json_credential, issuer_modulus, issuer_exponent = task
+    try:
+        credential = Credential.fromJSON(json_credential)
+        credential_hash = credential.hash()
+    except MerkleProofError as e:
+        return f"La property {e.property_index} ({e.typology}) non appartiene alla credenziale firmata: {e}"
+    except ValueError as e:
+        return f"Credenziale non valida: {e}"
+
+    issuer_public_key = recover_public_key_from_modulus_exponent(issuer_modulus, issuer_exponent)
+    if not verify_hashed_data_signature(issuer_public_key, credential.issuerSignature, credential_hash):
+        return "Firma dell'issuer non valida."
+    return None
+
+def verify_issuer_signatures(tasks: list[tuple[str, bytes, bytes]], max_workers: int = None, chunksize: int = 16) -> list[str]:
+    if max_workers == 1 or len(tasks) <= 1:
+        return [_verify_issuer_signature(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_verify_issuer_signature, tasks, chunksize=chunksize))
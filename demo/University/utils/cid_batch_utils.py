@@ -0,0 +1,40 @@
+from web3 import Web3
+
+def cid_leaf(cid: int) -> bytes:
+    return bytes(Web3.solidity_keccak(['uint256'], [cid]))
+
+def _hash_pair(a: bytes, b: bytes) -> bytes:
+    # Stesso schema di CIDSmartContract.getInfoCidAncorato: i figli sono ordinati
+    # prima dell'hash, quindi la proof non deve indicare la posizione del fratello.
+    return bytes(Web3.keccak(a + b if a < b else b + a))
+
+def build_cid_batch_tree(cids: list[int]) -> tuple[str, list[list[str]]]:
+    if not cids:
+        raise ValueError("Il batch deve contenere almeno un CID.")
+    if len(set(cids)) != len(cids):
+        raise ValueError("Il batch contiene CID duplicati.")
+
+    level = [cid_leaf(cid) for cid in cids]
+    positions = list(range(len(cids)))
+    proofs = [[] for _ in cids]
+    while len(level) > 1:
+        for i, position in enumerate(positions):
+            sibling = position ^ 1
+            # Un nodo senza fratello viene promosso al livello superiore senza hash.
+            if sibling < len(level):
+                proofs[i].append(Web3.to_hex(level[sibling]))
+            positions[i] = position // 2
+        level = [
+            _hash_pair(level[j], level[j + 1]) if j + 1 < len(level) else level[j]
+            for j in range(0, len(level), 2)
+        ]
+    return Web3.to_hex(level[0]), proofs
+
+def compute_cid_batch_root(cid: int, proof: list[str]) -> str:
+    node = cid_leaf(cid)
+    for sibling in proof:
+        node = _hash_pair(node, bytes(Web3.to_bytes(hexstr=sibling)))
+    return Web3.to_hex(node)
+
+def verify_cid_inclusion(cid: int, proof: list[str], root: str) -> bool:
+    return compute_cid_batch_root(cid, proof) == Web3.to_hex(Web3.to_bytes(hexstr=root))
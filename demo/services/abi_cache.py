@@ -0,0 +1,28 @@
+import json
+import os
+import threading
+
+_abis = {}
+_lock = threading.Lock()
+
+def load_abi(abi_path: str) -> list:
+    # L'ABI restituita è condivisa da tutto il processo e non va modificata.
+    abi_path = os.path.abspath(abi_path)
+    mtime = os.stat(abi_path).st_mtime_ns
+    with _lock:
+        cached = _abis.get(abi_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    with open(abi_path, 'r', encoding='utf-8') as f:
+        abi = json.load(f)
+    with _lock:
+        _abis[abi_path] = (mtime, abi)
+    return abi
+
+def load_contract_abi(build_path: str, contract_name: str) -> list:
+    return load_abi(os.path.join(build_path, contract_name, f"{contract_name}.json"))
+
+def clear_abi_cache():
+    with _lock:
+        _abis.clear()
@@ -0,0 +1,176 @@
+import asyncio
+from web3 import AsyncWeb3
+from web3.contract import AsyncContract
+from services.blockchain_manager import BaseBlockchainManager, BuiltTransaction
+from services.nonce_manager import is_nonce_error
+from services.fee_oracle import DEFAULT_GAS_LIMIT, GasProfile, is_fee_error
+from services.transport import Web3Transport, get_transport
+
+class AsyncBaseBlockchainManager:
+    DEFAULT_MAX_IN_FLIGHT = 64
+    DEFAULT_RECEIPT_TIMEOUT = 120
+
+    def __init__(self, rpc_url: str, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, receipt_timeout: float = DEFAULT_RECEIPT_TIMEOUT,
+                 transport: Web3Transport = None, gas_profile_path: str = None):
+        if max_in_flight <= 0:
+            raise ValueError("Il numero massimo di transazioni in volo deve essere positivo.")
+        self._rpc_url = rpc_url
+        # Provider e nonce sono quelli del trasporto condiviso: uno stesso account può inviare
+        # transazioni sia dai manager sincroni sia da questo senza collisioni.
+        self._transport = transport or get_transport(rpc_url)
+        self._w3 = self._transport.async_w3
+        self._nonce_manager = self._transport.nonce_manager
+        self._fee_oracle = self._transport.fee_oracle
+        self._gas_profile = GasProfile(gas_profile_path)
+        self._nonce_sync_lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self.receipt_timeout = receipt_timeout
+
+    async def connect(self):
+        if not await self._w3.is_connected():
+            raise ConnectionError(f"Impossibile connettersi alla blockchain all'URL: {self._rpc_url}")
+
+    def get_web3_instance(self) -> AsyncWeb3:
+        return self._w3
+
+    def get_contract_instance(self, contract_address: str, contract_abi: dict) -> AsyncContract:
+        if not contract_address:
+            raise ValueError("L'indirizzo del contratto non può essere None.")
+        if not contract_abi:
+            raise ValueError("L'ABI del contratto non può essere vuota.")
+        return self._w3.eth.contract(address=contract_address, abi=contract_abi)
+
+    async def get_gas_price(self) -> int:
+        # L'oracolo è sincrono e raramente interroga il nodo: non blocca il loop.
+        return await asyncio.to_thread(self._fee_oracle.gas_price)
+
+    async def get_fee_fields(self) -> dict:
+        return await asyncio.to_thread(self._fee_oracle.fee_fields)
+
+    async def _gas_limit(self, contract_function, gas_key: str, from_address: str, default_gas: int) -> int:
+        gas = self._gas_profile.learned_limit(gas_key)
+        if gas is not None:
+            return gas
+        try:
+            estimate = await contract_function.estimate_gas({'from': from_address})
+        except Exception as e:
+            print(f"Stima del gas non riuscita per {gas_key}, uso il limite predefinito {default_gas}: {e}")
+            return default_gas
+        self._gas_profile.record(gas_key, estimate)
+        return int(estimate * self._gas_profile.margin)
+
+    async def allocate_nonce(self, account_address: str) -> int:
+        if not self._nonce_manager.is_synced(account_address):
+            async with self._nonce_sync_lock:
+                if not self._nonce_manager.is_synced(account_address):
+                    pending_count = await self._w3.eth.get_transaction_count(account_address, 'pending')
+                    self._nonce_manager.sync(account_address, pending_count)
+        return self._nonce_manager.allocate(account_address)
+
+    def release_nonce(self, account_address: str, nonce: int):
+        self._nonce_manager.release(account_address, nonce)
+
+    async def _send_raw(self, built_tx: dict, private_key: str):
+        signed_tx = self._w3.eth.account.sign_transaction(built_tx, private_key=private_key)
+        tx_hash = await self._w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        gas_key = getattr(built_tx, "gas_key", None)
+        if gas_key is not None:
+            self._gas_profile.track(tx_hash, gas_key, built_tx['gas'])
+        return tx_hash
+
+    async def send_transaction(self, built_tx: dict, private_key: str, description: str = "Transazione"):
+        account_address = built_tx['from']
+        try:
+            return await self._send_raw(built_tx, private_key)
+        except Exception as e:
+            if not is_nonce_error(e):
+                self._nonce_manager.release(account_address, built_tx['nonce'])
+                if is_fee_error(e):
+                    self._fee_oracle.invalidate()
+                print(f"Errore durante l'{description.lower()}: {e}")
+                raise
+            print(f"Nonce non allineato per {account_address}, risincronizzazione in corso: {e}")
+
+        self._nonce_manager.resync(account_address)
+        built_tx = BuiltTransaction(dict(built_tx, nonce=await self.allocate_nonce(account_address)), getattr(built_tx, "gas_key", None))
+        try:
+            return await self._send_raw(built_tx, private_key)
+        except Exception as e:
+            self._nonce_manager.resync(account_address)
+            print(f"Errore durante l'{description.lower()}: {e}")
+            raise
+
+    async def wait_for_transaction(self, tx_hash, description: str = "Transazione", timeout: float = None) -> dict:
+        try:
+            receipt = await self._w3.eth.wait_for_transaction_receipt(
+                tx_hash,
+                timeout=timeout if timeout is not None else self.receipt_timeout
+            )
+            self._gas_profile.observe(tx_hash, receipt)
+
+            if receipt.status == 1:
+                print(f"{description} completata con successo. Transaction Hash: {tx_hash.hex()}")
+            else:
+                raise Exception(f"{description} fallita. Transaction Hash: {tx_hash.hex()} Receipt: {receipt}")
+
+            return receipt
+        except Exception as e:
+            print(f"Errore durante l'{description.lower()}: {e}")
+            raise
+
+    async def submit_transaction(self, built_tx: dict, private_key: str, description: str = "Transazione",
+                                 timeout: float = None) -> asyncio.Task:
+        await self._in_flight.acquire()
+        return await self._submit_in_slot(built_tx, private_key, description, timeout)
+
+    async def _submit_in_slot(self, built_tx: dict, private_key: str, description: str, timeout: float = None) -> asyncio.Task:
+        # Il chiamante ha già acquisito uno slot di _in_flight, che viene rilasciato
+        # all'arrivo della ricevuta o subito se l'invio fallisce.
+        try:
+            tx_hash = await self.send_transaction(built_tx, private_key, description)
+        except BaseException:
+            self._in_flight.release()
+            raise
+
+        async def collect_receipt():
+            try:
+                return await self.wait_for_transaction(tx_hash, description, timeout)
+            finally:
+                self._in_flight.release()
+
+        return asyncio.ensure_future(collect_receipt())
+
+    async def _build_and_submit(self, contract_function, account_address: str, private_key: str,
+                                description: str, timeout: float = None, default_gas: int = DEFAULT_GAS_LIMIT) -> asyncio.Task:
+        gas_key = GasProfile.key_for(contract_function)
+        gas = await self._gas_limit(contract_function, gas_key, account_address, default_gas)
+        fee_fields = await self.get_fee_fields()
+        # Lo slot è acquisito prima del nonce: un nonce già assegnato non resta in attesa
+        # dietro a transazioni con nonce successivi, né va perso se l'attesa viene annullata.
+        await self._in_flight.acquire()
+        try:
+            nonce = await self.allocate_nonce(account_address)
+        except BaseException:
+            self._in_flight.release()
+            raise
+        try:
+            built_tx = BuiltTransaction(await contract_function.build_transaction({
+                'from': account_address,
+                'nonce': nonce,
+                'gas': gas,
+                **fee_fields
+            }), gas_key)
+        except BaseException:
+            self.release_nonce(account_address, nonce)
+            self._in_flight.release()
+            raise
+        return await self._submit_in_slot(built_tx, private_key, description, timeout)
+
+    @staticmethod
+    async def gather_receipts(handles, return_exceptions: bool = False) -> list:
+        return await asyncio.gather(*handles, return_exceptions=return_exceptions)
+
+    async def call_contract_function(self, contract_instance: AsyncContract, function_name: str, *args):
+        BaseBlockchainManager.require_function(contract_instance, function_name)
+
+        return await getattr(contract_instance.functions, function_name)(*args).call()
@@ -1,14 +1,41 @@
 import json
+from eth_utils.abi import get_abi_output_types
 from web3 import Web3
-from web3.middleware import ExtraDataToPOAMiddleware
 from web3.contract import Contract
+from services.nonce_manager import is_nonce_error
+from services.read_cache import ChainReadCache
+from services.fee_oracle import DEFAULT_GAS_LIMIT, GasProfile, is_fee_error
+from services.transport import Web3Transport, get_transport
+
+# Mittente delle letture quando il chiamante non ne indica uno: eth_call non spende
+# gas reale, ma alcuni provider (ad esempio eth-tester) richiedono comunque 'from'.
+ZERO_ADDRESS = "0x" + "00" * 20
+
+class BuiltTransaction(dict):
+    # Transazione pronta per la firma; gas_key indica la voce del profilo del gas
+    # da cui deriva il limite, da smentire se la transazione esaurisce il gas.
+    def __init__(self, fields: dict, gas_key: str = None):
+        super().__init__(fields)
+        self.gas_key = gas_key
 
 class BaseBlockchainManager:
-    def __init__(self, rpc_url: str):
-        self._w3 = Web3(Web3.HTTPProvider(rpc_url))
-        self._w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
-        if not self._w3.is_connected():
-            raise ConnectionError(f"Impossibile connettersi alla blockchain all'URL: {rpc_url}")
+    DEFAULT_CALL_BATCH_SIZE = 500
+
+    DEFAULT_DEPLOY_GAS = 3000000
+
+    def __init__(self, rpc_url: str, transport: Web3Transport = None, gas_profile_path: str = None):
+        # La connessione è condivisa fra i manager dello stesso endpoint e
+        # viene verificata solo alla prima richiesta effettiva.
+        self._transport = transport or get_transport(rpc_url)
+        self._nonce_manager = self._transport.nonce_manager
+        self._read_cache = self._transport.read_cache
+        self._fee_oracle = self._transport.fee_oracle
+        self._gas_profile = GasProfile(gas_profile_path)
+
+    @property
+    def _w3(self) -> Web3:
+        self._transport.ensure_connected()
+        return self._transport.w3
 
     def get_web3_instance(self) -> Web3:
         return self._w3
@@ -18,22 +45,74 @@ class BaseBlockchainManager:
             raise ValueError("L'indirizzo del contratto non può essere None.")
         if not contract_abi:
             raise ValueError("L'ABI del contratto non può essere vuota.")
-        return self._w3.eth.contract(address=contract_address, abi=contract_abi)
+        return self._transport.contract(contract_abi, contract_address)
 
     def get_transaction_count(self, account_address: str) -> int:
         return self._w3.eth.get_transaction_count(account_address)
 
     def get_gas_price(self) -> int:
-        return self._w3.eth.gas_price
+        self._transport.ensure_connected()
+        return self._fee_oracle.gas_price()
 
-    def _send_and_wait_for_transaction(self, built_tx: dict, private_key: str, description: str = "Transazione") -> dict:
+    def allocate_nonce(self, account_address: str) -> int:
+        return self._nonce_manager.allocate(
+            account_address,
+            lambda address: self._w3.eth.get_transaction_count(address, 'pending')
+        )
+
+    def _build_transaction(self, contract_function, from_address: str, default_gas: int = DEFAULT_GAS_LIMIT) -> dict:
+        self._transport.ensure_connected()
+        gas_key = self._gas_profile.key_for(contract_function)
+        gas = self._gas_profile.gas_limit(
+            gas_key,
+            lambda: contract_function.estimate_gas({'from': from_address}),
+            default_gas
+        )
+        return BuiltTransaction(contract_function.build_transaction({
+            'from': from_address,
+            'nonce': self.allocate_nonce(from_address),
+            'gas': gas,
+            **self._fee_oracle.fee_fields()
+        }), gas_key)
+
+    def _track_gas(self, built_tx: dict, tx_hash):
+        gas_key = getattr(built_tx, "gas_key", None)
+        if gas_key is not None:
+            self._gas_profile.track(tx_hash, gas_key, built_tx['gas'])
+        return tx_hash
+
+    def send_transaction(self, built_tx: dict, private_key: str, description: str = "Transazione"):
+        account_address = built_tx['from']
+        try:
+            signed_tx = self._w3.eth.account.sign_transaction(built_tx, private_key=private_key)
+            return self._track_gas(built_tx, self._w3.eth.send_raw_transaction(signed_tx.raw_transaction))
+        except Exception as e:
+            if not is_nonce_error(e):
+                self._nonce_manager.release(account_address, built_tx['nonce'])
+                if is_fee_error(e):
+                    self._fee_oracle.invalidate()
+                print(f"Errore durante l'{description.lower()}: {e}")
+                raise
+            print(f"Nonce non allineato per {account_address}, risincronizzazione in corso: {e}")
+
+        self._nonce_manager.resync(account_address)
+        built_tx = BuiltTransaction(dict(built_tx, nonce=self.allocate_nonce(account_address)), getattr(built_tx, "gas_key", None))
         try:
             signed_tx = self._w3.eth.account.sign_transaction(built_tx, private_key=private_key)
-            tx_hash = self._w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            return self._track_gas(built_tx, self._w3.eth.send_raw_transaction(signed_tx.raw_transaction))
+        except Exception as e:
+            self._nonce_manager.resync(account_address)
+            print(f"Errore durante l'{description.lower()}: {e}")
+            raise
+
+    def wait_for_transaction(self, tx_hash, description: str = "Transazione") -> dict:
+        try:
             receipt = self._w3.eth.wait_for_transaction_receipt(tx_hash)
+            self._gas_profile.observe(tx_hash, receipt)
 
             if receipt.status == 1:
                 print(f"{description} completata con successo. Transaction Hash: {tx_hash.hex()}")
+                self._read_cache.refresh(min_block=receipt.blockNumber)
             else:
                 raise Exception(f"{description} fallita. Transaction Hash: {tx_hash.hex()} Receipt: {receipt}")
             
@@ -42,18 +121,32 @@ class BaseBlockchainManager:
             print(f"Errore durante l'{description.lower()}: {e}")
             raise
 
+    def _send_and_wait_for_transaction(self, built_tx: dict, private_key: str, description: str = "Transazione") -> dict:
+        tx_hash = self.send_transaction(built_tx, private_key, description)
+        return self.wait_for_transaction(tx_hash, description)
+
+    def _submit_transaction(self, built_tx: dict, private_key: str, description: str, wait: bool = True):
+        if not wait:
+            return self.send_transaction(built_tx, private_key, description)
+        return self._send_and_wait_for_transaction(built_tx, private_key, description)
+
     def deploy_new_contract(self, account_address: str, private_key: str, contract_abi: dict, contract_bytecode: str) -> str:
         contract = self._w3.eth.contract(abi=contract_abi, bytecode=contract_bytecode)
         
+        try:
+            gas = int(contract.constructor().estimate_gas({'from': account_address}) * self._gas_profile.margin)
+        except Exception as e:
+            print(f"Stima del gas per il deploy non riuscita, uso il limite predefinito {self.DEFAULT_DEPLOY_GAS}: {e}")
+            gas = self.DEFAULT_DEPLOY_GAS
+
         transaction = contract.constructor().build_transaction({
             'from': account_address,
-            'nonce': self._w3.eth.get_transaction_count(account_address),
-            'gasPrice': self._w3.eth.gas_price,
-            'gas': 3000000
+            'nonce': self.allocate_nonce(account_address),
+            'gas': gas,
+            **self._fee_oracle.fee_fields()
         })
 
-        signed_txn = self._w3.eth.account.sign_transaction(transaction, private_key=private_key)
-        tx_hash = self._w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        tx_hash = self.send_transaction(transaction, private_key, "Deploy del contratto")
         tx_receipt = self._w3.eth.wait_for_transaction_receipt(tx_hash)
 
         if tx_receipt.status != 1:
@@ -61,8 +154,154 @@ class BaseBlockchainManager:
 
         return tx_receipt.contractAddress
 
-    def call_contract_function(self, contract_instance: Contract, function_name: str, *args):
+    @staticmethod
+    def require_function(contract_instance: Contract, function_name: str):
         if not hasattr(contract_instance.functions, function_name):
-            raise AttributeError(f"Funzione '{function_name}' non trovata nel contratto.")
-        
-        return getattr(contract_instance.functions, function_name)(*args).call()
\ No newline at end of file
+            raise AttributeError(
+                f"Funzione '{function_name}' non trovata nel contratto: se è presente nel sorgente Solidity, "
+                f"gli artefatti in SmartContracts/build vanno rigenerati con build.py."
+            )
+
+    def call_contract_function(self, contract_instance: Contract, function_name: str, *args):
+        self.require_function(contract_instance, function_name)
+
+        self._transport.ensure_connected()
+        if self._read_cache.is_cacheable(function_name):
+            return self._read_cache.call(contract_instance, function_name, *args)
+        return getattr(contract_instance.functions, function_name)(*args).call()
+
+    def get_read_cache(self) -> ChainReadCache:
+        return self._read_cache
+
+    @staticmethod
+    def _chunks(items: list, chunk_size: int):
+        if chunk_size <= 0:
+            raise ValueError("La dimensione dei blocchi deve essere positiva.")
+        for start in range(0, len(items), chunk_size):
+            yield items[start:start + chunk_size]
+
+    @staticmethod
+    def _prepare_call(contract_instance: Contract, function_name: str, args) -> tuple:
+        BaseBlockchainManager.require_function(contract_instance, function_name)
+        function = getattr(contract_instance.functions, function_name)(*args)
+        return function, contract_instance.encode_abi(function_name, args=list(args))
+
+    def _prepare_calls(self, calls: list, results: list) -> list:
+        # Le chiamate non codificabili falliscono subito, senza coinvolgere le altre.
+        pending = []
+        for i, (contract_instance, function_name, args) in enumerate(calls):
+            try:
+                function, data = self._prepare_call(contract_instance, function_name, args)
+                pending.append((i, function, contract_instance.address, data))
+            except Exception as e:
+                results[i] = (False, str(e))
+        return pending
+
+    def _decode_call_output(self, function, data: bytes):
+        output_types = get_abi_output_types(function.abi)
+        values = self._w3.codec.decode(output_types, bytes(data))
+        values = [
+            Web3.to_checksum_address(value) if output_type == 'address' else value
+            for output_type, value in zip(output_types, values)
+        ]
+        return values[0] if len(values) == 1 else values
+
+    def _decode_revert_reason(self, data: bytes) -> str:
+        data = bytes(data)
+        # Error(string): selettore 0x08c379a0 seguito dal messaggio codificato in ABI.
+        if data[:4] == bytes.fromhex("08c379a0"):
+            try:
+                return "execution reverted: " + self._w3.codec.decode(['string'], data[4:])[0]
+            except Exception:
+                pass
+        return "execution reverted"
+
+    def _resolve_block_identifier(self, block_identifier):
+        if block_identifier is None:
+            # Tutte le letture di un'operazione bulk vedono lo stesso blocco.
+            block_identifier = self._w3.eth.block_number
+        return block_identifier
+
+    def _call_sender(self, from_address: str = None) -> str:
+        if from_address:
+            return from_address
+        default_account = self._w3.eth.default_account
+        return default_account if isinstance(default_account, str) else ZERO_ADDRESS
+
+    def _send_call_batch(self, payloads: list) -> list:
+        # I provider HTTP (geth, besu, anvil, hardhat) ricevono un'unica richiesta JSON-RPC
+        # batch; con gli altri, come EthereumTesterProvider, ogni elemento passa da w3.eth.call.
+        provider = self._w3.provider
+        if not payloads:
+            return []
+        if not hasattr(provider, "make_batch_request"):
+            responses = []
+            for params in payloads:
+                try:
+                    responses.append({'result': Web3.to_hex(self._w3.eth.call(*params))})
+                except Exception as e:
+                    responses.append({'error': {'message': str(e)}})
+            return responses
+
+        responses = provider.make_batch_request([("eth_call", params) for params in payloads])
+        if not isinstance(responses, list):
+            # Il nodo ha rifiutato l'intero batch: l'errore vale per ogni elemento.
+            return [responses] * len(payloads)
+        return responses
+
+    def batch_call_contract_functions(self, calls: list[tuple[Contract, str, tuple]], block_identifier=None,
+                                      batch_size: int = DEFAULT_CALL_BATCH_SIZE, from_address: str = None) -> list[tuple[bool, object]]:
+        block_identifier = self._resolve_block_identifier(block_identifier)
+        from_address = self._call_sender(from_address)
+        if isinstance(block_identifier, int):
+            block_identifier = hex(block_identifier)
+        results = []
+        for chunk in self._chunks(list(calls), batch_size):
+            chunk_results = [None] * len(chunk)
+            pending = self._prepare_calls(chunk, chunk_results)
+
+            responses = self._send_call_batch([
+                [{'from': from_address, 'to': address, 'data': data}, block_identifier] for _, _, address, data in pending
+            ])
+            for (i, function, _, _), response in zip(pending, responses):
+                if response.get('error'):
+                    error = response['error']
+                    chunk_results[i] = (False, error.get('message', str(error)) if isinstance(error, dict) else str(error))
+                    continue
+                try:
+                    chunk_results[i] = (True, self._decode_call_output(function, Web3.to_bytes(hexstr=response['result'])))
+                except Exception as e:
+                    chunk_results[i] = (False, f"Risposta non decodificabile: {e}")
+            results.extend(chunk_results)
+        return results
+
+    def multicall_contract_functions(self, multicall_contract_instance: Contract, calls: list[tuple[Contract, str, tuple]],
+                                     block_identifier=None, batch_size: int = DEFAULT_CALL_BATCH_SIZE,
+                                     from_address: str = None) -> list[tuple[bool, object]]:
+        block_identifier = self._resolve_block_identifier(block_identifier)
+        from_address = self._call_sender(from_address)
+        results = []
+        for chunk in self._chunks(list(calls), batch_size):
+            chunk_results = [None] * len(chunk)
+            pending = self._prepare_calls(chunk, chunk_results)
+
+            outputs = []
+            if pending:
+                try:
+                    outputs = multicall_contract_instance.functions.tryAggregate(
+                        False, [(address, data) for _, _, address, data in pending]
+                    ).call({'from': from_address}, block_identifier=block_identifier)
+                except Exception as e:
+                    for i, _, _, _ in pending:
+                        chunk_results[i] = (False, f"Errore nella chiamata multicall: {e}")
+
+            for (i, function, _, _), (success, return_data) in zip(pending, outputs):
+                if not success:
+                    chunk_results[i] = (False, self._decode_revert_reason(return_data))
+                else:
+                    try:
+                        chunk_results[i] = (True, self._decode_call_output(function, return_data))
+                    except Exception as e:
+                        chunk_results[i] = (False, f"Risposta non decodificabile: {e}")
+            results.extend(chunk_results)
+        return results
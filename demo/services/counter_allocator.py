@@ -0,0 +1,180 @@
+import atexit
+import os
+import socket
+import sqlite3
+import threading
+import time
+from services.state_store import StateStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counter_leases (
+    counter TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    host TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    leased_at REAL NOT NULL,
+    PRIMARY KEY (counter, start)
+);
+CREATE TABLE IF NOT EXISTS counter_unused_ranges (
+    counter TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    PRIMARY KEY (counter, start)
+);
+"""
+
+# Intervalli non assegnati: "released" torna disponibile, "retired" non verrà mai emesso,
+# "orphaned" apparteneva a un processo terminato e può essere stato emesso solo in parte.
+RELEASED = "released"
+RETIRED = "retired"
+ORPHANED = "orphaned"
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == 'nt':
+        # Su Windows os.kill termina il processo: non è possibile verificarlo così.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class CounterAllocator:
+    # Ogni thread riceve in concessione un blocco contiguo di identificativi e li
+    # assegna senza toccare lo stato condiviso; solo il rinnovo del blocco scrive su disco.
+    # Alla chiusura la parte non usata torna disponibile; se il processo termina senza
+    # chiudere, al più un blocco per thread resta orfano e non viene più emesso.
+    DEFAULT_BLOCK_SIZE = 32
+
+    def __init__(self, store: StateStore, counter: str, block_size: int = DEFAULT_BLOCK_SIZE, reuse_released: bool = True):
+        if block_size <= 0:
+            raise ValueError("La dimensione del blocco di identificativi deve essere positiva.")
+        self._store = store
+        self.counter = counter
+        self.block_size = block_size
+        self.reuse_released = reuse_released
+        self._host = socket.gethostname()
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._leases = []
+        self._lock = threading.Lock()
+
+        store.executescript(_SCHEMA)
+        self.tombstone_stale_leases()
+        atexit.register(self._release_at_exit)
+
+    def next_id(self) -> int:
+        # Il lock protegge le concessioni da release(), che può girare su un altro thread.
+        with self._lock:
+            lease = getattr(self._local, "lease", None)
+            if lease is None or lease[0] > lease[1]:
+                lease = self._lease(lease)
+                self._local.lease = lease
+            value = lease[0]
+            lease[0] += 1
+            return value
+
+    def _lease(self, previous: list) -> list:
+        with self._store.transaction():
+            if previous is not None:
+                self._store.execute("DELETE FROM counter_leases WHERE counter = ? AND start = ?", (self.counter, previous[2]))
+
+            # Prima si riusano gli intervalli restituiti da altri worker, poi si avanza il contatore.
+            row = self._store.execute(
+                "SELECT start, end FROM counter_unused_ranges WHERE counter = ? AND kind = ? ORDER BY start LIMIT 1",
+                (self.counter, RELEASED)
+            ).fetchone()
+            if row is not None:
+                start, end = row[0], min(row[1], row[0] + self.block_size - 1)
+                self._store.execute("DELETE FROM counter_unused_ranges WHERE counter = ? AND start = ?", (self.counter, start))
+                if end < row[1]:
+                    self._store.execute(
+                        "INSERT INTO counter_unused_ranges (counter, start, end, kind) VALUES (?, ?, ?, ?)",
+                        (self.counter, end + 1, row[1], RELEASED)
+                    )
+            else:
+                start, end = self._store.reserve(self.counter, self.block_size)
+
+            self._store.execute(
+                "INSERT INTO counter_leases (counter, start, end, host, pid, leased_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.counter, start, end, self._host, self._pid, time.time())
+            )
+
+        lease = [start, end, start]
+        if previous is not None and previous in self._leases:
+            self._leases.remove(previous)
+        self._leases.append(lease)
+        return lease
+
+    def release(self):
+        # Gli identificativi non usati tornano disponibili (o vengono ritirati se
+        # reuse_released è False) e le concessioni vengono chiuse.
+        with self._lock:
+            leases, self._leases = self._leases, []
+            if not leases:
+                return
+            with self._store.transaction():
+                for lease in leases:
+                    next_id, end, start = lease
+                    if next_id <= end:
+                        self._store.execute(
+                            "INSERT INTO counter_unused_ranges (counter, start, end, kind) VALUES (?, ?, ?, ?)",
+                            (self.counter, next_id, end, RELEASED if self.reuse_released else RETIRED)
+                        )
+                    self._store.execute("DELETE FROM counter_leases WHERE counter = ? AND start = ?", (self.counter, start))
+                    lease[0] = end + 1
+
+    def _release_at_exit(self):
+        try:
+            self.release()
+        except sqlite3.ProgrammingError:
+            # Lo store è già stato chiuso: le concessioni rimaste diventeranno orfane.
+            pass
+
+    def tombstone_stale_leases(self) -> int:
+        # Di una concessione lasciata da un processo terminato senza release non si sa
+        # quali identificativi siano stati usati: l'intero blocco non viene più riassegnato.
+        with self._store.transaction():
+            stale = [
+                (start, end) for start, end, pid in self._store.execute(
+                    "SELECT start, end, pid FROM counter_leases WHERE counter = ? AND host = ?", (self.counter, self._host)
+                ).fetchall()
+                if pid != self._pid and not _pid_alive(pid)
+            ]
+            for start, end in stale:
+                self._store.execute(
+                    "INSERT INTO counter_unused_ranges (counter, start, end, kind) VALUES (?, ?, ?, ?)",
+                    (self.counter, start, end, ORPHANED)
+                )
+                self._store.execute("DELETE FROM counter_leases WHERE counter = ? AND start = ?", (self.counter, start))
+        return len(stale)
+
+    def unused_ranges(self) -> list[tuple[int, int, str]]:
+        return [
+            (start, end, kind) for start, end, kind in self._store.execute(
+                "SELECT start, end, kind FROM counter_unused_ranges WHERE counter = ? ORDER BY start", (self.counter,)
+            ).fetchall()
+        ]
+
+    def issued_ids(self) -> list[int]:
+        # Identificativi concessi ed eventualmente emessi: gli intervalli orfani restano inclusi.
+        # Delle concessioni ancora attive si escludono la parte non usata di quelle di questo
+        # allocatore e, per intero, quelle degli altri worker: i loro identificativi vengono
+        # contati quando la concessione è restituita o diventa orfana.
+        skipped = set()
+        for start, end, kind in self.unused_ranges():
+            if kind != ORPHANED:
+                skipped.update(range(start, end + 1))
+        with self._lock:
+            own_leases = {lease[2]: (lease[0], lease[1]) for lease in self._leases}
+            for start, end, host, pid in self._store.execute(
+                "SELECT start, end, host, pid FROM counter_leases WHERE counter = ?", (self.counter,)
+            ).fetchall():
+                if host == self._host and pid == self._pid and start in own_leases:
+                    start, end = own_leases[start]
+                skipped.update(range(start, end + 1))
+        return [value for value in range(1, self._store.reload(self.counter, 0) + 1) if value not in skipped]
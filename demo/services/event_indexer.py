@@ -0,0 +1,270 @@
+import sqlite3
+import threading
+import time
+from web3 import Web3
+
+UNIVERSITY_EVENTS = ("UniversityRegistered", "UniversityInfoModified", "UniversityRevokeStatusChanged")
+SID_EVENTS = ("SIDRegistered", "SIDModified")
+CID_EVENTS = ("CIDRegistered", "CIDModified")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    block INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS universities (
+    uid_hash BLOB PRIMARY KEY,
+    pub_key_modulus BLOB NOT NULL,
+    pub_key_exponent BLOB NOT NULL,
+    is_revoked INTEGER NOT NULL,
+    sid_contract TEXT NOT NULL,
+    cid_contract TEXT NOT NULL,
+    block INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tracked_contracts (
+    address TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS sids (
+    contract TEXT NOT NULL,
+    sid TEXT NOT NULL,
+    pub_key_modulus BLOB NOT NULL,
+    pub_key_exponent BLOB NOT NULL,
+    is_valid INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    PRIMARY KEY (contract, sid)
+);
+CREATE TABLE IF NOT EXISTS cids (
+    contract TEXT NOT NULL,
+    cid TEXT NOT NULL,
+    is_valid INTEGER NOT NULL,
+    block INTEGER NOT NULL,
+    PRIMARY KEY (contract, cid)
+);
+"""
+
+class ChainEventIndexer:
+    DEFAULT_MAX_LAG_BLOCKS = 5
+    DEFAULT_BLOCK_RANGE = 5000
+    DEFAULT_MAX_STALENESS = 60.0
+
+    def __init__(self, w3: Web3, db_path: str, sca_address: str, sca_abi: list, sid_abi: list, cid_abi: list,
+                 start_block: int = 0, confirmations: int = 0, max_lag_blocks: int = DEFAULT_MAX_LAG_BLOCKS,
+                 poll_interval: float = 5.0, block_range: int = DEFAULT_BLOCK_RANGE, max_staleness: float = DEFAULT_MAX_STALENESS):
+        self._w3 = w3
+        self.sca_address = Web3.to_checksum_address(sca_address)
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.max_lag_blocks = max_lag_blocks
+        self.poll_interval = poll_interval
+        self.block_range = block_range
+        self.max_staleness = max_staleness
+
+        # Gli eventi sono decodificati con l'ABI del contratto che li emette,
+        # scelto in base al primo topic del log.
+        self._events = {}
+        for abi, names in ((sca_abi, UNIVERSITY_EVENTS), (sid_abi, SID_EVENTS), (cid_abi, CID_EVENTS)):
+            contract = w3.eth.contract(abi=abi)
+            for name in names:
+                event = contract.events[name]()
+                self._events[bytes(Web3.to_bytes(hexstr=event.topic))] = event
+        self._sca_topics = [self._topic_of(name) for name in UNIVERSITY_EVENTS]
+        self._registry_topics = [self._topic_of(name) for name in SID_EVENTS + CID_EVENTS]
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._head = None
+        self._last_poll = 0.0
+        self._synced_at = None
+        self._sync_failed = False
+
+    def _topic_of(self, name: str) -> str:
+        for topic, event in self._events.items():
+            if event.event_name == name:
+                return Web3.to_hex(topic)
+        raise ValueError(f"Evento {name} non presente nell'ABI fornita.")
+
+    def _checkpoint(self):
+        row = self._db.execute("SELECT block FROM checkpoint WHERE id = 1").fetchone()
+        return row[0] if row else None
+
+    def checkpoint(self):
+        with self._lock:
+            return self._checkpoint()
+
+    def lag(self):
+        checkpoint = self.checkpoint()
+        if self._head is None or checkpoint is None:
+            return None
+        return max(self._head - checkpoint, 0)
+
+    def is_fresh(self) -> bool:
+        # La testa della catena è quella letta all'ultima sincronizzazione: oltre al ritardo
+        # in blocchi conta da quanto tempo l'indice non si aggiorna con successo.
+        with self._lock:
+            if self._sync_failed or self._synced_at is None:
+                return False
+            if time.monotonic() - self._synced_at > self.max_staleness:
+                return False
+        lag = self.lag()
+        return lag is not None and lag <= self.max_lag_blocks
+
+    def maybe_sync(self):
+        if time.monotonic() - self._last_poll >= self.poll_interval:
+            self.sync()
+
+    def sync(self):
+        with self._lock:
+            self._last_poll = time.monotonic()
+            self._sync_failed = True
+            self._head = self._w3.eth.block_number
+            target = self._head - self.confirmations
+            checkpoint = self._checkpoint()
+            from_block = self.start_block if checkpoint is None else checkpoint + 1
+            while from_block <= target:
+                to_block = min(from_block + self.block_range - 1, target)
+                self._sync_range(from_block, to_block)
+                from_block = to_block + 1
+            self._sync_failed = False
+            self._synced_at = time.monotonic()
+
+    def _get_logs(self, address, topics: list, from_block: int, to_block: int) -> list:
+        return self._w3.eth.get_logs({
+            'address': address,
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'topics': [topics]
+        })
+
+    def _sync_range(self, from_block: int, to_block: int):
+        tracked = [row[0] for row in self._db.execute("SELECT address FROM tracked_contracts")]
+        with self._db:
+            for log in self._get_logs(self.sca_address, self._sca_topics, from_block, to_block):
+                self._apply(log)
+
+            # I contratti di una università appena registrata (o aggiornata) vanno
+            # indicizzati dall'inizio: possono avere eventi precedenti alla registrazione.
+            known = {row[0] for row in self._db.execute("SELECT sid_contract FROM universities UNION SELECT cid_contract FROM universities")}
+            new_contracts = sorted(known.difference(tracked))
+            if new_contracts:
+                for log in self._get_logs(new_contracts, self._registry_topics, self.start_block, to_block):
+                    self._apply(log)
+                self._db.executemany("INSERT OR IGNORE INTO tracked_contracts (address) VALUES (?)", [(a,) for a in new_contracts])
+            if tracked:
+                for log in self._get_logs(tracked, self._registry_topics, from_block, to_block):
+                    self._apply(log)
+
+            self._db.execute(
+                "INSERT INTO checkpoint (id, block) VALUES (1, ?) ON CONFLICT(id) DO UPDATE SET block = excluded.block",
+                (to_block,)
+            )
+
+    def _apply(self, log):
+        event = self._events.get(bytes(log['topics'][0]))
+        if event is None:
+            return
+        args = event.process_log(log)['args']
+        name = event.event_name
+        block = log['blockNumber']
+        contract = Web3.to_checksum_address(log['address'])
+
+        if name in ("UniversityRegistered", "UniversityInfoModified"):
+            # uid è una stringa indicizzata: nel log compare solo il suo keccak.
+            is_revoked = args['newIsRevoked'] if name == "UniversityInfoModified" else False
+            modulus = args['pub_key_modulus'] if name == "UniversityRegistered" else args['new_pub_key_modulus']
+            exponent = args['pub_key_exponent'] if name == "UniversityRegistered" else args['new_pub_key_exponent']
+            sid_contract = args['sidContract'] if name == "UniversityRegistered" else args['newSidContract']
+            cid_contract = args['cidContract'] if name == "UniversityRegistered" else args['newCidContract']
+            self._db.execute(
+                "INSERT OR REPLACE INTO universities VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (bytes(args['uid']), bytes(modulus), bytes(exponent), int(is_revoked),
+                 Web3.to_checksum_address(sid_contract), Web3.to_checksum_address(cid_contract), block)
+            )
+        elif name == "UniversityRevokeStatusChanged":
+            self._db.execute(
+                "UPDATE universities SET is_revoked = ?, block = ? WHERE uid_hash = ?",
+                (int(args['newIsRevoked']), block, bytes(args['uid']))
+            )
+        elif name in SID_EVENTS:
+            prefix = "" if name == "SIDRegistered" else "new_"
+            is_valid = args['isValid'] if name == "SIDRegistered" else args['newIsValid']
+            self._db.execute(
+                "INSERT OR REPLACE INTO sids VALUES (?, ?, ?, ?, ?, ?)",
+                (contract, str(args['sid']), bytes(args[prefix + 'pub_key_modulus']),
+                 bytes(args[prefix + 'pub_key_exponent']), int(is_valid), block)
+            )
+        elif name == "CIDRegistered":
+            self._db.execute(
+                "INSERT OR REPLACE INTO cids VALUES (?, ?, ?, ?)",
+                (contract, str(args['cid']), int(args['isValid']), block)
+            )
+        elif name == "CIDModified":
+            # Solo i CID registrati singolarmente: i CID ancorati in batch non hanno una riga.
+            self._db.execute(
+                "UPDATE cids SET is_valid = ?, block = ? WHERE contract = ? AND cid = ?",
+                (int(args['newIsValid']), block, contract, str(args['cid']))
+            )
+
+    def _university(self, uid: str):
+        return self._db.execute(
+            "SELECT pub_key_modulus, pub_key_exponent, is_revoked, sid_contract, cid_contract FROM universities WHERE uid_hash = ?",
+            (bytes(Web3.keccak(text=uid)),)
+        ).fetchone()
+
+    def get_university_info(self, uid: str):
+        with self._lock:
+            row = self._university(uid)
+        if row is None:
+            return None
+        modulus, exponent, is_revoked, sid_contract, cid_contract = row
+        return bytes(modulus), bytes(exponent), bool(is_revoked), sid_contract, cid_contract
+
+    def get_credential_status(self, issuer_uid: str, student_university_uid: str, sid: int, cid: int):
+        # None quando l'indice non può rispondere con certezza: il chiamante legge dalla catena.
+        with self._lock:
+            issuer = self._university(issuer_uid)
+            student_university = self._university(student_university_uid)
+            if issuer is None or student_university is None:
+                return None
+
+            status = {
+                "issuerPubKeyModulus": bytes(issuer[0]),
+                "issuerPubKeyExponent": bytes(issuer[1]),
+                "issuerIsRevoked": bool(issuer[2]),
+                "studentUniversityIsRevoked": bool(student_university[2]),
+                "studentPubKeyModulus": b"",
+                "studentPubKeyExponent": b"",
+                "sidIsValid": False,
+                "cidIsValid": False
+            }
+            # Stessa semantica di SmartContractAuthority.verificaCredenziale. Un SID o CID
+            # assente dall'indice può essere stato registrato dopo l'ultimo blocco indicizzato.
+            if not student_university[2]:
+                sid_row = self._db.execute(
+                    "SELECT pub_key_modulus, pub_key_exponent, is_valid FROM sids WHERE contract = ? AND sid = ?",
+                    (student_university[3], str(sid))
+                ).fetchone()
+                if sid_row is None:
+                    return None
+                status["studentPubKeyModulus"] = bytes(sid_row[0])
+                status["studentPubKeyExponent"] = bytes(sid_row[1])
+                status["sidIsValid"] = bool(sid_row[2])
+            if not issuer[2]:
+                cid_row = self._db.execute(
+                    "SELECT is_valid FROM cids WHERE contract = ? AND cid = ?", (issuer[4], str(cid))
+                ).fetchone()
+                if cid_row is None:
+                    return None
+                status["cidIsValid"] = bool(cid_row[0])
+
+            # Un esito negativo vale solo se l'indice è allineato alla testa della catena:
+            # nei blocchi non ancora indicizzati il SID o il CID potrebbe essere tornato valido.
+            is_negative = (not student_university[2] and not status["sidIsValid"]) or (not issuer[2] and not status["cidIsValid"])
+            if is_negative and (self._head is None or self._checkpoint() != self._head):
+                return None
+            return status
+
+    def close(self):
+        with self._lock:
+            self._db.close()
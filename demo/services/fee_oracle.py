@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from web3 import Web3
+
+DEFAULT_GAS_LIMIT = 800000
+DEFAULT_GAS_MARGIN = 1.2
+MAX_TRACKED_TRANSACTIONS = 1024
+
+FEE_ERROR_MARKERS = ("underpriced", "less than block base fee", "fee cap", "max fee per gas")
+
+def is_fee_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in FEE_ERROR_MARKERS)
+
+class FeeOracle:
+    def __init__(self, w3: Web3, refresh_interval: float = 15.0):
+        self._w3 = w3
+        self.refresh_interval = refresh_interval
+        self._fees = None
+        self._gas_price = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        gas_price = self._w3.eth.gas_price
+        base_fee = self._w3.eth.get_block('latest').get('baseFeePerGas')
+        if base_fee is None:
+            fees = {'gasPrice': gas_price}
+        else:
+            # Stessa strategia di web3: il massimo copre il raddoppio del base fee
+            # in attesa di inclusione, la mancia è quanto il nodo suggerisce oltre il base fee.
+            priority_fee = max(gas_price - base_fee, 0)
+            fees = {'maxFeePerGas': 2 * base_fee + priority_fee, 'maxPriorityFeePerGas': priority_fee}
+        self._gas_price = gas_price
+        self._fees = fees
+        self._fetched_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        if self._fees is None or time.monotonic() - self._fetched_at >= self.refresh_interval:
+            self._refresh()
+
+    def fee_fields(self) -> dict:
+        with self._lock:
+            self._ensure_fresh()
+            return dict(self._fees)
+
+    def gas_price(self) -> int:
+        with self._lock:
+            self._ensure_fresh()
+            return self._gas_price
+
+    def invalidate(self):
+        with self._lock:
+            self._fees = None
+
+
+class GasProfile:
+    def __init__(self, path: str = None, margin: float = DEFAULT_GAS_MARGIN):
+        if margin < 1:
+            raise ValueError("Il margine sul gas stimato non può essere inferiore a 1.")
+        self.path = path
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._estimates = {}
+        self._in_flight = OrderedDict()
+        if path and os.path.isfile(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._estimates = {key: int(value) for key, value in json.load(f).items()}
+            except (OSError, ValueError) as e:
+                print(f"Profilo del gas illeggibile, verrà ricostruito: {e}")
+
+    @staticmethod
+    def key_for(contract_function) -> str:
+        # Il consumo dipende dalla lunghezza degli argomenti dinamici e dai flag
+        # booleani, che di solito selezionano rami diversi del contratto.
+        parts = []
+        for arg in contract_function.args:
+            if isinstance(arg, bool):
+                parts.append(str(arg).lower())
+            elif isinstance(arg, (list, tuple, bytes, str)):
+                parts.append(str(len(arg)))
+        return f"{contract_function.fn_name}({','.join(parts)})"
+
+    def learned_limit(self, key: str):
+        with self._lock:
+            learned = self._estimates.get(key)
+        return None if learned is None else int(learned * self.margin)
+
+    def gas_limit(self, key: str, estimate, default: int = DEFAULT_GAS_LIMIT) -> int:
+        limit = self.learned_limit(key)
+        if limit is None:
+            try:
+                learned = estimate()
+            except Exception as e:
+                print(f"Stima del gas non riuscita per {key}, uso il limite predefinito {default}: {e}")
+                return default
+            self.record(key, learned)
+            limit = int(learned * self.margin)
+        return limit
+
+    def record(self, key: str, gas: int):
+        with self._lock:
+            if gas <= self._estimates.get(key, 0):
+                return
+            self._estimates[key] = gas
+            self._save()
+
+    def track(self, tx_hash, key: str, gas_limit: int):
+        with self._lock:
+            self._in_flight[bytes(tx_hash)] = (key, gas_limit)
+            if len(self._in_flight) > MAX_TRACKED_TRANSACTIONS:
+                self._in_flight.popitem(last=False)
+
+    def observe(self, tx_hash, receipt):
+        # Una transazione fallita che ha consumato tutto il gas concesso smentisce la
+        # stima appresa: viene scartata e ripetuta alla prossima transazione.
+        with self._lock:
+            entry = self._in_flight.pop(bytes(tx_hash), None)
+        if entry is not None and receipt.status != 1 and receipt.gasUsed >= entry[1]:
+            print(f"Gas esaurito con il limite appreso per {entry[0]}: la stima verrà ripetuta.")
+            self.forget(entry[0])
+
+    def forget(self, key: str):
+        with self._lock:
+            if self._estimates.pop(key, None) is not None:
+                self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._estimates, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.path)
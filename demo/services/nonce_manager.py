@@ -0,0 +1,43 @@
+import threading
+
+NONCE_ERROR_MARKERS = ("nonce too low", "nonce too high", "correct nonce", "invalid nonce", "invalid transaction nonce")
+
+def is_nonce_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in NONCE_ERROR_MARKERS)
+
+class NonceManager:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_nonces = {}
+
+    def is_synced(self, account_address: str) -> bool:
+        with self._lock:
+            return account_address in self._next_nonces
+
+    def sync(self, account_address: str, pending_count: int):
+        with self._lock:
+            self._next_nonces.setdefault(account_address, pending_count)
+
+    def allocate(self, account_address: str, fetch_pending_count=None) -> int:
+        with self._lock:
+            nonce = self._next_nonces.get(account_address)
+            if nonce is None:
+                if fetch_pending_count is None:
+                    raise RuntimeError(f"Nonce dell'account {account_address} non sincronizzato.")
+                nonce = fetch_pending_count(account_address)
+            self._next_nonces[account_address] = nonce + 1
+            return nonce
+
+    def release(self, account_address: str, nonce: int):
+        with self._lock:
+            if self._next_nonces.get(account_address) == nonce + 1:
+                self._next_nonces[account_address] = nonce
+            else:
+                # Un nonce intermedio è rimasto inutilizzato: si risincronizza
+                # con il nodo alla prossima allocazione per colmare il buco.
+                self._next_nonces.pop(account_address, None)
+
+    def resync(self, account_address: str):
+        with self._lock:
+            self._next_nonces.pop(account_address, None)
@@ -0,0 +1,176 @@
+import threading
+import time
+from collections import OrderedDict
+from web3 import Web3
+from web3.contract import Contract
+
+# Funzioni di sola lettura memorizzabili: per ognuna, gli argomenti da cui dipende
+# il risultato, espressi come (tipo, posizione dell'argomento).
+CACHEABLE_FUNCTIONS = {
+    "getUniversityInfo": (("uid", 0),),
+    "verificaCid": (("uid", 0), ("cid", 1)),
+    "verificaCidAncorato": (("uid", 0), ("batch", 1), ("cid", 2)),
+    "verificaSid": (("uid", 0), ("sid", 1)),
+    "verificaCredenziale": (("uid", 0), ("uid", 1), ("sid", 2), ("cid", 3)),
+    "getInfoCid": (("cid", 0),),
+    "getInfoCidAncorato": (("batch", 0), ("cid", 1)),
+    "getInfoSid": (("sid", 0),),
+}
+
+# Eventi che invalidano le letture: il primo topic indicizzato identifica la chiave toccata.
+# Anche le registrazioni invalidano, perché una lettura può aver memorizzato un esito
+# negativo (ad esempio sidIsValid falso in verificaCredenziale) prima della registrazione.
+INVALIDATION_EVENTS = {
+    bytes(Web3.keccak(text="CIDRegistered(uint256,bool)")): "cid",
+    bytes(Web3.keccak(text="CIDModified(uint256,bool)")): "cid",
+    bytes(Web3.keccak(text="CIDBatchAnchored(uint256,bytes32,uint256)")): "batch",
+    bytes(Web3.keccak(text="SIDRegistered(uint128,bytes,bytes,bool)")): "sid",
+    bytes(Web3.keccak(text="SIDModified(uint128,bytes,bytes,bool)")): "sid",
+    bytes(Web3.keccak(text="UniversityRegistered(string,bytes,bytes,address,address)")): "uid",
+    bytes(Web3.keccak(text="UniversityInfoModified(string,bytes,bytes,bool,address,address)")): "uid",
+    bytes(Web3.keccak(text="UniversityRevokeStatusChanged(string,bool)")): "uid",
+}
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, bytearray):
+        return bytes(value)
+    return value
+
+def _argument_tag(kind: str, value):
+    # Le stringhe indicizzate compaiono nei log solo come keccak del loro contenuto.
+    if kind == "uid":
+        return kind, bytes(Web3.keccak(text=value))
+    return kind, int(value)
+
+def _event_tag(kind: str, topic: bytes):
+    if kind == "uid":
+        return kind, bytes(topic)
+    return kind, int.from_bytes(bytes(topic), 'big')
+
+class ChainReadCache:
+    def __init__(self, w3: Web3, maxsize: int = 4096, poll_interval: float = 2.0, max_age: float = 300.0):
+        if maxsize <= 0:
+            raise ValueError("La dimensione della cache deve essere positiva.")
+        self._w3 = w3
+        self.maxsize = maxsize
+        self.poll_interval = poll_interval
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.RLock()
+        self._watermark = None
+        self._last_poll = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def is_cacheable(function_name: str) -> bool:
+        return function_name in CACHEABLE_FUNCTIONS
+
+    def call(self, contract_instance: Contract, function_name: str, *args):
+        self.refresh()
+        cache_key = (contract_instance.address, function_name, _freeze(args))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and now - entry[2] <= self.max_age:
+                self._entries.move_to_end(cache_key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+            block = self._watermark
+
+        # La lettura è fatta al blocco del watermark: ogni modifica successiva
+        # compare nei log che il prossimo refresh andrà a scansionare.
+        value = getattr(contract_instance.functions, function_name)(*args).call(block_identifier=block)
+        tags = [_argument_tag(kind, args[position]) for kind, position in CACHEABLE_FUNCTIONS[function_name]]
+
+        with self._lock:
+            if self._watermark != block:
+                return value
+            self._store(cache_key, value, tags, now)
+        return value
+
+    def _store(self, cache_key, value, tags: list, fetched_at: float):
+        self._discard(cache_key)
+        self._entries[cache_key] = (value, tags, fetched_at)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(cache_key)
+        while len(self._entries) > self.maxsize:
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, cache_key):
+        entry = self._entries.pop(cache_key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(cache_key)
+                if not keys:
+                    del self._tags[tag]
+
+    def refresh(self, min_block: int = None):
+        with self._lock:
+            if min_block is None:
+                if time.monotonic() - self._last_poll < self.poll_interval:
+                    return
+            elif self._watermark is not None and self._watermark >= min_block:
+                return
+
+            latest = self._w3.eth.block_number
+            self._last_poll = time.monotonic()
+            if self._watermark is None:
+                self._watermark = latest
+                return
+            if latest <= self._watermark:
+                return
+
+            try:
+                logs = self._w3.eth.get_logs({
+                    'fromBlock': self._watermark + 1,
+                    'toBlock': latest,
+                    'topics': [[Web3.to_hex(topic) for topic in INVALIDATION_EVENTS]]
+                })
+            except Exception as e:
+                # Senza i log non è possibile sapere cosa sia cambiato: si riparte da zero.
+                print(f"Impossibile leggere gli eventi della blockchain, cache svuotata: {e}")
+                self._clear_entries()
+                self._watermark = latest
+                return
+
+            for log in logs:
+                kind = INVALIDATION_EVENTS.get(bytes(log['topics'][0]))
+                if kind is None or len(log['topics']) < 2:
+                    continue
+                for cache_key in list(self._tags.get(_event_tag(kind, log['topics'][1]), ())):
+                    self._discard(cache_key)
+                    self._invalidations += 1
+            self._watermark = latest
+
+    def _clear_entries(self):
+        self._invalidations += len(self._entries)
+        self._entries.clear()
+        self._tags.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._watermark = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "watermark": self._watermark,
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "hit_rate": self._hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,192 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fields (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS map_entries (
+    map TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (map, key)
+);
+"""
+
+class StateStore:
+    # Stato persistente come piccole scritture incrementali su SQLite in WAL:
+    # ogni commit aggiunge solo le righe modificate al log. Con synchronous=FULL il log
+    # è sincronizzato su disco a ogni commit, così un contatore riservato non va perso
+    # nemmeno per un'interruzione di corrente. Un'interruzione non lascia mai stati parziali.
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(_SCHEMA)
+        self._depth = 0
+        self._maps = {}
+        self._load()
+
+    def _load(self):
+        self._fields = {key: json.loads(value) for key, value in self._db.execute("SELECT key, value FROM fields")}
+        for name, stored_map in self._maps.items():
+            stored_map._data = self._load_map(name)
+
+    def _load_map(self, name: str) -> dict:
+        return {key: json.loads(value) for key, value in self._db.execute("SELECT key, value FROM map_entries WHERE map = ?", (name,))}
+
+    @contextmanager
+    def transaction(self):
+        # Le modifiche fatte nel blocco vengono scritte con un solo commit.
+        with self._lock:
+            if self._depth == 0:
+                self._db.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._db.execute("ROLLBACK")
+                    self._load()
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._db.execute("COMMIT")
+
+    def is_empty(self) -> bool:
+        return not self._fields
+
+    def get(self, key: str, default=None):
+        return self._fields.get(key, default)
+
+    def reload(self, key: str, default=None):
+        # Rilegge un campo che altri processi potrebbero aver modificato.
+        with self._lock:
+            row = self._db.execute("SELECT value FROM fields WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return default
+            self._fields[key] = json.loads(row[0])
+            return self._fields[key]
+
+    def set(self, key: str, value):
+        with self.transaction():
+            self._db.execute("INSERT OR REPLACE INTO fields (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+            self._fields[key] = value
+
+    def reserve(self, key: str, amount: int) -> tuple:
+        # Il valore è riletto dal database dentro la transazione: BEGIN IMMEDIATE
+        # serializza le prenotazioni anche fra processi diversi.
+        with self.transaction():
+            row = self._db.execute("SELECT value FROM fields WHERE key = ?", (key,)).fetchone()
+            current = json.loads(row[0]) if row else 0
+            self.set(key, current + amount)
+        return current + 1, current + amount
+
+    def execute(self, sql: str, parameters: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._db.execute(sql, parameters)
+
+    def executescript(self, script: str):
+        with self._lock:
+            self._db.executescript(script)
+
+    def get_map(self, name: str) -> "StoredMap":
+        with self._lock:
+            stored_map = self._maps.get(name)
+            if stored_map is None:
+                stored_map = StoredMap(self, name, self._load_map(name))
+                self._maps[name] = stored_map
+            return stored_map
+
+    def _set_map_entry(self, name: str, key: str, value):
+        with self.transaction():
+            self._db.execute(
+                "INSERT OR REPLACE INTO map_entries (map, key, value) VALUES (?, ?, ?)",
+                (name, key, json.dumps(value))
+            )
+
+    def _delete_map_entry(self, name: str, key: str):
+        with self.transaction():
+            self._db.execute("DELETE FROM map_entries WHERE map = ? AND key = ?", (name, key))
+
+    def import_snapshot(self, data: dict, map_keys: tuple = ()):
+        with self.transaction():
+            for key, value in data.items():
+                if key in map_keys:
+                    stored_map = self.get_map(key)
+                    for map_key, map_value in (value or {}).items():
+                        stored_map[map_key] = map_value
+                else:
+                    self.set(key, value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            data = dict(self._fields)
+            names = {row[0] for row in self._db.execute("SELECT DISTINCT map FROM map_entries")}
+            for name in names.union(self._maps):
+                data[name] = dict(self.get_map(name))
+            return data
+
+    def export_json(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class StoredMap(MutableMapping):
+    def __init__(self, store: StateStore, name: str, data: dict):
+        self._store = store
+        self._name = name
+        self._data = data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self._store._set_map_entry(self._name, key, value)
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        if key not in self._data:
+            raise KeyError(key)
+        self._store._delete_map_entry(self._name, key)
+        del self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return repr(self._data)
+
+
+class StoredField:
+    # Attributo di classe che legge e scrive il campo omonimo nello StateStore `_state` dell'istanza.
+    def __init__(self, default=None):
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return instance._state.get(self.name, self.default)
+
+    def __set__(self, instance, value):
+        instance._state.set(self.name, value)
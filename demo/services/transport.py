@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+import requests
+from aiohttp import ClientTimeout
+from requests.adapters import HTTPAdapter
+from web3 import AsyncWeb3, Web3
+from web3.middleware import ExtraDataToPOAMiddleware
+from services.nonce_manager import NonceManager
+from services.read_cache import ChainReadCache
+from services.fee_oracle import FeeOracle
+
+DEFAULT_POOL_SIZE = 32
+DEFAULT_TIMEOUT = 30
+MAX_CACHED_CONTRACTS = 256
+
+class Web3Transport:
+    def __init__(self, rpc_url: str, pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT):
+        if pool_size <= 0:
+            raise ValueError("La dimensione del pool di connessioni deve essere positiva.")
+        self.rpc_url = rpc_url
+        self.pool_size = pool_size
+        self.timeout = timeout
+
+        # Una sola sessione per endpoint: le connessioni restano aperte (keep-alive)
+        # e vengono riusate da tutti i manager e da tutti i thread del processo.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self.w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={"timeout": timeout}, session=self._session))
+        self.w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+
+        # Stato legato alla catena e non al singolo attore: condividerlo evita che
+        # due manager sullo stesso account si contendano i nonce.
+        self.nonce_manager = NonceManager()
+        self.read_cache = ChainReadCache(self.w3)
+        self.fee_oracle = FeeOracle(self.w3)
+
+        self._connected = False
+        self._connect_lock = threading.Lock()
+        self._async_w3 = None
+
+        # Le istanze dei contratti sono immutabili: si costruiscono una sola volta
+        # per coppia (ABI, indirizzo), la classe del contratto una sola volta per ABI.
+        self._contract_factories = OrderedDict()
+        self._contracts = OrderedDict()
+        self._contracts_lock = threading.Lock()
+
+    def ensure_connected(self):
+        if self._connected:
+            return
+        with self._connect_lock:
+            if self._connected:
+                return
+            if not self.w3.is_connected():
+                raise ConnectionError(f"Impossibile connettersi alla blockchain all'URL: {self.rpc_url}")
+            self._connected = True
+
+    @property
+    def async_w3(self) -> AsyncWeb3:
+        # Istanza asincrona condivisa dai manager asincroni dell'endpoint, creata al primo
+        # uso: il provider apre la sessione HTTP solo alla prima richiesta.
+        with self._connect_lock:
+            if self._async_w3 is None:
+                self._async_w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(
+                    self.rpc_url, request_kwargs={"timeout": ClientTimeout(total=self.timeout)}
+                ))
+                self._async_w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+            return self._async_w3
+
+    @async_w3.setter
+    def async_w3(self, async_w3: AsyncWeb3):
+        with self._connect_lock:
+            self._async_w3 = async_w3
+
+    def contract(self, abi: list, address: str):
+        with self._contracts_lock:
+            entry = self._contracts.get((id(abi), address))
+            if entry is not None and entry[0] is abi:
+                return entry[1]
+
+            factory_entry = self._contract_factories.get(id(abi))
+            if factory_entry is None or factory_entry[0] is not abi:
+                factory_entry = (abi, self.w3.eth.contract(abi=abi))
+                self._contract_factories[id(abi)] = factory_entry
+                if len(self._contract_factories) > MAX_CACHED_CONTRACTS:
+                    self._contract_factories.popitem(last=False)
+
+            # Il riferimento all'ABI impedisce che il suo id venga riusato da un altro oggetto.
+            instance = factory_entry[1](address=address)
+            self._contracts[(id(abi), address)] = (abi, instance)
+            if len(self._contracts) > MAX_CACHED_CONTRACTS:
+                self._contracts.popitem(last=False)
+            return instance
+
+    def close(self):
+        self._session.close()
+        self._connected = False
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+def get_transport(rpc_url: str, pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT) -> Web3Transport:
+    # pool_size e timeout valgono solo alla creazione del trasporto per l'endpoint.
+    with _transports_lock:
+        transport = _transports.get(rpc_url)
+        if transport is None:
+            transport = Web3Transport(rpc_url, pool_size, timeout)
+            _transports[rpc_url] = transport
+        return transport
+
+def close_transports():
+    with _transports_lock:
+        for transport in _transports.values():
+            transport.close()
+        _transports.clear()
@@ -0,0 +1,105 @@
+import os
+import sys
+
+import pytest
+
+DEMO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DEMO_DIR)
+
+BUILD_PATH = os.path.join(DEMO_DIR, "SmartContracts", "build")
+# Chiave del primo account di eth-tester.
+PRIVATE_KEY = "0x" + "00" * 31 + "01"
+
+
+def require_compiled_function(contract, function_name: str):
+    # Le funzioni aggiunte ai sorgenti Solidity sono disponibili solo dopo aver
+    # rigenerato gli artefatti con SmartContracts/build.py (serve solc).
+    if not hasattr(contract.functions, function_name):
+        pytest.skip(f"{function_name} non è negli artefatti di SmartContracts/build: rigenerarli con build.py")
+
+
+def without_functions(manager, contract, *function_names):
+    # Stesso contratto visto con un'ABI compilata prima che le funzioni esistessero.
+    abi = [entry for entry in contract.abi if entry.get("name") not in function_names]
+    return manager.get_contract_instance(contract.address, abi)
+
+
+@pytest.fixture
+def transport():
+    pytest.importorskip("eth_tester")
+    from web3 import Web3, EthereumTesterProvider
+    from services.transport import Web3Transport
+    from services.read_cache import ChainReadCache
+    from services.fee_oracle import FeeOracle
+
+    # Stesso trasporto dei manager reali, ma sulla catena in memoria di eth-tester.
+    transport = Web3Transport("http://127.0.0.1:8545")
+    transport.w3 = Web3(EthereumTesterProvider())
+    transport.read_cache = ChainReadCache(transport.w3, poll_interval=0)
+    transport.fee_oracle = FeeOracle(transport.w3)
+    yield transport
+    transport.close()
+
+
+@pytest.fixture
+def manager(transport, tmp_path):
+    from University.services.university_blockchain_manager import UniversityBlockchainManager
+    return UniversityBlockchainManager(transport.rpc_url, transport, gas_profile_path=str(tmp_path / "gas_profile.json"))
+
+
+@pytest.fixture
+def account(manager):
+    return manager.get_web3_instance().eth.accounts[0]
+
+
+@pytest.fixture
+def deploy(manager, account):
+    from University.utils.contract_utils import load_contract_interface
+
+    def deploy(name: str):
+        abi, bytecode = load_contract_interface(BUILD_PATH, name)
+        address = manager.deploy_new_contract(account, PRIVATE_KEY, abi, bytecode)
+        return manager.get_contract_instance(address, abi)
+    return deploy
+
+
+@pytest.fixture
+def registry(manager, account, deploy):
+    # SCA con un'università "U1" registrata, e i suoi contratti SID e CID.
+    sid_contract = deploy("SIDSmartContract")
+    cid_contract = deploy("CIDSmartContract")
+    sca_contract = deploy("SmartContractAuthority")
+    manager._submit_transaction(
+        manager._build_transaction(
+            sca_contract.functions.registraUniversita("U1", b"\x01" * 4, b"\x03", False, sid_contract.address, cid_contract.address),
+            account
+        ),
+        PRIVATE_KEY, "Registrazione università"
+    )
+    return sca_contract, sid_contract, cid_contract
+
+
+@pytest.fixture
+def async_manager(transport):
+    from web3 import AsyncWeb3
+    from web3.providers.eth_tester import AsyncEthereumTesterProvider
+    from University.services.async_university_blockchain_manager import AsyncUniversityBlockchainManager
+
+    # Il provider asincrono lavora sulla stessa catena in memoria del trasporto.
+    provider = AsyncEthereumTesterProvider()
+    provider.ethereum_tester = transport.w3.provider.ethereum_tester
+    transport.async_w3 = AsyncWeb3(provider)
+    return AsyncUniversityBlockchainManager(transport.rpc_url, max_in_flight=2, transport=transport)
+
+
+def make_credential(cid: str = "CID:U1:1", sid: str = "SID:U1:1", uid: str = "UID:U1"):
+    from Credential.credential import Credential
+    from Credential.fields import Course, ExtraActivity
+    from Credential.merkle_tree import MerkleTree
+
+    properties = [Course("Algorithms", True, 30, 6, "2024-12-10"), Course("Networks", False, None, 9, ""),
+                  ExtraActivity("Choir", 2)]
+    _, proofs = MerkleTree.generate_proofs(properties)
+    for prop, proof in zip(properties, proofs):
+        prop.set_merkle_proof(proof)
+    return Credential(cid, sid, uid, "2025-01-01", properties)
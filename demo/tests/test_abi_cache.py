@@ -0,0 +1,35 @@
+import json
+import os
+
+from conftest import BUILD_PATH
+
+ADDRESS = "0x" + "00" * 19 + "12"
+
+
+def test_abi_is_parsed_once_and_reloaded_on_change(tmp_path):
+    from services.abi_cache import load_abi, load_contract_abi
+    abi_path = tmp_path / "Token.json"
+    abi_path.write_text(json.dumps([{"type": "function", "name": "a", "inputs": [], "outputs": []}]))
+    abi = load_abi(str(abi_path))
+    assert load_abi(str(abi_path)) is abi
+
+    abi_path.write_text(json.dumps([{"type": "function", "name": "b", "inputs": [], "outputs": []}]))
+    stat = os.stat(abi_path)
+    os.utime(abi_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    reloaded = load_abi(str(abi_path))
+    assert reloaded is not abi and reloaded[0]["name"] == "b"
+
+    assert load_contract_abi(BUILD_PATH, "CIDSmartContract") is load_contract_abi(BUILD_PATH, "CIDSmartContract")
+
+
+def test_transport_reuses_contract_instances():
+    from services.abi_cache import load_contract_abi
+    from services.transport import Web3Transport
+    transport = Web3Transport("http://127.0.0.1:1")
+    abi = load_contract_abi(BUILD_PATH, "CIDSmartContract")
+    contract = transport.contract(abi, ADDRESS)
+    assert transport.contract(abi, ADDRESS) is contract
+    assert contract.address == ADDRESS
+    # Un'ABI diversa, anche se uguale nel contenuto, produce un'altra istanza.
+    assert transport.contract(list(abi), ADDRESS) is not contract
+    transport.close()
@@ -0,0 +1,49 @@
+import pytest
+
+from conftest import PRIVATE_KEY, require_compiled_function, without_functions
+
+
+def test_anchoring_with_stale_abi_fails_before_sending(manager, transport, account, registry):
+    sca_contract, _, cid_contract = registry
+    sca_contract = without_functions(manager, sca_contract, "verificaCidAncorato")
+    cid_contract = without_functions(manager, cid_contract, "ancoraBatchCid", "modificaCidAncorato")
+    nonce = transport.nonce_manager._next_nonces[account]
+
+    with pytest.raises(AttributeError, match="build.py"):
+        manager.anchor_cid_batch_on_chain(cid_contract, account, PRIVATE_KEY, 1, "0x" + "11" * 32, 4)
+    with pytest.raises(AttributeError, match="build.py"):
+        manager.modifica_cid_ancorato(cid_contract, account, PRIVATE_KEY, 1, False)
+    with pytest.raises(AttributeError, match="verificaCidAncorato"):
+        manager.verify_anchored_cid_on_chain(sca_contract, "U1", 1, 1, [])
+    assert transport.nonce_manager._next_nonces[account] == nonce
+
+
+def test_cid_batch_tree_proofs():
+    from University.utils.cid_batch_utils import build_cid_batch_tree, verify_cid_inclusion
+
+    cids = [7, 3, 11, 5, 2]
+    root, proofs = build_cid_batch_tree(cids)
+    assert all(verify_cid_inclusion(cid, proof, root) for cid, proof in zip(cids, proofs))
+    assert not verify_cid_inclusion(8, proofs[0], root)
+
+
+def test_anchor_verify_revoke_round_trip(manager, account, registry):
+    from University.utils.cid_batch_utils import build_cid_batch_tree
+
+    sca_contract, _, cid_contract = registry
+    require_compiled_function(cid_contract, "ancoraBatchCid")
+    require_compiled_function(sca_contract, "verificaCidAncorato")
+
+    cids = [21, 22, 23, 24, 25]
+    root, proofs = build_cid_batch_tree(cids)
+    assert manager.anchor_cid_batch_on_chain(cid_contract, account, PRIVATE_KEY, 1, root, len(cids)).status == 1
+    assert all(manager.verify_anchored_cid_on_chain(sca_contract, "U1", 1, cid, proof) for cid, proof in zip(cids, proofs))
+    # Una proof di un altro CID non dimostra l'appartenenza al batch.
+    with pytest.raises(Exception, match="not part of the anchored batch"):
+        manager.verify_anchored_cid_on_chain(sca_contract, "U1", 1, 26, proofs[0])
+
+    manager.modifica_cid_ancorato(cid_contract, account, PRIVATE_KEY, 23, False)
+    assert manager.verify_anchored_cid_on_chain(sca_contract, "U1", 1, 23, proofs[2]) is False
+    assert manager.verify_anchored_cid_on_chain(sca_contract, "U1", 1, 24, proofs[3]) is True
+    manager.modifica_cid_ancorato(cid_contract, account, PRIVATE_KEY, 23, True)
+    assert manager.verify_anchored_cid_on_chain(sca_contract, "U1", 1, 23, proofs[2]) is True
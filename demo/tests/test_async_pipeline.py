@@ -0,0 +1,111 @@
+import asyncio
+
+from conftest import BUILD_PATH, PRIVATE_KEY, without_functions
+from services.abi_cache import load_contract_abi
+
+
+def _cid_abi():
+    return load_contract_abi(BUILD_PATH, "CIDSmartContract")
+
+
+def test_pipelined_submissions_use_consecutive_nonces(async_manager, account, deploy):
+    address = deploy("CIDSmartContract").address
+    cid_contract = async_manager.get_contract_instance(address, _cid_abi())
+
+    async def run():
+        handles = [
+            await async_manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, cid)
+            for cid in range(1, 6)
+        ]
+        receipts = await async_manager.gather_receipts(handles)
+        transactions = [await async_manager.get_web3_instance().eth.get_transaction(r.transactionHash) for r in receipts]
+        return receipts, transactions
+
+    receipts, transactions = asyncio.run(run())
+    assert all(receipt.status == 1 for receipt in receipts)
+    nonces = [tx["nonce"] for tx in transactions]
+    assert nonces == list(range(nonces[0], nonces[0] + 5))
+
+
+def test_sync_and_async_managers_share_nonces(async_manager, manager, transport, account, deploy):
+    assert async_manager._nonce_manager is transport.nonce_manager is manager._nonce_manager
+
+    sync_contract = deploy("CIDSmartContract")
+    async_contract = async_manager.get_contract_instance(sync_contract.address, _cid_abi())
+
+    async def register(cid):
+        handle = await async_manager.register_cid_on_chain(async_contract, account, PRIVATE_KEY, cid)
+        return await handle
+
+    manager.register_cid_on_chain(sync_contract, account, PRIVATE_KEY, 1)
+    assert asyncio.run(register(2)).status == 1
+    manager.register_cid_on_chain(sync_contract, account, PRIVATE_KEY, 3)
+    assert asyncio.run(register(4)).status == 1
+    assert all(sync_contract.functions.getInfoCid(cid).call() for cid in range(1, 5))
+    # Nessuna risincronizzazione: il prossimo nonce condiviso è già quello del nodo.
+    assert transport.nonce_manager._next_nonces[account] == transport.w3.eth.get_transaction_count(account)
+
+
+def test_async_transactions_use_fee_oracle_and_gas_profile(async_manager, transport, account, deploy):
+    address = deploy("CIDSmartContract").address
+    cid_contract = async_manager.get_contract_instance(address, _cid_abi())
+
+    async def run():
+        receipt = await (await async_manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1))
+        return await async_manager.get_web3_instance().eth.get_transaction(receipt.transactionHash)
+
+    transaction = asyncio.run(run())
+    fee_fields = transport.fee_oracle.fee_fields()
+    assert transaction["maxFeePerGas"] == fee_fields["maxFeePerGas"]
+    assert transaction["gas"] == async_manager._gas_profile.learned_limit("registraCid(true)")
+    assert transaction["gas"] < 800000
+
+
+def test_async_status_without_aggregate_call_in_abi(async_manager, manager, account, registry):
+    sca_contract, sid_contract, cid_contract = registry
+    manager.register_sid_on_chain(sid_contract, account, PRIVATE_KEY, 1, b"\x05" * 8, b"\x03")
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+    sca_abi = load_contract_abi(BUILD_PATH, "ISmartContractAuthorityPublic")
+    async_sca = without_functions(async_manager, async_manager.get_contract_instance(sca_contract.address, sca_abi), "verificaCredenziale")
+
+    valid = asyncio.run(async_manager.get_credential_status_on_chain(async_sca, "U1", "U1", 1, 1))
+    assert valid["sidIsValid"] is True and valid["cidIsValid"] is True
+    assert valid["studentPubKeyModulus"] == b"\x05" * 8
+
+    unknown = asyncio.run(async_manager.get_credential_status_on_chain(async_sca, "U1", "U1", 7, 7))
+    assert unknown["sidIsValid"] is False and unknown["cidIsValid"] is False
+
+
+def test_async_managers_share_the_transport_provider():
+    from services.transport import Web3Transport
+    from University.services.async_university_blockchain_manager import AsyncUniversityBlockchainManager
+    transport = Web3Transport("http://127.0.0.1:1")
+    first = AsyncUniversityBlockchainManager(transport.rpc_url, transport=transport)
+    second = AsyncUniversityBlockchainManager(transport.rpc_url, transport=transport)
+    assert first.get_web3_instance() is second.get_web3_instance() is transport.async_w3
+    transport.close()
+
+
+def test_failed_build_releases_nonce_and_slot(async_manager, transport, account, deploy):
+    address = deploy("CIDSmartContract").address
+    cid_contract = async_manager.get_contract_instance(address, _cid_abi())
+    fee_fields = async_manager.get_fee_fields
+
+    async def invalid_fee_fields():
+        # Campi legacy ed EIP-1559 insieme: build_transaction li rifiuta.
+        return dict(await fee_fields(), gasPrice=1)
+
+    async def run():
+        async_manager.get_fee_fields = invalid_fee_fields
+        try:
+            await async_manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+        except Exception as e:
+            error = e
+        async_manager.get_fee_fields = fee_fields
+        receipt = await (await async_manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1))
+        return error, receipt
+
+    error, receipt = asyncio.run(run())
+    assert error is not None and receipt.status == 1
+    assert async_manager._in_flight._value == 2
+    assert transport.nonce_manager._next_nonces[account] == transport.w3.eth.get_transaction_count(account)
@@ -0,0 +1,72 @@
+from conftest import PRIVATE_KEY
+
+
+def test_batch_call_per_item_results(manager, account, registry):
+    sca_contract, _, cid_contract = registry
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 2)
+    manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 2, False)
+
+    results = manager.verify_cids_on_chain(sca_contract, "U1", [1, 2, 3], batch_size=2, from_address=account)
+    assert results[0] == (True, True)
+    assert results[1] == (True, False)
+    assert results[2][0] is False and "CID is not registered" in results[2][1]
+
+
+def test_batch_call_unencodable_item_fails_alone(manager, account, registry):
+    sca_contract, _, cid_contract = registry
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+
+    results = manager.batch_call_contract_functions(
+        [(sca_contract, "verificaCid", ("U1", 1)), (sca_contract, "verificaCid", ("U1", "x")), (sca_contract, "assente", ())],
+        from_address=account
+    )
+    assert results[0] == (True, True)
+    assert results[1][0] is False and results[2][0] is False
+
+
+def test_call_sender_defaults(manager, account):
+    from services.blockchain_manager import ZERO_ADDRESS
+    w3 = manager.get_web3_instance()
+    assert manager._call_sender(account) == account
+    assert manager._call_sender() == ZERO_ADDRESS
+    w3.eth.default_account = account
+    assert manager._call_sender() == account
+
+
+def test_multicall_matches_batch_call(manager, account, registry, deploy):
+    import os
+    import pytest
+    from conftest import BUILD_PATH
+    if not os.path.isfile(os.path.join(BUILD_PATH, "Multicall", "Multicall.bin")):
+        pytest.skip("Multicall non è negli artefatti di SmartContracts/build: rigenerarli con build.py")
+
+    sca_contract, _, cid_contract = registry
+    multicall_contract = deploy("Multicall")
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 2)
+    manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 2, False)
+
+    results = manager.verify_cids_on_chain(sca_contract, "U1", [1, 2, 3], multicall_contract, batch_size=2, from_address=account)
+    assert results[:2] == [(True, True), (True, False)]
+    assert results[2][0] is False and "CID is not registered" in results[2][1]
+    assert results == manager.verify_cids_on_chain(sca_contract, "U1", [1, 2, 3], batch_size=2, from_address=account)
+
+
+def test_multicall_deploy_without_artifacts(tmp_path):
+    import json
+    import pytest
+    from University.university import University
+
+    persistency = tmp_path / "persistency"
+    persistency.mkdir()
+    (persistency / "university_data.json").write_text(json.dumps({
+        "nome": "U1", "ethereum_account_address": "0x" + "00" * 19 + "01", "chiave_account": PRIVATE_KEY,
+        "SID_counter": 0, "CID_counter": 0, "erasmus_students": {}
+    }))
+    build_path = tmp_path / "build"
+    build_path.mkdir()
+    university = University(str(tmp_path), str(build_path))
+    with pytest.raises(FileNotFoundError, match="build.py"):
+        university.deploy_multicall_contract()
+    university.close()
@@ -0,0 +1,44 @@
+from conftest import PRIVATE_KEY, require_compiled_function, without_functions
+
+
+def test_register_sids_without_batch_function_in_abi(manager, account, deploy):
+    sid_contract = without_functions(manager, deploy("SIDSmartContract"), "registraSids")
+
+    sids = [(sid, bytes([sid]) * 8, b"\x03") for sid in range(1, 6)]
+    receipts = manager.register_sids_on_chain(sid_contract, account, PRIVATE_KEY, sids)
+    assert len(receipts) == len(sids) and all(receipt.status == 1 for receipt in receipts)
+    for sid, modulus, exponent in sids:
+        assert sid_contract.functions.getInfoSid(sid).call() == [modulus, exponent, True]
+
+
+def test_register_cids_without_batch_function_in_abi(manager, account, deploy):
+    cid_contract = without_functions(manager, deploy("CIDSmartContract"), "registraCids")
+
+    tx_hashes = manager.register_cids_on_chain(cid_contract, account, PRIVATE_KEY, [1, 2, 3], wait=False)
+    assert len(tx_hashes) == 3
+    for tx_hash in tx_hashes:
+        assert manager.wait_for_transaction(tx_hash).status == 1
+    assert all(cid_contract.functions.getInfoCid(cid).call() for cid in (1, 2, 3))
+
+
+def test_register_sids_in_chunks(manager, account, deploy):
+    sid_contract = deploy("SIDSmartContract")
+    require_compiled_function(sid_contract, "registraSids")
+
+    sids = [(sid, bytes([sid]) * 8, b"\x03") for sid in range(1, 6)]
+    receipts = manager.register_sids_on_chain(sid_contract, account, PRIVATE_KEY, sids, chunk_size=2)
+    # Una transazione per blocco: 2 + 2 + 1 SID.
+    assert len(receipts) == 3 and all(receipt.status == 1 for receipt in receipts)
+    for sid, modulus, exponent in sids:
+        assert sid_contract.functions.getInfoSid(sid).call() == [modulus, exponent, True]
+
+
+def test_register_cids_in_chunks(manager, account, deploy):
+    cid_contract = deploy("CIDSmartContract")
+    require_compiled_function(cid_contract, "registraCids")
+
+    tx_hashes = manager.register_cids_on_chain(cid_contract, account, PRIVATE_KEY, list(range(1, 8)), chunk_size=3, wait=False)
+    assert len(tx_hashes) == 3
+    for tx_hash in tx_hashes:
+        assert manager.wait_for_transaction(tx_hash).status == 1
+    assert all(cid_contract.functions.getInfoCid(cid).call() for cid in range(1, 8))
@@ -0,0 +1,69 @@
+import pytest
+
+from Credential.credential import Credential
+from Credential.fields import Course, ExtraActivity
+from Credential.merkle_tree import MerkleTree
+from University.utils.batch_verification import verify_issuer_signatures
+from utils.crypto_utils import gen_key_pair, sign_hashed_data, verify_hashed_data_signature
+
+
+@pytest.fixture(scope="module")
+def issuer():
+    private_key, public_key = gen_key_pair()
+    numbers = public_key.public_numbers()
+    return private_key, public_key, numbers.n.to_bytes(256, 'big'), numbers.e.to_bytes(3, 'big')
+
+
+def _signed_json(private_key, cid: str, disclose: list = None) -> str:
+    properties = [Course("Algorithms", True, 30, 6, "2024-12-10"), ExtraActivity("Choir", 2), ExtraActivity("Chess", 1)]
+    credential = Credential(cid, "SID:U1:1", "UID:U1", "2025-01-01", properties)
+    signature = sign_hashed_data(private_key, credential.hash())
+    if disclose is not None:
+        multiproof = MerkleTree.generate_multiproof(properties, disclose)
+        credential = Credential(cid, "SID:U1:1", "UID:U1", "2025-01-01", [properties[i] for i in disclose],
+                                merkleMultiproof=multiproof)
+    credential.add_sign(signature)
+    return credential.toJSON()
+
+
+def test_signature_helper(issuer):
+    private_key, public_key, _, _ = issuer
+    digest = "ab" * 32
+    signature = sign_hashed_data(private_key, digest)
+    assert verify_hashed_data_signature(public_key, signature, digest)
+    assert not verify_hashed_data_signature(public_key, signature, "cd" * 32)
+    assert not verify_hashed_data_signature(public_key, "non base64", digest)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_batch_matches_single_verification(issuer, max_workers):
+    private_key, _, modulus, exponent = issuer
+    valid = _signed_json(private_key, "CID:U1:1")
+    disclosed = _signed_json(private_key, "CID:U1:2", disclose=[0, 2])
+    forged = valid.replace("CID:U1:1", "CID:U1:9")
+    other_key = gen_key_pair()[1].public_numbers()
+
+    tasks = [
+        (valid, modulus, exponent),
+        (disclosed, modulus, exponent),
+        (forged, modulus, exponent),
+        (valid, other_key.n.to_bytes(256, 'big'), other_key.e.to_bytes(3, 'big')),
+        ("{}", modulus, exponent),
+    ]
+    results = verify_issuer_signatures(tasks, max_workers, chunksize=1)
+    assert results[:2] == [None, None]
+    assert results[2] == results[3] == "Firma dell'issuer non valida."
+    assert results[4].startswith("Credenziale non valida")
+    assert results == verify_issuer_signatures(tasks, 1)
+
+
+def test_tampered_proof_names_the_property(issuer):
+    private_key, _, modulus, exponent = issuer
+    properties = [ExtraActivity(f"activity{i}", i) for i in range(4)]
+    MerkleTree.populate_proofs(properties)
+    credential = Credential("CID:U1:3", "SID:U1:1", "UID:U1", "2025-01-01", properties)
+    credential.add_sign(sign_hashed_data(private_key, credential.hash()))
+    tampered = credential.toJSON().replace('"activity2"', '"activity7"')
+
+    [error] = verify_issuer_signatures([(tampered, modulus, exponent)])
+    assert error.startswith("La property 2 (ExtraActivity)")
@@ -0,0 +1,70 @@
+import base64
+
+import pytest
+
+from Credential.credential import Credential
+from Credential.fields import Course, ExtraActivity, Scholarship
+from Credential.merkle_tree import MerkleTree
+
+
+def make_credential():
+    properties = [Course("Algorithms", True, 30, 6, "2024-12-10"), Course("Networks", False, None, 9, ""),
+                  ExtraActivity("Choir", 2), Scholarship(-1250.5, "EUR", 3)]
+    MerkleTree.populate_proofs(properties)
+    return Credential("CID:U1:1", "SID:U1:1", "UID:U1", "2025-01-01", properties)
+
+
+def _signed_credential():
+    credential = make_credential()
+    credential.issuerSignature = base64.b64encode(bytes(range(64))).decode("utf-8")
+    return credential
+
+
+def test_roundtrip_preserves_json():
+    credential = _signed_credential()
+    decoded = Credential.fromBinary(credential.toBinary())
+    assert decoded.toJSON() == credential.toJSON()
+    assert decoded.hash() == credential.hash()
+    # Codifica canonica: stessa credenziale, stessi byte.
+    assert decoded.toBinary() == credential.toBinary()
+
+
+def test_roundtrip_with_multiproof():
+    credential = make_credential()
+    root, _ = MerkleTree.generate_proofs(credential.properties)
+    multiproof = MerkleTree.generate_multiproof(credential.properties, [0, 2])
+    disclosed = Credential(credential.CID, credential.SID, credential.UID, credential.issuanceDate,
+                           [credential.properties[0], credential.properties[2]], merkleMultiproof=multiproof)
+
+    decoded = Credential.fromBinary(disclosed.toBinary())
+    assert decoded.merkle_multiproof == multiproof
+    assert MerkleTree.compute_root_from_multiproof(decoded.properties, decoded.merkle_multiproof) == root
+
+
+def test_binary_is_smaller_than_json():
+    credential = _signed_credential()
+    assert len(credential.toBinary()) < len(credential.toJSON().encode("utf-8")) / 2
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda data: data[:-1],
+    lambda data: data + b"\x00",
+    lambda data: b"XXXX" + data[4:],
+    lambda data: data[:len(data) // 2],
+])
+def test_malformed_input_raises_value_error(mutate):
+    with pytest.raises(ValueError):
+        Credential.fromBinary(mutate(_signed_credential().toBinary()))
+
+
+def test_non_canonical_values_are_rejected():
+    credential = make_credential()
+    credential.issuerSignature = "not base64!"
+    with pytest.raises(ValueError):
+        credential.toBinary()
+
+    credential = make_credential()
+    sibling, position = credential.properties[0].merkle_proof[0]
+    credential.properties[0].merkle_proof[0] = (sibling.upper(), position)
+    with pytest.raises(ValueError):
+        credential.toBinary()
@@ -0,0 +1,94 @@
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from services.counter_allocator import CounterAllocator, ORPHANED, RELEASED
+from services.state_store import StateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StateStore(str(tmp_path / "state.sqlite"))
+    yield store
+    store.close()
+
+
+def test_threads_get_unique_ids_and_release_returns_the_rest(store):
+    allocator = CounterAllocator(store, "CID_counter", block_size=16)
+    issued = []
+    lock = threading.Lock()
+
+    def worker():
+        ids = [allocator.next_id() for _ in range(50)]
+        with lock:
+            issued.extend(ids)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(issued)) == len(issued) == 400
+    assert allocator.issued_ids() == sorted(issued)
+    allocator.release()
+    assert allocator.issued_ids() == sorted(issued)
+    assert all(kind == RELEASED for _, _, kind in allocator.unused_ranges())
+
+
+def test_unused_part_of_live_lease_is_not_issued(store):
+    allocator = CounterAllocator(store, "CID_counter")
+    assert allocator.block_size == CounterAllocator.DEFAULT_BLOCK_SIZE > 1
+    assert [allocator.next_id() for _ in range(3)] == [1, 2, 3]
+    assert store.reload("CID_counter") == CounterAllocator.DEFAULT_BLOCK_SIZE
+    assert allocator.issued_ids() == [1, 2, 3]
+
+
+def test_other_workers_leases_count_once_returned(store):
+    first = CounterAllocator(store, "CID_counter", block_size=10)
+    second = CounterAllocator(store, "CID_counter", block_size=10)
+    assert first.next_id() == 1
+    assert [second.next_id() for _ in range(2)] == [11, 12]
+
+    assert first.issued_ids() == [1]
+    second.release()
+    assert first.issued_ids() == [1, 11, 12]
+    # La parte restituita viene riassegnata prima di avanzare il contatore.
+    assert second.next_id() == 13
+
+
+def test_release_while_other_thread_allocates(store):
+    allocator = CounterAllocator(store, "SID_counter", block_size=4)
+    issued = []
+    stop = threading.Event()
+
+    def allocate():
+        while not stop.is_set():
+            issued.append(allocator.next_id())
+
+    thread = threading.Thread(target=allocate)
+    thread.start()
+    for _ in range(200):
+        allocator.release()
+    stop.set()
+    thread.join()
+    allocator.release()
+
+    assert len(set(issued)) == len(issued)
+    assert allocator.issued_ids() == sorted(issued)
+
+
+def test_leases_of_dead_processes_become_orphaned(store):
+    allocator = CounterAllocator(store, "CID_counter", block_size=8)
+    allocator.next_id()
+    dead_pid = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    store.execute("UPDATE counter_leases SET pid = ? WHERE counter = ?", (int(dead_pid.stdout), "CID_counter"))
+    allocator._leases.clear()
+
+    restarted = CounterAllocator(store, "CID_counter", block_size=8)
+    assert restarted.unused_ranges() == [(1, 8, ORPHANED)]
+    # Degli orfani non si sa cosa sia stato emesso: restano fra gli emessi e non vengono riassegnati.
+    assert restarted.issued_ids() == list(range(1, 9))
+    assert restarted.next_id() == 9
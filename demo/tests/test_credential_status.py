@@ -0,0 +1,154 @@
+import json
+
+from conftest import PRIVATE_KEY, require_compiled_function, without_functions
+
+
+def _credential_json(cid: str, sid: str, uid: str = "UID:U1") -> str:
+    return json.dumps({
+        "certificateId": cid, "studentId": sid, "universityId": uid,
+        "issuanceDate": "2025-01-01", "properties": []
+    })
+
+
+def _university(manager, sca_contract, account):
+    from University.university import University
+    university = University.__new__(University)
+    university.blockchain_manager = manager
+    university.ethereum_account_address = account
+    university.event_indexer = None
+    university.__dict__["sca_contract_instance"] = sca_contract
+    return university
+
+
+def test_status_without_aggregate_call_in_abi(manager, account, registry):
+    sca_contract, sid_contract, cid_contract = registry
+    sca_contract = without_functions(manager, sca_contract, "verificaCredenziale")
+
+    manager.register_sid_on_chain(sid_contract, account, PRIVATE_KEY, 1, b"\x05" * 8, b"\x03")
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 2)
+    manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 2, False)
+
+    status = manager.get_credential_status_on_chain(sca_contract, "U1", "U1", 1, 1)
+    assert status["issuerPubKeyModulus"] == b"\x01" * 4
+    assert status["issuerIsRevoked"] is False
+    assert status["studentPubKeyModulus"] == b"\x05" * 8
+    assert status["sidIsValid"] is True
+    assert status["cidIsValid"] is True
+
+    assert manager.get_credential_status_on_chain(sca_contract, "U1", "U1", 1, 2)["cidIsValid"] is False
+    # SID e CID non registrati non sono errori, ma risultano non validi.
+    unknown = manager.get_credential_status_on_chain(sca_contract, "U1", "U1", 9, 9)
+    assert unknown["sidIsValid"] is False and unknown["cidIsValid"] is False
+    assert unknown["studentPubKeyModulus"] == b""
+
+
+def test_composed_status_uses_cached_reads(manager, account, registry):
+    sca_contract, sid_contract, cid_contract = registry
+    sca_contract = without_functions(manager, sca_contract, "verificaCredenziale")
+    manager.register_sid_on_chain(sid_contract, account, PRIVATE_KEY, 1, b"\x05" * 8, b"\x03")
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+    cache = manager.get_read_cache()
+
+    first = manager.get_credential_status_on_chain(sca_contract, "U1", "U1", 1, 1)
+    misses = cache.stats()["misses"]
+    # getUniversityInfo è letto una sola volta quando issuer e università dello studente coincidono.
+    assert misses == 3
+    assert manager.get_credential_status_on_chain(sca_contract, "U1", "U1", 1, 1) == first
+    assert cache.stats()["misses"] == misses and cache.stats()["hits"] == 3
+
+    manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 1, False)
+    assert manager.get_credential_status_on_chain(sca_contract, "U1", "U1", 1, 1)["cidIsValid"] is False
+
+
+def test_aggregate_status_matches_composed_status(manager, account, registry):
+    sca_contract, sid_contract, cid_contract = registry
+    require_compiled_function(sca_contract, "verificaCredenziale")
+    composed_sca = without_functions(manager, sca_contract, "verificaCredenziale")
+
+    manager.register_sid_on_chain(sid_contract, account, PRIVATE_KEY, 1, b"\x05" * 8, b"\x03")
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 2)
+    manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 2, False)
+    for sid, cid in ((1, 1), (1, 2), (9, 9)):
+        assert manager.get_credential_status_on_chain(sca_contract, "U1", "U1", sid, cid) == \
+            manager.get_credential_status_on_chain(composed_sca, "U1", "U1", sid, cid)
+
+
+def test_batch_reads_issuer_once_per_group(manager, account, registry):
+    sca_contract, sid_contract, cid_contract = registry
+    manager.register_sid_on_chain(sid_contract, account, PRIVATE_KEY, 1, b"\x05" * 8, b"\x03")
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 2)
+    manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 2, False)
+
+    university = _university(manager, sca_contract, account)
+    issuer_reads = []
+    get_university_info = manager.get_university_info_on_chain
+    manager.get_university_info_on_chain = lambda sca, uid: issuer_reads.append(uid) or get_university_info(sca, uid)
+
+    reports = university.validate_shared_credentials_batch(
+        [_credential_json("CID:U1:1", "SID:U1:1"), _credential_json("CID:U1:2", "SID:U1:1"), "{}"],
+        max_workers=1
+    )
+    # Una sola lettura per il gruppo "U1": per ogni credenziale si leggono solo SID e CID.
+    assert issuer_reads == ["U1"]
+    assert [report["CID"] for report in reports] == ["CID:U1:1", "CID:U1:2", None]
+    assert not any("revocata" in error for error in reports[0]["errors"])
+    assert "La credenziale associata a questo CID è stata revocata." in reports[1]["errors"]
+    assert reports[2]["errors"] and not reports[2]["valid"]
+
+
+def test_batch_skips_revoked_issuer_group(manager, account, registry):
+    sca_contract, _, _ = registry
+    manager._submit_transaction(
+        manager._build_transaction(sca_contract.functions.setRevokeStatusUniversita("U1", True), account),
+        PRIVATE_KEY, "Revoca università"
+    )
+    university = _university(manager, sca_contract, account)
+    status_reads = []
+    manager.verify_sid_on_chain = lambda *args: status_reads.append(args)
+    manager.verify_cid_on_chain = lambda *args: status_reads.append(args)
+
+    reports = university.validate_shared_credentials_batch(
+        [_credential_json("CID:U1:1", "SID:U1:1"), _credential_json("CID:U1:2", "SID:U1:1")], max_workers=1
+    )
+    assert not status_reads
+    assert all("non è più fidata" in report["errors"][0] for report in reports)
+
+
+def test_shared_credential_stays_valid_after_cid_revocation(manager, account, deploy, registry):
+    from types import SimpleNamespace
+    from conftest import make_credential
+    from Student.student import Student
+    from utils.crypto_utils import gen_key_pair, sign_hashed_data
+
+    def key_bytes(public_key):
+        numbers = public_key.public_numbers()
+        return (numbers.n.to_bytes((numbers.n.bit_length() + 7) // 8, 'big'),
+                numbers.e.to_bytes((numbers.e.bit_length() + 7) // 8, 'big'))
+
+    sca_contract, _, _ = registry
+    sid_contract, cid_contract = deploy("SIDSmartContract"), deploy("CIDSmartContract")
+    university_key, university_public_key = gen_key_pair()
+    student_key, student_public_key = gen_key_pair()
+    manager._submit_transaction(
+        manager._build_transaction(
+            sca_contract.functions.registraUniversita("U2", *key_bytes(university_public_key), False, sid_contract.address, cid_contract.address),
+            account
+        ),
+        PRIVATE_KEY, "Registrazione università"
+    )
+    manager.register_sid_on_chain(sid_contract, account, PRIVATE_KEY, 1, *key_bytes(student_public_key))
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+
+    credential = make_credential("CID:U2:1", "SID:U2:1", "UID:U2")
+    credential.add_sign(sign_hashed_data(university_key, credential.hash()))
+    student = SimpleNamespace(priv_key=student_key)
+    student.challenge = lambda nonce: Student.challenge(student, nonce)
+    university = _university(manager, sca_contract, account)
+
+    university.validate_shared_credential(student, credential.toJSON())
+    # Come prima della lettura aggregata, la revoca del CID non invalida la credenziale condivisa.
+    manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 1, False)
+    university.validate_shared_credential(student, credential.toJSON())
@@ -0,0 +1,158 @@
+import os
+
+import pytest
+
+from conftest import make_credential
+
+
+def _store(backend: str, path):
+    from Student.credential_store import open_credential_store
+    return open_credential_store(str(path), backend)
+
+
+def _log_store(path, credentials: list):
+    store = _store("log", path)
+    saved = store.save_many(credentials)
+    store.close()
+    return saved
+
+
+@pytest.mark.parametrize("backend", ["directory", "log", "sqlite"])
+def test_entries_survive_reopen(backend, tmp_path):
+    credentials = [make_credential(f"CID:U1:{i}") for i in range(1, 4)]
+    store = _store(backend, tmp_path)
+    store.save(credentials[0])
+    store.save_many(credentials[1:], binary=True)
+    store.delete(store.entries[0])
+    store.close()
+
+    store = _store(backend, tmp_path)
+    assert [entry["CID"] for entry in store.entries] == ["CID:U1:2", "CID:U1:3"]
+    assert [entry["format"] for entry in store.entries] == ["bin", "bin"]
+    assert store.positions_of("CID:U1:3") == [1]
+    assert store.load(store.entries[1]).toJSON() == credentials[2].toJSON()
+    store.close()
+
+
+def test_log_rebuilds_lost_index(tmp_path):
+    from Student.credential_store import LOG_INDEX_FILENAME
+    credentials = [make_credential(f"CID:U1:{i}") for i in range(1, 4)]
+    _log_store(tmp_path, credentials)
+    os.remove(tmp_path / LOG_INDEX_FILENAME)
+
+    store = _store("log", tmp_path)
+    assert [store.load(entry).toJSON() for entry in store.entries] == [c.toJSON() for c in credentials]
+    store.close()
+
+
+def test_log_truncates_torn_tail(tmp_path):
+    from Student.credential_store import LOG_FILENAME, LOG_INDEX_FILENAME
+    _log_store(tmp_path, [make_credential("CID:U1:1"), make_credential("CID:U1:2")])
+    os.remove(tmp_path / LOG_INDEX_FILENAME)
+    log_path = tmp_path / LOG_FILENAME
+    size = os.path.getsize(log_path)
+
+    # Ultimo record scritto a metà.
+    with open(log_path, "r+b") as f:
+        f.truncate(size - 10)
+    store = _store("log", tmp_path)
+    assert [entry["CID"] for entry in store.entries] == ["CID:U1:1"]
+    assert os.path.getsize(log_path) == store.entries[0]["end"]
+    store.save(make_credential("CID:U1:3"))
+    store.close()
+
+    store = _store("log", tmp_path)
+    assert [entry["CID"] for entry in store.entries] == ["CID:U1:1", "CID:U1:3"]
+    store.close()
+
+
+def test_log_truncates_tail_with_bad_checksum(tmp_path):
+    from Student.credential_store import LOG_FILENAME, LOG_INDEX_FILENAME
+    _log_store(tmp_path, [make_credential("CID:U1:1"), make_credential("CID:U1:2")])
+    os.remove(tmp_path / LOG_INDEX_FILENAME)
+    log_path = tmp_path / LOG_FILENAME
+    with open(log_path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+
+    store = _store("log", tmp_path)
+    assert [entry["CID"] for entry in store.entries] == ["CID:U1:1"]
+    store.close()
+
+
+def test_log_keeps_records_after_mid_log_corruption(tmp_path):
+    from Student.credential_store import LOG_FILENAME, LOG_INDEX_FILENAME
+    saved = _log_store(tmp_path, [make_credential(f"CID:U1:{i}") for i in range(1, 4)])
+    os.remove(tmp_path / LOG_INDEX_FILENAME)
+    log_path = tmp_path / LOG_FILENAME
+    size = os.path.getsize(log_path)
+    with open(log_path, "r+b") as f:
+        f.seek(saved[1]["offset"])
+        f.write(b"#")
+
+    # Troncare dal record danneggiato perderebbe il terzo: il log resta intatto.
+    with pytest.raises(ValueError):
+        _store("log", tmp_path)
+    assert os.path.getsize(log_path) == size
+
+
+def test_log_skips_undecodable_record(tmp_path):
+    from Student.credential_store import LogCredentialStore, LOG_INDEX_FILENAME, _RECORD_JSON
+    store = _store("log", tmp_path)
+    store.save(make_credential("CID:U1:1"))
+    # Record integro (checksum corretto) ma con contenuto non valido.
+    store._append_record(_RECORD_JSON, b"{}")
+    store.save(make_credential("CID:U1:3"))
+    store.close()
+    os.remove(tmp_path / LOG_INDEX_FILENAME)
+
+    store = LogCredentialStore(str(tmp_path))
+    assert [entry["CID"] for entry in store.entries] == ["CID:U1:1", "CID:U1:3"]
+    assert store.load(store.entries[1]).CID == "CID:U1:3"
+    store.close()
+
+
+def test_log_compact_drops_deleted_records(tmp_path):
+    store = _store("log", tmp_path)
+    store.save_many([make_credential(f"CID:U1:{i}") for i in range(1, 4)])
+    store.delete(store.entries[1])
+    assert store.garbage_ratio() > 0
+    store.compact()
+    assert store.garbage_ratio() == 0
+    store.close()
+
+    store = _store("log", tmp_path)
+    assert [entry["CID"] for entry in store.entries] == ["CID:U1:1", "CID:U1:3"]
+    assert store.load(store.entries[1]).CID == "CID:U1:3"
+    store.close()
+
+
+def test_migrate_directory_to_log(tmp_path):
+    from Student.credential_store import DirectoryCredentialStore, migrate_credentials
+    source = DirectoryCredentialStore(str(tmp_path))
+    source.save(make_credential("CID:U1:1"))
+    source.save(make_credential("CID:U1:2"), binary=True)
+
+    assert migrate_credentials(str(tmp_path), "log", remove_legacy=True) == 2
+    store = _store(None, tmp_path)
+    assert type(store).__name__ == "LogCredentialStore"
+    assert [(entry["CID"], entry["format"]) for entry in store.entries] == [("CID:U1:1", "json"), ("CID:U1:2", "bin")]
+    store.close()
+
+
+def test_lazy_list_decodes_on_access(tmp_path):
+    from Student.credential_store import LazyCredentialList
+    store = _store("sqlite", tmp_path)
+    lazy = LazyCredentialList(store)
+    lazy.extend([make_credential(f"CID:U1:{i}") for i in range(1, 4)])
+
+    assert len(lazy) == 3 and "0 decodificate" in repr(lazy)
+    assert lazy.find("CID:U1:2").CID == "CID:U1:2"
+    assert lazy[-1].CID == "CID:U1:3"
+    assert "2 decodificate" in repr(lazy)
+    lazy.delete(0)
+    assert [c.CID for c in lazy[:]] == ["CID:U1:2", "CID:U1:3"]
+    assert lazy.find("CID:U1:1") is None
+    store.close()
@@ -0,0 +1,91 @@
+import base64
+import hashlib
+
+import pytest
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, utils
+
+from utils.crypto_utils import (gen_key_pair, sign_hashed_data, sign_hashed_data_batch, PublicKeyCache,
+                                recover_public_key_from_modulus_exponent, invalidate_public_key, public_key_cache)
+
+
+@pytest.fixture(scope="module")
+def key_pair():
+    return gen_key_pair()
+
+
+def _verify(public_key, signature: str, hashed_data_as_hex: str):
+    public_key.verify(
+        base64.b64decode(signature),
+        bytes.fromhex(hashed_data_as_hex),
+        padding.PSS(mgf=padding.MGF1(algorithm=hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
+        utils.Prehashed(hashes.SHA256())
+    )
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_batch_signatures_match_inputs_in_order(key_pair, max_workers):
+    private_key, public_key = key_pair
+    digests = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(5)]
+    signatures = sign_hashed_data_batch(private_key, digests, max_workers, chunksize=2)
+
+    assert len(signatures) == len(digests)
+    for signature, digest in zip(signatures, digests):
+        _verify(public_key, signature, digest)
+    # La firma di un hash non vale per un altro.
+    with pytest.raises(Exception):
+        _verify(public_key, signatures[0], digests[1])
+
+
+def test_batch_of_one_matches_single_signature(key_pair):
+    private_key, public_key = key_pair
+    digest = hashlib.sha256(b"credential").hexdigest()
+    assert sign_hashed_data_batch(private_key, [], 2) == []
+    [signature] = sign_hashed_data_batch(private_key, [digest], 2)
+    _verify(public_key, signature, digest)
+    _verify(public_key, sign_hashed_data(private_key, digest), digest)
+
+
+def _key_bytes(public_key) -> tuple:
+    numbers = public_key.public_numbers()
+    return numbers.n.to_bytes((numbers.n.bit_length() + 7) // 8, 'big'), numbers.e.to_bytes(3, 'big')
+
+
+def test_public_key_cache_evicts_least_recently_used():
+    keys = [_key_bytes(gen_key_pair()[1]) for _ in range(3)]
+    cache = PublicKeyCache(maxsize=2)
+    first = cache.get(*keys[0])
+    cache.get(*keys[1])
+    assert cache.get(*keys[0]) is first
+
+    # keys[1] è il meno recente: viene scartato per far posto a keys[2].
+    cache.get(*keys[2])
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 3, 1)
+    assert cache.get(*keys[0]) is first
+    assert cache.stats()["misses"] == 3
+    cache.get(*keys[1])
+    assert cache.stats()["misses"] == 4
+
+
+def test_public_key_cache_invalidate_and_clear(key_pair):
+    modulus, exponent = _key_bytes(key_pair[1])
+    cache = PublicKeyCache(maxsize=4)
+    key = cache.get(modulus, exponent)
+    assert key.public_numbers() == key_pair[1].public_numbers()
+    assert cache.invalidate(modulus, exponent) is True
+    assert cache.invalidate(modulus, exponent) is False
+    assert cache.get(modulus, exponent) is not key
+    cache.clear()
+    assert cache.stats()["size"] == 0
+    with pytest.raises(ValueError):
+        PublicKeyCache(maxsize=0)
+
+
+def test_recovered_keys_come_from_the_process_cache(key_pair):
+    modulus, exponent = _key_bytes(key_pair[1])
+    key = recover_public_key_from_modulus_exponent(modulus, exponent)
+    assert recover_public_key_from_modulus_exponent(modulus, exponent) is key
+    assert invalidate_public_key(modulus, exponent) is True
+    assert recover_public_key_from_modulus_exponent(modulus, exponent) is not key
+    public_key_cache.invalidate(modulus, exponent)
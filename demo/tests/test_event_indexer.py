@@ -0,0 +1,103 @@
+import pytest
+
+from conftest import PRIVATE_KEY
+
+
+@pytest.fixture
+def indexer(manager, registry, tmp_path):
+    from services.abi_cache import load_contract_abi
+    from services.event_indexer import ChainEventIndexer
+    from conftest import BUILD_PATH
+
+    sca_contract, _, _ = registry
+    indexer = ChainEventIndexer(
+        manager.get_web3_instance(), str(tmp_path / "event_index.sqlite"), sca_contract.address,
+        load_contract_abi(BUILD_PATH, "SmartContractAuthority"),
+        load_contract_abi(BUILD_PATH, "SIDSmartContract"),
+        load_contract_abi(BUILD_PATH, "CIDSmartContract"),
+        max_lag_blocks=1, poll_interval=0
+    )
+    yield indexer
+    indexer.close()
+
+
+def _mine(manager, account, count: int):
+    w3 = manager.get_web3_instance()
+    for _ in range(count):
+        w3.eth.send_transaction({"from": account, "to": account, "value": 0})
+
+
+def test_status_matches_chain(manager, account, registry, indexer):
+    sca_contract, sid_contract, cid_contract = registry
+    manager.register_sid_on_chain(sid_contract, account, PRIVATE_KEY, 1, b"\x05" * 8, b"\x03")
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 2)
+    manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 2, False)
+    indexer.sync()
+
+    assert indexer.get_university_info("U1")[:3] == (b"\x01" * 4, b"\x03", False)
+    assert indexer.get_university_info("U2") is None
+    for cid in (1, 2):
+        assert indexer.get_credential_status("U1", "U1", 1, cid) == \
+            manager.get_credential_status_on_chain(sca_contract, "U1", "U1", 1, cid)
+    # Un CID mai visto non è dato per revocato: decide la lettura dalla catena.
+    assert indexer.get_credential_status("U1", "U1", 1, 9) is None
+
+
+def test_recent_registrations_fall_back_to_chain(manager, account, registry, indexer):
+    from University.university import University
+    sca_contract, sid_contract, cid_contract = registry
+    manager.register_sid_on_chain(sid_contract, account, PRIVATE_KEY, 1, b"\x05" * 8, b"\x03")
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+    indexer.sync()
+    university = University.__new__(University)
+    university.blockchain_manager = manager
+    university.event_indexer = indexer
+    university.__dict__["sca_contract_instance"] = sca_contract
+    indexer.poll_interval = 3600
+
+    # Registrazioni entro max_lag_blocks: l'indice è ancora fresco ma non le conosce.
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 2)
+    assert indexer.is_fresh()
+    assert indexer.get_credential_status("U1", "U1", 1, 2) is None
+    assert university._get_credential_status("U1", "U1", 1, 2)["cidIsValid"] is True
+
+    # Un CID revocato nell'indice ma tornato valido nei blocchi non indicizzati.
+    manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 1, False)
+    indexer.sync()
+    indexer.confirmations = 1
+    manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 1, True)
+    indexer.sync()
+    assert indexer.is_fresh() and indexer.lag() == 1
+    assert indexer.get_credential_status("U1", "U1", 1, 1) is None
+    assert university._get_credential_status("U1", "U1", 1, 1)["cidIsValid"] is True
+
+
+def test_stalled_indexer_is_not_fresh(manager, account, registry, indexer):
+    indexer.sync()
+    assert indexer.is_fresh()
+
+    # Senza nuove sincronizzazioni l'indice scade anche se la catena non avanza.
+    indexer.max_staleness = 0
+    assert not indexer.is_fresh()
+    indexer.max_staleness = indexer.DEFAULT_MAX_STALENESS
+
+    _mine(manager, account, 3)
+    indexer.sync()
+    assert indexer.lag() == 0 and indexer.is_fresh()
+
+
+def test_failed_sync_is_not_fresh(manager, account, registry, indexer):
+    indexer.sync()
+    assert indexer.is_fresh()
+
+    get_logs = indexer._get_logs
+    indexer._get_logs = lambda *args: (_ for _ in ()).throw(ConnectionError("nodo non raggiungibile"))
+    _mine(manager, account, 1)
+    with pytest.raises(ConnectionError):
+        indexer.sync()
+    assert not indexer.is_fresh()
+
+    indexer._get_logs = get_logs
+    indexer.sync()
+    assert indexer.is_fresh()
@@ -0,0 +1,128 @@
+import hashlib
+
+from Credential.credential import Credential
+from Credential.fields import Course, ExtraActivity
+from Credential.merkle_tree import MerkleTree
+
+
+def test_leaf_digest_is_cached_until_a_hashed_field_changes():
+    prop = Course("Algorithms", True, 30, 6, "2024-12-10", nonce="n1")
+    digest = prop.leaf_digest()
+    assert digest == hashlib.sha256(prop.toHashString().encode()).digest()
+    assert prop.leaf_digest() is digest
+
+    # La proof non entra nell'hash della foglia.
+    prop.merkle_proof = [("00" * 32, 'R')]
+    assert prop.leaf_digest() is digest
+
+    prop.grade = 28
+    assert prop.leaf_digest() == hashlib.sha256(prop.toHashString().encode()).digest() != digest
+    prop.nonce = "n2"
+    assert prop.leaf_digest() == hashlib.sha256(prop.toHashString().encode()).digest()
+
+
+def test_in_place_mutation_needs_explicit_invalidation():
+    prop = ExtraActivity(["Choir"], 2, nonce="n1")
+    digest = prop.leaf_digest()
+    # La modifica in place non passa da __setattr__: il digest resta quello memorizzato.
+    prop.name.append("Orchestra")
+    assert prop.leaf_digest() is digest
+    prop.invalidate_digest()
+    assert prop.leaf_digest() == hashlib.sha256(prop.toHashString().encode()).digest() != digest
+
+
+def test_root_follows_modified_properties():
+    properties = [ExtraActivity(f"activity{i}", i, nonce=f"nonce{i}") for i in range(5)]
+    root = MerkleTree.get_merkle_root(properties)
+    properties[2].cfu = 12
+    assert MerkleTree.get_merkle_root(properties) != root
+    properties[2].cfu = 2
+    assert MerkleTree.get_merkle_root(properties) == root
+
+
+def test_credential_hash_follows_header_fields():
+    properties = [ExtraActivity("Choir", 2, nonce="n1")]
+    credential = Credential("CID:U1:1", "SID:U1:1", "UID:U1", "2025-01-01", properties)
+    first = credential.hash()
+    assert credential.hash() == first
+
+    credential.CID = "CID:U1:2"
+    assert credential.hash() != first
+    credential.CID = "CID:U1:1"
+    assert credential.hash() == first
+    credential.issuanceDate = "2025-01-02"
+    assert credential.hash() != first
+
+
+def test_properties_have_no_instance_dict():
+    import pytest
+    prop = Course("Algorithms", True, 30, 6, "2024-12-10")
+    assert not hasattr(prop, "__dict__")
+    with pytest.raises(AttributeError):
+        prop.unknown_field = 1
+
+
+def test_registry_decodes_every_typology():
+    from Credential import fields
+    properties = [
+        fields.SubjectInfo("Ada", "Lovelace", "1815-12-10", "F", "UK", "X1", "UK", "ada@example.org"),
+        fields.ErasmusInfo("Erasmus+", "2022-09-01", "2023-01-31"),
+        Course("Algorithms", True, 30, 6, "2024-12-10"),
+        ExtraActivity("Choir", 2),
+        fields.Residence("domicilio", "Via Roma 1"),
+        fields.Scholarship(1200, "EUR", 3),
+    ]
+    MerkleTree.populate_proofs(properties)
+    for prop in properties:
+        decoded = fields.decode_property(prop.toDict())
+        assert type(decoded) is type(prop)
+        assert decoded.toDict() == prop.toDict()
+        assert decoded.leaf_digest() == prop.leaf_digest()
+    assert set(fields.PROPERTY_DECODERS) == {type(p).TYPOLOGY for p in properties}
+
+
+def test_unknown_typology_is_rejected():
+    import pytest
+    from Credential.fields import decode_property
+    with pytest.raises(ValueError, match="Tipologia non supportata"):
+        decode_property({"typology": "Unknown", "data": {}, "nonce": "n1"})
+
+
+def test_registered_property_is_decoded():
+    import sys
+    from Credential import fields
+
+    @fields.register_property
+    class Thesis(fields.Property):
+        __slots__ = ("title",)
+        TYPOLOGY = sys.intern("Thesis")
+
+        def __init__(self, title, nonce=None, merkle_proof=None):
+            super().__init__(merkle_proof)
+            self.title = title
+            if nonce:
+                self.nonce = nonce
+
+        def toString(self):
+            return self.title + str(self.nonce)
+
+        def toDict(self):
+            return self._dict_base(self.TYPOLOGY, {"title": self.title})
+
+        def toHashString(self) -> str:
+            return f"typologyThesisDatatitle{self.title}nonce{self.nonce}"
+
+        @classmethod
+        def fromDict(cls, data, nonce, merkle_proof=None):
+            return cls(data["title"], nonce, merkle_proof)
+
+    try:
+        credential = Credential("CID:U1:1", "SID:U1:1", "UID:U1", "2025-01-01", [Thesis("Merkle trees", nonce="n1")])
+        decoded = Credential.fromJSON(credential.toJSON())
+        assert type(decoded.properties[0]) is Thesis
+        assert decoded.hash() == credential.hash()
+        # Il codec binario usa lo stesso registro per gli slot della classe.
+        assert Credential.fromBinary(credential.toBinary()).toJSON() == credential.toJSON()
+    finally:
+        fields.PROPERTY_DECODERS.pop("Thesis", None)
+        fields.PROPERTY_CLASSES.pop("Thesis", None)
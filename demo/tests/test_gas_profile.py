@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from conftest import PRIVATE_KEY
+
+
+def test_flag_transition_gets_its_own_estimate(manager, account, deploy, tmp_path):
+    # modificaCid(false) costa meno di modificaCid(true): la prima stima non deve valere per la seconda.
+    cid_contract = deploy("CIDSmartContract")
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 3)
+
+    assert manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 3, False).status == 1
+    assert manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 3, True).status == 1
+    assert cid_contract.functions.getInfoCid(3).call() is True
+
+    profile = json.loads((tmp_path / "gas_profile.json").read_text())
+    assert profile["modificaCid(false)"] < profile["modificaCid(true)"]
+
+
+def test_out_of_gas_forgets_learned_estimate(manager, account, deploy):
+    cid_contract = deploy("CIDSmartContract")
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+    manager._gas_profile.record("modificaCid(false)", 22000)
+
+    with pytest.raises(Exception):
+        manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 1, False)
+    assert "modificaCid(false)" not in manager._gas_profile._estimates
+
+    assert manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 1, False).status == 1
+    assert cid_contract.functions.getInfoCid(1).call() is False
+
+
+def test_key_for_arguments(manager, deploy):
+    from services.fee_oracle import GasProfile
+    sid_contract = deploy("SIDSmartContract")
+    function = sid_contract.functions.modificaSid(1, b"\x01" * 8, b"\x03", True)
+    assert GasProfile.key_for(function) == "modificaSid(8,1,true)"
@@ -0,0 +1,107 @@
+import hashlib
+
+import pytest
+
+from Credential.fields import ExtraActivity
+from Credential.merkle_tree import MerkleProofError, MerkleTree
+
+
+# Albero della versione precedente, su stringhe esadecimali: il nodo padre è lo
+# SHA-256 della concatenazione dei figli e un nodo dispari viene duplicato.
+def _reference_levels(properties) -> list:
+    level = [hashlib.sha256(p.toHashString().encode()).hexdigest() for p in properties]
+    levels = [level]
+    while len(level) > 1:
+        if len(level) % 2:
+            level = level + [level[-1]]
+        level = [hashlib.sha256((level[i] + level[i + 1]).encode()).hexdigest() for i in range(0, len(level), 2)]
+        levels.append(level)
+    return levels
+
+
+def _reference_proof(levels: list, index: int) -> list:
+    proof = []
+    for level in levels[:-1]:
+        if index % 2 == 0:
+            proof.append((level[index + 1] if index + 1 < len(level) else level[index], 'R'))
+        else:
+            proof.append((level[index - 1], 'L'))
+        index //= 2
+    return proof
+
+
+def _properties(count: int) -> list:
+    return [ExtraActivity(f"activity{i}", i, nonce=f"nonce{i}") for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 4, 5, 7, 8, 9, 16, 17])
+def test_root_and_proofs_match_reference(count):
+    properties = _properties(count)
+    levels = _reference_levels(properties)
+
+    assert MerkleTree.get_merkle_root(properties) == levels[-1][0]
+    MerkleTree.populate_proofs(properties)
+    for index, prop in enumerate(properties):
+        assert list(prop.merkle_proof) == _reference_proof(levels, index)
+    assert MerkleTree.get_merkle_root(properties) == levels[-1][0]
+
+
+@pytest.mark.parametrize("count", [1, 3, 8, 11])
+def test_generate_proofs_matches_single_proofs(count):
+    properties = _properties(count)
+    leaf_digests = [hashlib.sha256(p.toHashString().encode()).digest() for p in properties]
+
+    root, proofs = MerkleTree.generate_proofs(properties)
+    assert root == MerkleTree.get_merkle_root(properties)
+    assert proofs == [MerkleTree._get_proof_static(leaf_digests, i) for i in range(count)]
+    assert MerkleTree.populate_proofs(properties) == root
+    # Proof già presenti: la richiesta viene ignorata e la root resta la stessa.
+    assert MerkleTree.populate_proofs(properties) == root
+
+
+def test_proof_rebuilds_root():
+    properties = _properties(6)
+    root = MerkleTree.get_merkle_root(properties)
+    MerkleTree.populate_proofs(properties)
+    leaf_hash = hashlib.sha256(properties[5].toHashString().encode()).hexdigest()
+    assert MerkleTree.compute_root_from_proof(leaf_hash, properties[5].merkle_proof) == root
+
+
+def test_modified_property_is_rejected():
+    properties = _properties(5)
+    MerkleTree.populate_proofs(properties)
+    properties[3].name = "altered"
+    with pytest.raises(ValueError):
+        MerkleTree.get_merkle_root(properties)
+
+
+def test_proof_error_names_the_failing_property():
+    properties = _properties(9)
+    MerkleTree.populate_proofs(properties)
+    assert MerkleTree.verify_proofs(properties) == MerkleTree.get_merkle_root(_properties(9))
+
+    properties[6].cfu = 60
+    with pytest.raises(MerkleProofError) as error:
+        MerkleTree.get_merkle_root(properties)
+    assert error.value.property_index == 6
+    assert error.value.typology == "ExtraActivity"
+
+
+def test_disclosed_subset_is_verified():
+    properties = _properties(7)
+    root = MerkleTree.populate_proofs(properties)
+    assert MerkleTree.get_merkle_root([properties[1], properties[6], properties[4]]) == root
+
+
+def test_proofs_of_different_depth_are_rejected():
+    properties = _properties(4)
+    MerkleTree.populate_proofs(properties)
+    properties[2].merkle_proof = properties[2].merkle_proof[:-1]
+    with pytest.raises(MerkleProofError) as error:
+        MerkleTree.get_merkle_root(properties)
+    assert error.value.property_index == 2
+
+
+def test_empty_tree_is_rejected():
+    with pytest.raises(ValueError):
+        MerkleTree.get_merkle_root([])
@@ -0,0 +1,81 @@
+import pytest
+
+from Credential.credential import Credential
+from Credential.fields import Course
+from Credential.merkle_tree import MerkleTree
+
+
+def _properties(count: int) -> list:
+    return [Course(f"course{i}", True, 18 + i % 13, 6, "2024-06-01", nonce=f"nonce{i}") for i in range(count)]
+
+
+@pytest.mark.parametrize("count, indices", [
+    (1, [0]),
+    (2, [1]),
+    (3, [2]),
+    (5, [4]),
+    (5, [0, 4]),
+    (7, [1, 2, 6]),
+    (8, [0, 1, 2, 3, 4, 5, 6, 7]),
+    (9, [8]),
+    (13, [0, 5, 11, 12]),
+])
+def test_multiproof_rebuilds_root(count, indices):
+    # Con un numero dispari di nodi l'ultimo è accoppiato con sé stesso e non
+    # richiede alcun fratello nella multiproof.
+    properties = _properties(count)
+    root = MerkleTree.get_merkle_root(properties)
+    multiproof = MerkleTree.generate_multiproof(properties, indices)
+
+    assert multiproof["leafCount"] == count
+    assert multiproof["leafIndices"] == indices
+    assert MerkleTree.compute_root_from_multiproof([properties[i] for i in indices], multiproof) == root
+
+
+def test_multiproof_is_smaller_than_single_proofs():
+    properties = _properties(200)
+    indices = list(range(0, 200, 7))
+    multiproof = MerkleTree.generate_multiproof(properties, indices)
+    _, proofs = MerkleTree.generate_proofs(properties)
+    assert len(multiproof["siblings"]) < sum(len(proofs[i]) for i in indices) / 2
+    assert MerkleTree.compute_root_from_multiproof([properties[i] for i in indices], multiproof) == MerkleTree.get_merkle_root(properties)
+
+
+def test_multiproof_from_partial_credential():
+    properties = _properties(11)
+    root = MerkleTree.get_merkle_root(properties)
+    multiproof = MerkleTree.generate_multiproof(properties, [1, 4, 5, 9])
+    disclosed = [properties[i] for i in (1, 4, 5, 9)]
+
+    smaller = MerkleTree.generate_multiproof(disclosed, [4, 9], multiproof)
+    assert MerkleTree.compute_root_from_multiproof([properties[4], properties[9]], smaller) == root
+    with pytest.raises(ValueError):
+        MerkleTree.generate_multiproof(disclosed, [3], multiproof)
+
+
+def test_altered_or_mismatched_properties_change_the_root():
+    properties = _properties(6)
+    root = MerkleTree.get_merkle_root(properties)
+    multiproof = MerkleTree.generate_multiproof(properties, [0, 3])
+
+    altered = _properties(6)
+    altered[3].grade = 30
+    assert MerkleTree.compute_root_from_multiproof([altered[0], altered[3]], multiproof) != root
+    with pytest.raises(ValueError):
+        MerkleTree.compute_root_from_multiproof([properties[0]], multiproof)
+    with pytest.raises(ValueError):
+        MerkleTree.compute_root_from_multiproof([properties[0], properties[3]], dict(multiproof, siblings=multiproof["siblings"][:-1]))
+    with pytest.raises(IndexError):
+        MerkleTree.generate_multiproof(properties, [6])
+
+
+def test_disclosed_credential_keeps_the_hash():
+    properties = _properties(5)
+    credential = Credential("CID:U1:1", "SID:U1:1", "UID:U1", "2025-01-01", properties)
+    multiproof = MerkleTree.generate_multiproof(properties, [1, 3])
+    disclosed = Credential("CID:U1:1", "SID:U1:1", "UID:U1", "2025-01-01", [properties[1], properties[3]],
+                           merkleMultiproof=multiproof)
+
+    decoded = Credential.fromJSON(disclosed.toJSON())
+    assert decoded.merkle_multiproof == multiproof
+    assert decoded.hash() == credential.hash()
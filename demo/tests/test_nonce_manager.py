@@ -0,0 +1,89 @@
+import threading
+
+from conftest import PRIVATE_KEY
+
+
+def test_allocations_are_unique_across_threads():
+    from services.nonce_manager import NonceManager
+    nonce_manager = NonceManager()
+    fetches = []
+    allocated = []
+
+    def worker():
+        for _ in range(200):
+            allocated.append(nonce_manager.allocate("0xA", lambda address: fetches.append(address) or 7))
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(allocated) == list(range(7, 7 + 1600))
+    # Il nodo viene interrogato una sola volta per account.
+    assert fetches == ["0xA"]
+
+
+def test_release_reuses_last_nonce_and_resyncs_on_gap():
+    from services.nonce_manager import NonceManager
+    nonce_manager = NonceManager()
+    fetches = []
+    fetch = lambda address: fetches.append(address) or 3
+
+    assert nonce_manager.allocate("0xA", fetch) == 3
+    assert nonce_manager.allocate("0xA", fetch) == 4
+    nonce_manager.release("0xA", 4)
+    assert nonce_manager.allocate("0xA", fetch) == 4
+
+    # Il nonce 3 non è l'ultimo: resta un buco e si torna a chiedere al nodo.
+    nonce_manager.release("0xA", 3)
+    assert nonce_manager.allocate("0xA", fetch) == 3
+    assert fetches == ["0xA", "0xA"]
+
+    nonce_manager.resync("0xA")
+    assert nonce_manager.allocate("0xA", lambda address: 10) == 10
+    assert nonce_manager.allocate("0xB", lambda address: 0) == 0
+
+
+def test_nonce_errors_are_recognised():
+    from services.nonce_manager import is_nonce_error
+    assert is_nonce_error(ValueError("Invalid transaction nonce: Expected 3, but got 2"))
+    assert is_nonce_error(ValueError("nonce too low"))
+    assert not is_nonce_error(ValueError("insufficient funds for gas"))
+
+
+def test_synced_account_allocates_without_fetch():
+    import pytest
+    from services.nonce_manager import NonceManager
+    nonce_manager = NonceManager()
+    with pytest.raises(RuntimeError):
+        nonce_manager.allocate("0xA")
+    nonce_manager.sync("0xA", 5)
+    # Un account già sincronizzato non viene riportato indietro.
+    nonce_manager.sync("0xA", 2)
+    assert nonce_manager.is_synced("0xA")
+    assert nonce_manager.allocate("0xA") == 5
+    nonce_manager.resync("0xA")
+    assert not nonce_manager.is_synced("0xA")
+
+
+def test_pipelined_transactions_without_waiting(manager, account, deploy):
+    cid_contract = deploy("CIDSmartContract")
+    w3 = manager.get_web3_instance()
+    tx_hashes = [manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, cid, wait=False) for cid in range(1, 6)]
+    receipts = [manager.wait_for_transaction(tx_hash) for tx_hash in tx_hashes]
+
+    assert all(receipt.status == 1 for receipt in receipts)
+    nonces = [w3.eth.get_transaction(tx_hash)["nonce"] for tx_hash in tx_hashes]
+    assert nonces == list(range(nonces[0], nonces[0] + 5))
+
+
+def test_resync_after_external_transaction(manager, account, deploy):
+    cid_contract = deploy("CIDSmartContract")
+    w3 = manager.get_web3_instance()
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+
+    # Un'altra applicazione usa lo stesso account: il nonce locale resta indietro.
+    w3.eth.send_transaction({"from": account, "to": account, "value": 0})
+    expected_nonce = w3.eth.get_transaction_count(account, "pending")
+    receipt = manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 2)
+    assert receipt.status == 1
+    assert w3.eth.get_transaction(receipt.transactionHash)["nonce"] == expected_nonce
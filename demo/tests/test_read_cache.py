@@ -0,0 +1,55 @@
+from conftest import PRIVATE_KEY
+
+
+def _register_university(manager, account, sca_contract, uid, sid_contract, cid_contract):
+    manager._submit_transaction(
+        manager._build_transaction(
+            sca_contract.functions.registraUniversita(uid, b"\x02" * 4, b"\x03", False, sid_contract.address, cid_contract.address),
+            account
+        ),
+        PRIVATE_KEY, "Registrazione università"
+    )
+
+
+def test_modification_invalidates_cached_read(manager, account, registry):
+    sca_contract, _, cid_contract = registry
+    cache = manager.get_read_cache()
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+
+    assert manager.verify_cid_on_chain(sca_contract, "U1", 1) is True
+    assert manager.verify_cid_on_chain(sca_contract, "U1", 1) is True
+    assert cache.stats()["hits"] == 1
+
+    manager.modifica_cid(cid_contract, account, PRIVATE_KEY, 1, False)
+    assert manager.verify_cid_on_chain(sca_contract, "U1", 1) is False
+
+
+def test_registrations_invalidate_cached_reads(manager, account, deploy, registry):
+    sca_contract, sid_contract, cid_contract = registry
+    cache = manager.get_read_cache()
+    manager.register_sid_on_chain(sid_contract, account, PRIVATE_KEY, 1, b"\x05" * 8, b"\x03")
+    manager.register_cid_on_chain(cid_contract, account, PRIVATE_KEY, 1)
+
+    manager.verify_sid_on_chain(sca_contract, "U1", 1)
+    manager.verify_cid_on_chain(sca_contract, "U1", 1)
+    manager.get_university_info_on_chain(sca_contract, "U1")
+    assert cache.stats()["size"] == 3
+
+    # Le stesse chiavi registrate altrove: SIDRegistered, CIDRegistered e UniversityRegistered.
+    other_sid, other_cid, other_sca = deploy("SIDSmartContract"), deploy("CIDSmartContract"), deploy("SmartContractAuthority")
+    manager.register_sid_on_chain(other_sid, account, PRIVATE_KEY, 1, b"\x06" * 8, b"\x03")
+    assert cache.stats()["size"] == 2
+    manager.register_cid_on_chain(other_cid, account, PRIVATE_KEY, 1)
+    assert cache.stats()["size"] == 1
+    _register_university(manager, account, other_sca, "U1", other_sid, other_cid)
+    assert cache.stats()["size"] == 0
+
+
+def test_reverted_reads_are_not_cached(manager, registry):
+    import pytest
+    sca_contract, _, _ = registry
+    cache = manager.get_read_cache()
+    for _ in range(2):
+        with pytest.raises(Exception):
+            manager.verify_cid_on_chain(sca_contract, "U1", 42)
+    assert cache.stats()["size"] == 0
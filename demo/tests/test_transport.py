@@ -0,0 +1,53 @@
+import pytest
+
+UNREACHABLE_URL = "http://127.0.0.1:1"
+
+
+@pytest.fixture
+def transports():
+    from services.transport import close_transports
+    close_transports()
+    yield
+    close_transports()
+
+
+def test_one_transport_per_endpoint(transports):
+    from services.transport import get_transport
+    transport = get_transport(UNREACHABLE_URL)
+    assert get_transport(UNREACHABLE_URL) is transport
+    assert get_transport("http://127.0.0.1:2") is not transport
+
+
+def test_close_transports_drops_registry(transports):
+    from services.transport import get_transport, close_transports
+    transport = get_transport(UNREACHABLE_URL)
+    close_transports()
+    assert get_transport(UNREACHABLE_URL) is not transport
+
+
+def test_session_pool_is_sized(transports):
+    from services.transport import Web3Transport
+    transport = Web3Transport(UNREACHABLE_URL, pool_size=4)
+    adapter = transport._session.get_adapter(UNREACHABLE_URL)
+    assert adapter._pool_maxsize == 4
+    transport.close()
+    with pytest.raises(ValueError):
+        Web3Transport(UNREACHABLE_URL, pool_size=0)
+
+
+def test_managers_share_transport_state(transports):
+    from University.services.university_blockchain_manager import UniversityBlockchainManager
+    from SmartContractAuthority.services.sca_blockchain_manager import SCABlockchainManager
+    university_manager = UniversityBlockchainManager(UNREACHABLE_URL)
+    sca_manager = SCABlockchainManager(UNREACHABLE_URL)
+    assert university_manager._transport is sca_manager._transport
+    assert university_manager._nonce_manager is sca_manager._nonce_manager
+    assert university_manager._read_cache is sca_manager._read_cache
+
+
+def test_connection_is_checked_lazily(transports):
+    from University.services.university_blockchain_manager import UniversityBlockchainManager
+    # La costruzione non contatta il nodo: l'errore arriva alla prima richiesta.
+    manager = UniversityBlockchainManager(UNREACHABLE_URL)
+    with pytest.raises(ConnectionError):
+        manager.get_web3_instance()
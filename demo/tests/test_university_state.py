@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+from conftest import BUILD_PATH
+
+
+@pytest.fixture
+def university_root(tmp_path):
+    persistency = tmp_path / "persistency"
+    persistency.mkdir()
+    (persistency / "university_data.json").write_text(json.dumps({
+        "nome": "U1",
+        "ethereum_account_address": "0x" + "00" * 19 + "01",
+        "chiave_account": "0x" + "00" * 31 + "01",
+        "SID_counter": 4,
+        "CID_counter": 10,
+        "erasmus_students": {"SID:U2:1": "CID:U2:3"}
+    }))
+    return tmp_path
+
+
+def _open(root, **kwargs):
+    from University.university import University
+    return University(str(root), BUILD_PATH, **kwargs)
+
+
+def test_json_is_imported_once_and_marked(university_root):
+    university = _open(university_root)
+    assert university.SID_counter == 4
+    assert university.erasmus_students["SID:U2:1"] == "CID:U2:3"
+    assert university.cid_allocator.next_id() == 11
+    university.close()
+
+    snapshot = json.loads((university_root / "persistency" / "university_data.json").read_text())
+    assert snapshot["state_store"] == "university_state.sqlite"
+
+    university = _open(university_root)
+    assert university.CID_counter >= 11
+    university.close()
+
+
+def test_missing_state_file_is_not_replaced_by_snapshot(university_root):
+    university = _open(university_root)
+    university.cid_allocator.next_id()
+    university.close()
+
+    state_path = university_root / "persistency" / "university_state.sqlite"
+    os.remove(state_path)
+    with pytest.raises(RuntimeError, match="Ripristinare il file di stato"):
+        _open(university_root)
+    # Il tentativo fallito non lascia un file di stato vuoto.
+    assert not state_path.exists()
+
+
+def test_updates_refresh_the_json_snapshot(university_root):
+    university = _open(university_root)
+    snapshot_path = university_root / "persistency" / "university_data.json"
+    university.update_uid("UID:U1")
+    university.update_sca_contract_address("0x" + "00" * 19 + "11")
+    snapshot = json.loads(snapshot_path.read_text())
+    assert snapshot["UID"] == "UID:U1"
+    assert snapshot["SCA_contract_address"] == "0x" + "00" * 19 + "11"
+
+    university.cid_allocator.next_id()
+    university.close()
+    # Alla chiusura l'istantanea riporta i contatori con i blocchi già riservati.
+    assert json.loads(snapshot_path.read_text())["CID_counter"] >= 11
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from conftest import BUILD_PATH
+
+SCA_ADDRESS = "0x" + "00" * 19 + "11"
+
+
+@pytest.fixture
+def university_root(tmp_path):
+    persistency = tmp_path / "persistency"
+    persistency.mkdir()
+    (persistency / "university_data.json").write_text(json.dumps({
+        "nome": "U1",
+        "ethereum_account_address": "0x" + "00" * 19 + "01",
+        "chiave_account": "0x" + "00" * 31 + "01",
+        "SID_counter": 4,
+        "CID_counter": 10,
+        "erasmus_students": {}
+    }))
+    return tmp_path
+
+
+def test_verifier_only_university_does_not_load_issuer_resources(university_root):
+    from University.university import University
+    university = University(str(university_root), BUILD_PATH, verifier_only=True)
+    # Nessuna chiave PEM è presente: la modalità di sola verifica non la carica.
+    for name in ("chiave_privata", "sid_contract_instance", "cid_contract_instance", "sid_allocator", "cid_allocator"):
+        with pytest.raises(RuntimeError, match="sola verifica"):
+            getattr(university, name)
+    assert university.blockchain_manager._gas_profile.path is None
+    university.close()
+
+
+def test_sca_contract_is_bound_lazily(university_root):
+    from University.university import University
+    university = University(str(university_root), BUILD_PATH, verifier_only=True)
+    assert university.sca_contract_instance is None
+    university.update_sca_contract_address(SCA_ADDRESS)
+    assert university.sca_contract_instance.address == SCA_ADDRESS
+    assert university.sca_contract_instance is university.sca_contract_instance
+    university.close()
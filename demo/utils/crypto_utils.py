@@ -2,8 +2,15 @@ import base64
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import utils
+from cryptography.exceptions import InvalidSignature
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from hashlib import sha256
+import threading
 import os
 
+_worker_private_key = None
+
 def sign_hashed_data(private_key, hashed_data_as_hex: str) -> str:
     
     signature = private_key.sign(
@@ -16,15 +23,108 @@ def sign_hashed_data(private_key, hashed_data_as_hex: str) -> str:
     )
     return base64.b64encode(signature).decode('utf-8')
 
+def verify_hashed_data_signature(public_key, signature_b64: str, hashed_data_as_hex: str) -> bool:
+    try:
+        public_key.verify(
+            base64.b64decode(signature_b64),
+            bytes.fromhex(hashed_data_as_hex),
+            padding.PSS(
+                mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                salt_length=padding.PSS.MAX_LENGTH
+            ),
+            utils.Prehashed(hashes.SHA256())
+        )
+        return True
+    except (InvalidSignature, TypeError, ValueError):
+        return False
+
+def _init_signing_worker(private_key_pem: bytes):
+    global _worker_private_key
+    _worker_private_key = serialization.load_pem_private_key(private_key_pem, None)
+
+def _sign_in_worker(hashed_data_as_hex: str) -> str:
+    return sign_hashed_data(_worker_private_key, hashed_data_as_hex)
+
+def sign_hashed_data_batch(private_key, hashed_data_as_hex: list[str], max_workers: int = None, chunksize: int = 32) -> list[str]:
+    if max_workers == 1 or len(hashed_data_as_hex) <= 1:
+        return [sign_hashed_data(private_key, h) for h in hashed_data_as_hex]
+
+    private_key_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_signing_worker, initargs=(private_key_pem,)) as executor:
+        return list(executor.map(_sign_in_worker, hashed_data_as_hex, chunksize=chunksize))
+
 def gen_key_pair():
     priv = rsa.generate_private_key(public_exponent=65537, key_size=2048)
     return priv, priv.public_key()
 
+class PublicKeyCache:
+    def __init__(self, maxsize: int = 256):
+        if maxsize <= 0:
+            raise ValueError("La dimensione della cache deve essere positiva.")
+        self.maxsize = maxsize
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _cache_key(modulus: bytes, exponent: bytes) -> bytes:
+        return sha256(len(modulus).to_bytes(4, 'big') + bytes(modulus) + bytes(exponent)).digest()
+
+    def get(self, modulus: bytes, exponent: bytes):
+        cache_key = self._cache_key(modulus, exponent)
+        with self._lock:
+            public_key = self._keys.get(cache_key)
+            if public_key is not None:
+                self._keys.move_to_end(cache_key)
+                self._hits += 1
+                return public_key
+            self._misses += 1
+
+        modulus_int = int.from_bytes(modulus, byteorder='big')
+        exponent_int = int.from_bytes(exponent, byteorder='big')
+        public_key = rsa.RSAPublicNumbers(exponent_int, modulus_int).public_key()
+
+        with self._lock:
+            self._keys[cache_key] = public_key
+            self._keys.move_to_end(cache_key)
+            while len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+                self._evictions += 1
+        return public_key
+
+    def invalidate(self, modulus: bytes, exponent: bytes) -> bool:
+        with self._lock:
+            return self._keys.pop(self._cache_key(modulus, exponent), None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._keys),
+                "maxsize": self.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0
+            }
+
+public_key_cache = PublicKeyCache()
+
 def recover_public_key_from_modulus_exponent(modulus:bytes,exponent:bytes):
-    modulus_int = int.from_bytes(modulus, byteorder='big')
-    exponent_int = int.from_bytes(exponent, byteorder='big')
-    public_numbers = rsa.RSAPublicNumbers(exponent_int, modulus_int)
-    return public_numbers.public_key()
+    return public_key_cache.get(modulus, exponent)
+
+def invalidate_public_key(modulus: bytes, exponent: bytes) -> bool:
+    return public_key_cache.invalidate(modulus, exponent)
 
 
 def generate_random_nonce(length_bytes: int = 32) -> bytes: